@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Paginated API Harvester
+
+Fetches every page of a paginated JSON endpoint instead of only the first:
+the first page gives the total count, the remaining pages are fetched at
+once through a FetchEngine, and items are parsed and appended to a JSONL
+file as each page arrives. Items are deduplicated by the API's own product
+id (the name only when an item has none).
+
+Progress is kept beside the output, in <output>.state.json, as the pages
+completed per harvest. An interrupted run picks up where it stopped:
+completed pages are not fetched again, and items of a page that was only
+partly written are recognised by id when it is fetched again.
+"""
+
+import os
+import json
+import math
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import requests
+
+from fetch_engine import FetchEngine
+
+DEFAULT_PAGE_SIZE = 36
+
+# Where APIs put the total number of results, and each item's stable id
+TOTAL_KEYS = ('SearchResultsCount', 'TotalRecordCount', 'totalRecordCount', 'totalCount', 'total', 'count')
+ID_KEYS = ('Stockcode', 'StockCode', 'stockcode', 'productId', 'ProductId', 'id', 'sku', 'articleId')
+
+
+def find_total(data: Any) -> Optional[int]:
+    """The total result count a response reports, if any"""
+    if isinstance(data, dict):
+        for key in TOTAL_KEYS:
+            if isinstance(data.get(key), int):
+                return data[key]
+    return None
+
+
+def item_id(item: Dict) -> Optional[str]:
+    """An item's stable product id, if it has one"""
+    for key in ID_KEYS:
+        if item.get(key) not in (None, ''):
+            return str(item[key])
+    return None
+
+
+def search_page_params(page: int, page_size: int) -> Dict:
+    return {'pageNumber': page, 'pageSize': page_size}
+
+
+def offset_page_params(page: int, page_size: int) -> Dict:
+    return {'offset': (page - 1) * page_size, 'limit': page_size}
+
+
+class JSONLWriter:
+    def __init__(self, path: str):
+        """Append records to a JSONL file, remembering the ids it already holds"""
+        self.path = path
+        self.ids: Set[str] = set()
+        self.count = 0
+        if os.path.exists(path):
+            self._load()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        # A line cut short by an interruption is dropped, so appends start on a fresh line
+        complete = data[:data.rfind(b'\n') + 1]
+        if len(complete) != len(data):
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(complete))
+        for line in complete.decode('utf-8').splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self.count += 1
+            self.ids.add(record.get('sourceId') or record.get('productName'))
+
+    def write(self, record: Dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class HarvestState:
+    def __init__(self, path: str):
+        """Pages completed per harvest key, saved after every page"""
+        self.path = path
+        self.harvests: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.harvests = json.load(f)
+
+    def pages_done(self, key: str) -> Set[int]:
+        return set(self.harvests.get(key, {}).get('done', []))
+
+    def total_pages(self, key: str) -> Optional[int]:
+        return self.harvests.get(key, {}).get('pages')
+
+    def mark(self, key: str, page: int, total_pages: Optional[int]):
+        harvest = self.harvests.setdefault(key, {'pages': total_pages, 'done': []})
+        harvest['pages'] = total_pages
+        if page not in harvest['done']:
+            harvest['done'].append(page)
+        self.save()
+
+    def save(self):
+        # Replace the file whole, so an interruption leaves the old or the new state
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.harvests, f)
+        os.replace(temp_path, self.path)
+
+
+class PaginatedHarvester:
+    def __init__(self, engine: FetchEngine, output_path: str,
+                 find_items: Callable[[Any], Optional[List]],
+                 parse_item: Callable[[Dict, int], Optional[Dict]], resume: bool = True):
+        """
+        Args:
+            engine: Fetch engine whose rate limits every page request obeys
+            output_path: JSONL file the parsed items are appended to
+            find_items: Returns the list of raw items in a response
+            parse_item: Turns a raw item and its running number into a record, or None
+            resume: Continue from <output>.state.json; otherwise start both files afresh
+        """
+        state_path = output_path + '.state.json'
+        if not resume:
+            for path in (output_path, state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.engine = engine
+        self.writer = JSONLWriter(output_path)
+        self.state = HarvestState(state_path)
+        self.find_items = find_items
+        self.parse_item = parse_item
+        self.failed_pages = 0
+
+    async def _fetch_page(self, url: str, params: Dict) -> Optional[Any]:
+        """A page's decoded JSON, or None if it could not be fetched"""
+        try:
+            response = await self.engine.fetch(url, params)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            return None
+
+    def _write_page(self, key: str, page: int, items: List, total_pages: Optional[int]) -> int:
+        written = 0
+        for item in items:
+            record = self.parse_item(item, self.writer.count + 1) if isinstance(item, dict) else None
+            if not record:
+                continue
+            source_id = item_id(item)
+            dedupe_key = source_id or record.get('productName')
+            if dedupe_key in self.writer.ids:
+                continue
+            record['sourceId'] = source_id
+            self.writer.ids.add(dedupe_key)
+            self.writer.write(record)
+            written += 1
+        # Items first, then the page: a page is only marked once all of it is on disk
+        self.writer.flush()
+        self.state.mark(key, page, total_pages)
+        return written
+
+    async def harvest(self, key: str, url: str, params: Dict,
+                      page_params: Callable[[int, int], Dict] = search_page_params,
+                      page_size: int = DEFAULT_PAGE_SIZE) -> Optional[int]:
+        """Fetch every page of one query; the number of new items, or None if its first page had none
+
+        The total count on page 1 gives the page count and the rest are
+        fetched at once. Without a total, pages are fetched one by one
+        until a short page.
+        """
+        done = self.state.pages_done(key)
+        total_pages = self.state.total_pages(key)
+        written = 0
+
+        if 1 not in done:
+            data = await self._fetch_page(url, {**params, **page_params(1, page_size)})
+            items = self.find_items(data) if data is not None else None
+            if not items:
+                return None
+            total = find_total(data)
+            total_pages = math.ceil(total / page_size) if total else None
+            if total_pages is None and len(items) < page_size:
+                total_pages = 1
+            written += self._write_page(key, 1, items, total_pages)
+
+        if total_pages is None:
+            # No total to go on: walk the pages in order until one comes back short
+            page = max(done | {1}) + 1
+            while True:
+                data = await self._fetch_page(url, {**params, **page_params(page, page_size)})
+                items = self.find_items(data) if data is not None else None
+                if data is None:
+                    self.failed_pages += 1
+                    return written
+                last = not items or len(items) < page_size
+                written += self._write_page(key, page, items or [], page if last else None)
+                if last:
+                    return written
+                page += 1
+
+        async def fetch_numbered(page):
+            return page, await self._fetch_page(url, {**params, **page_params(page, page_size)})
+
+        pending = [page for page in range(2, total_pages + 1) if page not in done]
+        for next_page in asyncio.as_completed([fetch_numbered(page) for page in pending]):
+            page, data = await next_page
+            if data is None:
+                # Left unmarked, so the next run fetches it again
+                self.failed_pages += 1
+                continue
+            written += self._write_page(key, page, self.find_items(data) or [], total_pages)
+        return written
+
+    def close(self):
+        self.writer.close()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Coles Catalogue Parser Benchmark
+
+Compares blocks/sec of ColesCatalogParser's block lexer with the
+regex-per-field parser it replaced, and checks both give identical
+products:
+    python benchmark_coles_catalog_parser.py Week-2-QLD-Final_extracted.txt catalog_extracted.txt
+"""
+
+import re
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+
+from coles_catalog_parser import CATEGORY_KEYWORDS, ColesCatalogParser
+from product_categorizer import RuleCategorizer, keyword_rules
+
+# The pattern-per-category matcher the legacy parser used
+LEGACY_CATEGORY_MATCHER = RuleCategorizer(keyword_rules(CATEGORY_KEYWORDS), default='General')
+
+
+class LegacyColesCatalogParser(ColesCatalogParser):
+    """ColesCatalogParser with the regex-per-field block parser it used before the lexer"""
+
+    def parse_product_block(self, block: str) -> Optional[Dict]:
+        """Product fields of one block, one regex per field"""
+        product = {}
+        
+        # Skip empty blocks
+        if len(block.strip()) < 10:
+            return None
+            
+        # Extract prices using regex patterns
+        price_pattern = r'\$\$?(\d+(?:\.\d+)?)\s*(?:eeaa|ppkk|kkgg|bbaagg)?'
+        prices = re.findall(price_pattern, block)
+        
+        # Extract SAVE amount
+        save_pattern = r'SAVE\s+\$(\d+(?:\.\d+)?)'
+        save_match = re.search(save_pattern, block)
+        
+        # Extract WAS price
+        was_pattern = r'WAS\s+\$(\d+(?:\.\d+)?)'
+        was_match = re.search(was_pattern, block)
+        
+        # Extract product name (usually the longest line that's not a price)
+        lines = block.split('\n')
+        product_name = ""
+        for line in lines:
+            # Skip price lines and special offer lines
+            if not re.match(r'^[\$\d]|^SAVE|^WAS|^DOWN|^eeaa|^ppkk|^kkgg|^ffoorr', line.strip()):
+                if len(line.strip()) > len(product_name):
+                    product_name = line.strip()
+        
+        if not product_name or not prices:
+            return None
+            
+        # Build product dictionary
+        product['productID'] = f"CL{str(self.product_id_counter).zfill(3)}"
+        product['productName'] = product_name
+        
+        # Determine category based on keywords
+        product['category'] = LEGACY_CATEGORY_MATCHER.categorize(f"{product_name}\0{block}")
+        
+        # Extract brand
+        product['brand'] = self.extract_brand(product_name)
+        
+        # Set prices
+        if prices:
+            product['price'] = self.clean_price(prices[0])
+        
+        if was_match:
+            product['originalPrice'] = self.clean_price(was_match.group(1))
+        
+        if save_match:
+            product['savings'] = self.clean_price(save_match.group(1))
+        
+        # Determine special type
+        if '1/2 PRICE' in block.upper():
+            product['specialType'] = '1/2 Price'
+        elif 'DOWN DOWN' in block:
+            product['specialType'] = 'Down Down'
+        elif save_match:
+            product['specialType'] = 'Save'
+        else:
+            product['specialType'] = 'Regular Price'
+        
+        # Extract unit price if available
+        unit_price_pattern = r'\$(\d+(?:\.\d+)?)\s+per\s+(kg|100g|100mL|litre|each)'
+        unit_match = re.search(unit_price_pattern, block)
+        if unit_match:
+            product['unitPrice'] = f"${unit_match.group(1)}/{unit_match.group(2)}"
+        
+        # Extract weight/size if available
+        size_pattern = r'(\d+(?:\.\d+)?)\s*(g|kg|mL|L|Litre|Pack|pack|x\d+)'
+        size_match = re.search(size_pattern, product_name)
+        if size_match:
+            product['size'] = f"{size_match.group(1)}{size_match.group(2)}"
+        
+        self.product_id_counter += 1
+        return product
+
+
+def benchmark(filenames: List[str], repeat: int = 5):
+    """Compare blocks/sec of the lexer and the legacy parser, checking identical output"""
+    for filename in filenames:
+        with open(filename, 'r', encoding='utf-8') as f:
+            blocks = re.split(r'\n(?=\$\$?\d)', f.read())
+        
+        results = {}
+        for label, parser_class in (('legacy', LegacyColesCatalogParser), ('lexer', ColesCatalogParser)):
+            elapsed = 0.0
+            for _ in range(repeat):
+                parser = parser_class()
+                start = time.perf_counter()
+                products = [parser.parse_product_block(block) for block in blocks]
+                elapsed += time.perf_counter() - start
+            rate = len(blocks) * repeat / elapsed if elapsed else 0
+            results[label] = (rate, json.dumps(products, ensure_ascii=False))
+        
+        identical = results['legacy'][1] == results['lexer'][1]
+        print(f"{filename}: {len(blocks)} blocks, legacy {results['legacy'][0]:,.0f} blocks/sec, "
+              f"lexer {results['lexer'][0]:,.0f} blocks/sec, identical output: {identical}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Coles catalogue block lexer against the legacy parser')
+    parser.add_argument('files', nargs='+', help='Extracted catalogue text files')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes over each file (default: 5)')
+    args = parser.parse_args()
+    benchmark(args.files, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Shared Brand Recognizer
+
+One brand dictionary for every parser and scraper, compiled into an
+Aho-Corasick automaton. A product name is scanned once, left to right, and
+every brand alias in it is found in the same pass; the longest match wins,
+with ties going to the leftmost. Matches must sit on word boundaries, so
+"Mars" is not found inside "Marshmallows".
+
+Each caller keeps its own fallback (first word, 'Generic', None...) for
+names with no known brand.
+
+Run directly to benchmark it against the per-brand substring loop:
+    python brand_recognizer.py data/coles_25032026.json data/woolworths_25032026.json
+"""
+
+import json
+import time
+import argparse
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Canonical brand -> extra aliases. Lowercase, apostrophe-free and
+# accent-free spellings are generated automatically.
+BRANDS: Dict[str, Tuple[str, ...]] = {
+    'Air Wick': (),
+    "Allen's": (),
+    "Arnott's": ('arnott',),
+    'Beach Rd Naturals': (),
+    "Ben & Jerry's": (),
+    'Berocca': (),
+    'Bertolli': (),
+    'Betty Crocker': (),
+    'Black & Gold': (),
+    'Blackmores': (),
+    'Bonne Maman': (),
+    'Bulla': (),
+    'Cadbury': (),
+    "Campbell's": (),
+    "CC's": (),
+    'Chux': (),
+    'Coca-Cola': ('coca cola',),
+    'Coles': (),
+    'Colgate': (),
+    'Danone': (),
+    'Darrell Lea': (),
+    'Decor': (),
+    'Dettol': (),
+    'Devant': (),
+    'Dove': (),
+    'Earth Choice': (),
+    'Fantastic': (),
+    'Farmers Union': (),
+    'Ferrero': (),
+    "Four'N Twenty": ('four n twenty',),
+    'Gatorade': (),
+    'Gippsland': (),
+    'Glow Lab': (),
+    'Golden Circle': (),
+    "Green's": (),
+    'Heinz': (),
+    'Herbal Essences': (),
+    'Huggies': (),
+    'Jackson': (),
+    'John West': (),
+    "Kellogg's": (),
+    'Kettle': (),
+    'Kirks': (),
+    "L'Oréal": (),
+    "Leggo's": (),
+    'Life Savers': (),
+    'Lindt': (),
+    'Lipton': (),
+    'Madura': (),
+    'Maltesers': (),
+    'Mars': (),
+    'MasterFoods': (),
+    'McCain': (),
+    "M&M's": (),
+    'Millie Moon': (),
+    'Milo': (),
+    'Moccona': (),
+    "Nature's Way": (),
+    'Nescafé': (),
+    'Nestlé': (),
+    'Nice & Natural': (),
+    'Nivea': (),
+    'Olay': (),
+    'Oreo': (),
+    'Palmolive': (),
+    'Pantene': (),
+    'Pepsi': (),
+    'Peters': (),
+    'Pods': (),
+    'Primo': (),
+    'Pringles': (),
+    'Quilton': (),
+    'Ramesses': (),
+    'Red Rock Deli': (),
+    'Rexona': (),
+    'Sanitarium': (),
+    'Schwarzkopf': (),
+    "Smith's": ('smith',),
+    'Sorbent': (),
+    'SPC': (),
+    'Streets': (),
+    'Sunrice': (),
+    'Supercoat': (),
+    'Swisse': (),
+    'Tasmanian Heritage': (),
+    'Thankyou': (),
+    'The Spice Tailor': (),
+    'Toni & Guy': (),
+    'TRESemmé': (),
+    'Uncle Tobys': (),
+    'Unilever': (),
+    'V Energy': (),
+    'Vegemite': (),
+    'Vileda': (),
+    'Western Star': (),
+    'Woolworths': (),
+    'Yoplait': (),
+}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and unify curly apostrophes; keeps character positions"""
+    return text.lower().replace('’', "'").replace('‘', "'")
+
+
+def strip_accents(text: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def brand_aliases(brand: str, extra: Iterable[str] = ()) -> set:
+    """Every lowercase spelling a brand is recognized by"""
+    aliases = set()
+    for alias in (brand, *extra):
+        alias = normalize_text(alias)
+        for variant in (alias, strip_accents(alias)):
+            aliases.add(variant)
+            aliases.add(variant.replace("'", ''))
+    return {alias for alias in aliases if alias}
+
+
+class AhoCorasick:
+    """Multi-pattern substring automaton over lowercase text"""
+
+    def __init__(self, patterns: Dict[str, str]):
+        # goto[state] maps a character to the next state; output[state] holds
+        # (pattern length, value) for every pattern ending in that state
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, value in patterns.items():
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append((len(pattern), value))
+
+        # Breadth-first pass sets failure links and merges suffix outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+        # Fold the failure links into a full transition table (a DFA), so a
+        # scan is one dict lookup per character with no fallback loop
+        self.delta: List[Dict[str, int]] = [dict(self.goto[0])]
+        self.delta.extend({} for _ in range(len(self.goto) - 1))
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions = dict(self.delta[self.fail[state]])
+            transitions.update(self.goto[state])
+            self.delta[state] = transitions
+            queue.extend(self.goto[state].values())
+
+    def iter_matches(self, text: str):
+        """Yield (start, end, value) for every pattern occurrence in text"""
+        delta, output = self.delta, self.output
+        state = 0
+        for index, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            for length, value in output[state]:
+                yield index + 1 - length, index + 1, value
+
+
+class BrandRecognizer:
+    def __init__(self, brands: Dict[str, Tuple[str, ...]] = BRANDS):
+        patterns = {}
+        for brand, extra in brands.items():
+            for alias in brand_aliases(brand, extra):
+                patterns.setdefault(alias, brand)
+        self.automaton = AhoCorasick(patterns)
+
+    def find_all(self, name: str) -> List[Tuple[int, int, str]]:
+        """All brand occurrences on word boundaries as (start, end, brand)"""
+        text = normalize_text(name)
+        matches = []
+        for start, end, brand in self.automaton.iter_matches(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            matches.append((start, end, brand))
+        return matches
+
+    def find(self, name: str) -> Optional[str]:
+        """The longest brand in a name (leftmost on ties), or None"""
+        text = normalize_text(name)
+        delta, output = self.automaton.delta, self.automaton.output
+        last = len(text) - 1
+        best_length, best_brand = 0, None
+        state = 0
+        # Inlined scan: this runs once per product in every parser
+        for index, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if not output[state]:
+                continue
+            for length, brand in output[state]:
+                if length <= best_length:
+                    continue
+                start = index + 1 - length
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if index < last and text[index + 1].isalnum():
+                    continue
+                best_length, best_brand = length, brand
+        return best_brand
+
+
+_recognizer = BrandRecognizer()
+
+
+def recognize_brand(name: str) -> Optional[str]:
+    """Canonical brand found in a product name using the shared dictionary"""
+    if not name:
+        return None
+    return _recognizer.find(name)
+
+
+def legacy_recognize_brand(name: str) -> Optional[str]:
+    """The per-brand substring loop the parsers used, for benchmarking"""
+    name_lower = name.lower()
+    for brand in BRANDS:
+        if brand.lower() in name_lower:
+            return brand
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the shared brand recognizer')
+    parser.add_argument('files', nargs='+', help='Weekly product JSON files')
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the products (default: 20)')
+    args = parser.parse_args()
+
+    names = []
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            names.extend(p.get('productName', '') for p in json.load(f))
+    print(f"Loaded {len(names)} product names")
+
+    for label, recognize in (('substring loop', legacy_recognize_brand),
+                             ('aho-corasick', recognize_brand)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            found = sum(1 for name in names if recognize(name))
+        elapsed = time.perf_counter() - start
+        rate = len(names) * args.repeat / elapsed if elapsed else 0
+        print(f"{label:15} {rate:12,.0f} names/sec  ({found} names with a brand)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,136 +1,151 @@
 import re
 import json
+import argparse
 from typing import List, Dict, Optional
 
-def parse_catalog_to_json(input_file: str, output_file: str = "catalog_products.json") -> None:
-    """Parse the catalog_extracted.txt file into structured JSON format"""
+from page_parallel import assign_ids, map_shards
+
+def parse_page(page_content: str) -> List[Dict]:
+    """Parse the products on one page; the caller assigns their productIDs"""
+    products = []
     
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    if '[OCR EXTRACTED TEXT]' not in page_content:
+        return products
+        
+    # Extract OCR text section
+    ocr_start = page_content.find('[OCR EXTRACTED TEXT]')
+    ocr_end = page_content.find('[END OCR]')
     
-    products = []
-    product_id = 1
+    if ocr_start == -1:
+        return products
+        
+    if ocr_end == -1:
+        ocr_text = page_content[ocr_start + len('[OCR EXTRACTED TEXT]'):]
+    else:
+        ocr_text = page_content[ocr_start + len('[OCR EXTRACTED TEXT]'):ocr_end]
     
-    # Split content by pages
-    pages = content.split('--- Page')
+    # Parse products from OCR text
+    lines = [line.strip() for line in ocr_text.split('\n') if line.strip()]
     
-    for page_content in pages:
-        if '[OCR EXTRACTED TEXT]' not in page_content:
-            continue
-            
-        # Extract OCR text section
-        ocr_start = page_content.find('[OCR EXTRACTED TEXT]')
-        ocr_end = page_content.find('[END OCR]')
+    i = 0
+    while i < len(lines):
+        line = lines[i]
         
-        if ocr_start == -1:
+        # Skip common header/footer text
+        if any(skip_word in line.lower() for skip_word in ['woolworths', 'fresh food people', 'on sale', 'collect', 'points', 'click to browse', 'see page']):
+            i += 1
             continue
-            
-        if ocr_end == -1:
-            ocr_text = page_content[ocr_start + len('[OCR EXTRACTED TEXT]'):]
-        else:
-            ocr_text = page_content[ocr_start + len('[OCR EXTRACTED TEXT]'):ocr_end]
-        
-        # Parse products from OCR text
-        lines = [line.strip() for line in ocr_text.split('\n') if line.strip()]
         
-        i = 0
-        while i < len(lines):
-            line = lines[i]
+        # Look for price patterns
+        price_match = re.search(r'\$(\d+)\.?(\d{2})?', line)
+        if price_match:
+            current_price = f"${price_match.group(1)}.{price_match.group(2) or '00'}"
             
-            # Skip common header/footer text
-            if any(skip_word in line.lower() for skip_word in ['woolworths', 'fresh food people', 'on sale', 'collect', 'points', 'click to browse', 'see page']):
-                i += 1
-                continue
+            # Look for savings information in nearby lines
+            savings_amount = None
+            original_price = None
+            special_type = None
             
-            # Look for price patterns
-            price_match = re.search(r'\$(\d+)\.?(\d{2})?', line)
-            if price_match:
-                current_price = f"${price_match.group(1)}.{price_match.group(2) or '00'}"
-                
-                # Look for savings information in nearby lines
-                savings_amount = None
-                original_price = None
-                special_type = None
+            # Check previous and next few lines for product info and savings
+            product_name = None
+            brand = None
+            description = None
+            category = "Unknown"
+            
+            # Look backwards for product name and brand
+            for j in range(max(0, i-5), i):
+                prev_line = lines[j]
                 
-                # Check previous and next few lines for product info and savings
-                product_name = None
-                brand = None
-                description = None
-                category = "Unknown"
+                # Brand detection
+                if any(brand_name in prev_line.upper() for brand_name in ['PRINGLES', 'CONNOISSEUR', 'NESTLE', 'JOHN WEST', 'FELIX', 'WICKED SISTER']):
+                    brand = prev_line.title()
                 
-                # Look backwards for product name and brand
-                for j in range(max(0, i-5), i):
-                    prev_line = lines[j]
-                    
-                    # Brand detection
-                    if any(brand_name in prev_line.upper() for brand_name in ['PRINGLES', 'CONNOISSEUR', 'NESTLE', 'JOHN WEST', 'FELIX', 'WICKED SISTER']):
-                        brand = prev_line.title()
-                    
-                    # Product name detection
-                    if any(product_word in prev_line.lower() for product_word in ['chips', 'ice cream', 'pasta', 'tuna', 'cat food', 'blocks']):
-                        if not product_name:
-                            product_name = prev_line.title()
+                # Product name detection
+                if any(product_word in prev_line.lower() for product_word in ['chips', 'ice cream', 'pasta', 'tuna', 'cat food', 'blocks']):
+                    if not product_name:
+                        product_name = prev_line.title()
+            
+            # Look forwards for savings and description
+            for j in range(i+1, min(len(lines), i+5)):
+                next_line = lines[j]
                 
-                # Look forwards for savings and description
-                for j in range(i+1, min(len(lines), i+5)):
-                    next_line = lines[j]
-                    
-                    # Savings detection
-                    save_match = re.search(r'SAVE \$(\d+\.?\d{0,2})', next_line.upper())
-                    if save_match:
-                        savings_amount = f"${save_match.group(1)}"
-                        if current_price and savings_amount:
-                            try:
-                                original = float(current_price[1:]) + float(savings_amount[1:])
-                                original_price = f"${original:.2f}"
-                            except:
-                                pass
-                    
-                    # Special type detection
-                    if '1/2 price' in next_line.lower() or 'half price' in next_line.lower():
-                        special_type = "HALF PRICE"
-                    elif 'off' in next_line.lower() and '%' in next_line:
-                        percent_match = re.search(r'(\d+)%', next_line)
-                        if percent_match:
-                            special_type = f"{percent_match.group(1)}% OFF"
-                    
-                    # Description/size detection
-                    if re.search(r'\d+[gml]|\d+\-\d+[gml]|pk \d+', next_line.lower()):
-                        if not description:
-                            description = next_line
+                # Savings detection
+                save_match = re.search(r'SAVE \$(\d+\.?\d{0,2})', next_line.upper())
+                if save_match:
+                    savings_amount = f"${save_match.group(1)}"
+                    if current_price and savings_amount:
+                        try:
+                            original = float(current_price[1:]) + float(savings_amount[1:])
+                            original_price = f"${original:.2f}"
+                        except:
+                            pass
                 
-                # Category detection based on keywords
-                if any(keyword in (product_name or '').lower() for keyword in ['ice cream', 'frozen']):
-                    category = "Frozen"
-                elif any(keyword in (product_name or '').lower() for keyword in ['chips', 'snacks']):
-                    category = "Snacks"
-                elif any(keyword in (product_name or '').lower() for keyword in ['pasta']):
-                    category = "Pantry"
-                elif any(keyword in (product_name or '').lower() for keyword in ['tuna', 'fish']):
-                    category = "Pantry"
-                elif any(keyword in (product_name or '').lower() for keyword in ['cat food', 'pet']):
-                    category = "Pet Care"
-                elif any(keyword in (product_name or '').lower() for keyword in ['chocolate', 'blocks']):
-                    category = "Confectionery"
+                # Special type detection
+                if '1/2 price' in next_line.lower() or 'half price' in next_line.lower():
+                    special_type = "HALF PRICE"
+                elif 'off' in next_line.lower() and '%' in next_line:
+                    percent_match = re.search(r'(\d+)%', next_line)
+                    if percent_match:
+                        special_type = f"{percent_match.group(1)}% OFF"
                 
-                # Create product entry if we have enough information
-                if product_name or brand:
-                    product = {
-                        "productID": f"PROD{product_id:03d}",
-                        "productName": product_name or brand or "Unknown Product",
-                        "category": category,
-                        "brand": brand or "Unknown",
-                        "description": description or "",
-                        "price": current_price,
-                        "originalPrice": original_price,
-                        "savings": savings_amount,
-                        "specialType": special_type
-                    }
-                    
-                    products.append(product)
-                    product_id += 1
+                # Description/size detection
+                if re.search(r'\d+[gml]|\d+\-\d+[gml]|pk \d+', next_line.lower()):
+                    if not description:
+                        description = next_line
             
-            i += 1
+            # Category detection based on keywords
+            if any(keyword in (product_name or '').lower() for keyword in ['ice cream', 'frozen']):
+                category = "Frozen"
+            elif any(keyword in (product_name or '').lower() for keyword in ['chips', 'snacks']):
+                category = "Snacks"
+            elif any(keyword in (product_name or '').lower() for keyword in ['pasta']):
+                category = "Pantry"
+            elif any(keyword in (product_name or '').lower() for keyword in ['tuna', 'fish']):
+                category = "Pantry"
+            elif any(keyword in (product_name or '').lower() for keyword in ['cat food', 'pet']):
+                category = "Pet Care"
+            elif any(keyword in (product_name or '').lower() for keyword in ['chocolate', 'blocks']):
+                category = "Confectionery"
+            
+            # Create product entry if we have enough information
+            if product_name or brand:
+                product = {
+                    "productID": None,
+                    "productName": product_name or brand or "Unknown Product",
+                    "category": category,
+                    "brand": brand or "Unknown",
+                    "description": description or "",
+                    "price": current_price,
+                    "originalPrice": original_price,
+                    "savings": savings_amount,
+                    "specialType": special_type
+                }
+                
+                products.append(product)
+        
+        i += 1
+    
+    return products
+
+def parse_catalog_to_json(input_file: str, output_file: str = "catalog_products.json", workers: int = 1) -> None:
+    """Parse the catalog_extracted.txt file into structured JSON format
+    
+    Pages are parsed independently, so with more than one worker they run in
+    a process pool; products are merged in page order and numbered after the
+    merge, giving the same IDs as a sequential run.
+    """
+    
+    with open(input_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    # Split content by pages
+    pages = content.split('--- Page')
+    
+    if workers == 1:
+        page_products = [parse_page(page_content) for page_content in pages]
+    else:
+        page_products = map_shards(parse_page, pages, workers)
+    products = assign_ids([product for page in page_products for product in page], 'PROD')
     
     # Write to JSON file
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -138,5 +153,16 @@ def parse_catalog_to_json(input_file: str, output_file: str = "catalog_products.
     
     print(f"Parsed {len(products)} products and saved to {output_file}")
 
+def main():
+    parser = argparse.ArgumentParser(description='Parse OCR catalogue text into products')
+    parser.add_argument('input', nargs='?', default='catalog_extracted.txt',
+                        help='Extracted catalogue text (default: catalog_extracted.txt)')
+    parser.add_argument('-o', '--output', default='catalog_products.json',
+                        help='Output JSON file (default: catalog_products.json)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parse pages in this many processes (default: 1, 0 for one per CPU)')
+    args = parser.parse_args()
+    parse_catalog_to_json(args.input, args.output, args.workers)
+
 if __name__ == "__main__":
-    parse_catalog_to_json("catalog_extracted.txt")
\ No newline at end of file
+    main()
\ No newline at end of file
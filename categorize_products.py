@@ -5,7 +5,8 @@ Updates the 'category' field with matched categories.
 """
 
 import json
-import re
+
+from product_categorizer import RuleCategorizer
 
 # Define category mapping rules based on product name patterns
 CATEGORY_RULES = {
@@ -138,18 +139,16 @@ CATEGORY_RULES = {
     ]
 }
 
+CATEGORIZER = RuleCategorizer(CATEGORY_RULES, default='General')
+
 def categorize_product(product_name):
     """Categorize a product based on its name."""
-    product_name_lower = product_name.lower()
+    # All CATEGORY_RULES are compiled into one regex that respects their order
+    return CATEGORIZER.categorize(product_name)
 
-    # Check each category's patterns
-    for category, patterns in CATEGORY_RULES.items():
-        for pattern in patterns:
-            if re.search(pattern, product_name_lower):
-                return category
-
-    # Default category if no match
-    return 'General'
+def categorize_products(product_names):
+    """Categorize a list of product names in bulk."""
+    return CATEGORIZER.categorize_many(product_names)
 
 def update_product_categories(json_file):
     """Update categories in a JSON file."""
@@ -161,9 +160,10 @@ def update_product_categories(json_file):
     updated_count = 0
     category_stats = {}
 
-    for product in products:
+    new_categories = categorize_products(product['productName'] for product in products)
+
+    for product, new_category in zip(products, new_categories):
         old_category = product.get('category', 'General')
-        new_category = categorize_product(product['productName'])
 
         if new_category != old_category:
             product['category'] = new_category
@@ -1,9 +1,105 @@
 import json
 import re
-from typing import Dict, List, Optional
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from brand_recognizer import recognize_brand
+from page_parallel import assign_ids, map_shards, page_cuts, split_at
+from product_categorizer import RuleCategorizer
+
+CATEGORY_KEYWORDS = {
+    'Meat': ['beef', 'pork', 'lamb', 'chicken', 'steak', 'mince', 'sausage', 'bacon'],
+    'Fresh Produce': ['cucumber', 'potato', 'onion', 'capsicum', 'lettuce', 'corn', 'banana', 'apple', 'kiwi', 'organic'],
+    'Beverages': ['drink', 'cola', 'pepsi', 'juice', 'energy', 'water', 'coffee', 'tea', 'milk'],
+    'Snacks': ['chips', 'crackers', 'biscuit', 'cookie', 'chocolate', 'lollies', 'candy'],
+    'Baby': ['huggies', 'nappy', 'diaper', 'baby', 'wipes'],
+    'Health & Beauty': ['toothpaste', 'shampoo', 'conditioner', 'soap', 'cream', 'lotion', 'deodorant'],
+    'Vitamins': ['vitamin', 'supplement', 'tablet', 'magnesium', 'iron', 'calcium'],
+    'Pantry': ['rice', 'pasta', 'sauce', 'oil', 'flour', 'sugar', 'noodle'],
+    'Dairy': ['cheese', 'yogurt', 'yoghurt', 'butter', 'cream'],
+    'Frozen': ['frozen', 'ice cream', 'pizza'],
+    'Cleaning': ['detergent', 'cleaner', 'disinfectant', 'wash'],
+    'Pet': ['dog', 'cat', 'pet', 'whiskas', 'pedigree']
+}
+
+CATEGORY_MATCHER = RuleCategorizer.from_keywords(CATEGORY_KEYWORDS, default='General')
+
+# A product block starts on every line beginning with a price ($5, $$10)
+BLOCK_START = re.compile(r'\$\$?\d')
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[str]:
+    """Yield product blocks from catalogue lines as soon as the next block starts
+
+    Lines keep their trailing newline (as when iterating over a file); the
+    blocks are exactly what re.split(r'\n(?=\$\$?\d)', text) gives for the
+    joined text, but only one block is held in memory at a time.
+    """
+    block = []
+    for line in lines:
+        if block and BLOCK_START.match(line):
+            # The newline before a block start is the split point
+            yield ''.join(block)[:-1]
+            block = []
+        block.append(line)
+    yield ''.join(block)
+
+# Token types produced by tokenize_block()
+PRICE = 'PRICE'
+SAVE = 'SAVE'
+WAS = 'WAS'
+UNIT_PRICE = 'UNIT_PRICE'
+NAME_CANDIDATE = 'NAME_CANDIDATE'
+OFFER_FLAG = 'OFFER_FLAG'
+
+# One scan over a block finds every token. Only dollar signs, keywords and
+# line indentation are consumed; amounts are read through lookaheads, so a
+# '$' inside "SAVE $3" or "$1.60 per litre" still starts a PRICE and
+# "$1/2 PRICE" still sets the offer flag. Each line that isn't a price or
+# offer line is a NAME_CANDIDATE. Every branch starts with a literal
+# character, which lets the regex engine skip straight to the next
+# possible token.
+BLOCK_LEXER = re.compile(r'''
+      \n(?![^\S\n]*(?:[\$\d]|SAVE|WAS|DOWN|eeaa|ppkk|kkgg|ffoorr))[^\S\n]*(?=(?P<name>[^\n]*))
+    | S(?=AVE\s+\$(?P<save>\d+(?:\.\d+)?))
+    | W(?=AS\s+\$(?P<was>\d+(?:\.\d+)?))
+    | \$\$?(?=(?P<unit>\d+(?:\.\d+)?)\s+per\s+(?P<per>kg|100g|100mL|litre|each))
+    | \$\$?(?=(?P<price>\d+(?:\.\d+)?))
+    | 1(?P<half>/2\ (?i:PRICE))
+    | D(?P<down>OWN\ DOWN)
+''', re.VERBOSE)
+
+SIZE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(g|kg|mL|L|Litre|Pack|pack|x\d+)')
+
+def tokenize_block(block: str) -> List[Tuple[str, object]]:
+    """Tokenize a product block in one pass into (type, value) tokens
+
+    A unit price ("$1.60 per litre") is also a price, so it gives a
+    UNIT_PRICE token followed by a PRICE token for the same amount.
+    """
+    tokens = []
+    append = tokens.append
+    # The leading newline makes the first line a line like any other; every
+    # branch captures something non-empty except a blank NAME_CANDIDATE
+    for name, save, was, unit, per, price, half, down in BLOCK_LEXER.findall('\n' + block):
+        if price:
+            append((PRICE, price))
+        elif per:
+            append((UNIT_PRICE, (unit, per)))
+            append((PRICE, unit))
+        elif save:
+            append((SAVE, save))
+        elif was:
+            append((WAS, was))
+        elif half:
+            append((OFFER_FLAG, '1/2 Price'))
+        elif down:
+            append((OFFER_FLAG, 'Down Down'))
+        else:
+            append((NAME_CANDIDATE, name.strip()))
+    return tokens
 
 class ColesCatalogParser:
-    def __init__(self, raw_text: str):
+    def __init__(self, raw_text: str = ''):
         self.raw_text = raw_text
         self.products = []
         self.product_id_counter = 1
@@ -18,76 +114,62 @@ class ColesCatalogParser:
             return 0.0
     
     def parse_product_block(self, block: str) -> Optional[Dict]:
-        """Parse a single product block from the catalog"""
-        product = {}
-        
+        """Parse a single product block from its token stream (see tokenize_block)"""
         # Skip empty blocks
         if len(block.strip()) < 10:
             return None
-            
-        # Extract prices using regex patterns
-        price_pattern = r'\$\$?(\d+(?:\.\d+)?)\s*(?:eeaa|ppkk|kkgg|bbaagg)?'
-        prices = re.findall(price_pattern, block)
-        
-        # Extract SAVE amount
-        save_pattern = r'SAVE\s+\$(\d+(?:\.\d+)?)'
-        save_match = re.search(save_pattern, block)
-        
-        # Extract WAS price
-        was_pattern = r'WAS\s+\$(\d+(?:\.\d+)?)'
-        was_match = re.search(was_pattern, block)
         
-        # Extract product name (usually the longest line that's not a price)
-        lines = block.split('\n')
+        price = save = was = unit_price = None
+        offers = set()
         product_name = ""
-        for line in lines:
-            # Skip price lines and special offer lines
-            if not re.match(r'^[\$\d]|^SAVE|^WAS|^DOWN|^eeaa|^ppkk|^kkgg|^ffoorr', line.strip()):
-                if len(line.strip()) > len(product_name):
-                    product_name = line.strip()
+        for kind, value in tokenize_block(block):
+            if kind == NAME_CANDIDATE:
+                # The longest line that's not a price line names the product
+                if len(value) > len(product_name):
+                    product_name = value
+            elif kind == PRICE:
+                if price is None:
+                    price = value
+            elif kind == SAVE:
+                if save is None:
+                    save = value
+            elif kind == WAS:
+                if was is None:
+                    was = value
+            elif kind == UNIT_PRICE:
+                if unit_price is None:
+                    unit_price = value
+            else:
+                offers.add(value)
         
-        if not product_name or not prices:
+        if not product_name or price is None:
             return None
-            
-        # Build product dictionary
+        
+        product = {}
         product['productID'] = f"CL{str(self.product_id_counter).zfill(3)}"
         product['productName'] = product_name
-        
-        # Determine category based on keywords
         product['category'] = self.determine_category(product_name, block)
-        
-        # Extract brand
         product['brand'] = self.extract_brand(product_name)
+        product['price'] = self.clean_price(price)
+        if was is not None:
+            product['originalPrice'] = self.clean_price(was)
+        if save is not None:
+            product['savings'] = self.clean_price(save)
         
-        # Set prices
-        if prices:
-            product['price'] = self.clean_price(prices[0])
-        
-        if was_match:
-            product['originalPrice'] = self.clean_price(was_match.group(1))
-        
-        if save_match:
-            product['savings'] = self.clean_price(save_match.group(1))
-        
-        # Determine special type
-        if '1/2 PRICE' in block.upper():
+        if '1/2 Price' in offers:
             product['specialType'] = '1/2 Price'
-        elif 'DOWN DOWN' in block:
+        elif 'Down Down' in offers:
             product['specialType'] = 'Down Down'
-        elif save_match:
+        elif save is not None:
             product['specialType'] = 'Save'
         else:
             product['specialType'] = 'Regular Price'
         
-        # Extract unit price if available
-        unit_price_pattern = r'\$(\d+(?:\.\d+)?)\s+per\s+(kg|100g|100mL|litre|each)'
-        unit_match = re.search(unit_price_pattern, block)
-        if unit_match:
-            product['unitPrice'] = f"${unit_match.group(1)}/{unit_match.group(2)}"
+        if unit_price is not None:
+            product['unitPrice'] = f"${unit_price[0]}/{unit_price[1]}"
         
-        # Extract weight/size if available
-        size_pattern = r'(\d+(?:\.\d+)?)\s*(g|kg|mL|L|Litre|Pack|pack|x\d+)'
-        size_match = re.search(size_pattern, product_name)
+        # The size is read from the chosen name only, not the whole block
+        size_match = SIZE_PATTERN.search(product_name)
         if size_match:
             product['size'] = f"{size_match.group(1)}{size_match.group(2)}"
         
@@ -96,42 +178,15 @@ class ColesCatalogParser:
     
     def determine_category(self, product_name: str, block: str) -> str:
         """Determine product category based on keywords"""
-        name_lower = product_name.lower()
-        block_lower = block.lower()
-        
-        categories = {
-            'Meat': ['beef', 'pork', 'lamb', 'chicken', 'steak', 'mince', 'sausage', 'bacon'],
-            'Fresh Produce': ['cucumber', 'potato', 'onion', 'capsicum', 'lettuce', 'corn', 'banana', 'apple', 'kiwi', 'organic'],
-            'Beverages': ['drink', 'cola', 'pepsi', 'juice', 'energy', 'water', 'coffee', 'tea', 'milk'],
-            'Snacks': ['chips', 'crackers', 'biscuit', 'cookie', 'chocolate', 'lollies', 'candy'],
-            'Baby': ['huggies', 'nappy', 'diaper', 'baby', 'wipes'],
-            'Health & Beauty': ['toothpaste', 'shampoo', 'conditioner', 'soap', 'cream', 'lotion', 'deodorant'],
-            'Vitamins': ['vitamin', 'supplement', 'tablet', 'magnesium', 'iron', 'calcium'],
-            'Pantry': ['rice', 'pasta', 'sauce', 'oil', 'flour', 'sugar', 'noodle'],
-            'Dairy': ['cheese', 'yogurt', 'yoghurt', 'butter', 'cream'],
-            'Frozen': ['frozen', 'ice cream', 'pizza'],
-            'Cleaning': ['detergent', 'cleaner', 'disinfectant', 'wash'],
-            'Pet': ['dog', 'cat', 'pet', 'whiskas', 'pedigree']
-        }
-        
-        for category, keywords in categories.items():
-            for keyword in keywords:
-                if keyword in name_lower or keyword in block_lower:
-                    return category
-        
-        return 'General'
+        # A keyword may appear in either the name or the block; the NUL
+        # separator keeps a keyword from spanning the two
+        return CATEGORY_MATCHER.categorize(f"{product_name}\0{block}")
     
     def extract_brand(self, product_name: str) -> str:
         """Extract brand name from product name"""
-        brands = ['Coles', 'Cadbury', 'Colgate', "L'Oréal", 'Huggies', 'Kettle', 'Coca-Cola', 
-                  'Pepsi', 'Arnott\'s', 'Kellogg\'s', 'Uncle Tobys', 'McCain', 'Primo', 
-                  'Sunrice', 'Campbell\'s', 'Nivea', 'Dove', 'Palmolive', 'Dettol',
-                  'Nature\'s Way', 'Blackmores', 'Swisse', 'Smith\'s', 'Allen\'s', 
-                  'Nestlé', 'Nescafé', 'Milo', 'Peters', 'Streets', 'Gippsland']
-        
-        for brand in brands:
-            if brand.lower() in product_name.lower():
-                return brand
+        brand = recognize_brand(product_name)
+        if brand:
+            return brand
         
         # If no known brand found, try to extract first word
         first_word = product_name.split()[0] if product_name else ''
@@ -140,18 +195,49 @@ class ColesCatalogParser:
         
         return 'Generic'
     
-    def parse_catalog(self) -> List[Dict]:
-        """Parse the entire catalog text"""
+    def parse_catalog(self, workers: int = 1) -> List[Dict]:
+        """Parse the entire catalog text
+        
+        With more than one worker, the blocks are parsed page by page in a
+        process pool. A page's shard starts after the block holding its page
+        marker, so every block is parsed whole, and IDs are assigned after the
+        merge exactly as in a sequential run.
+        """
         # Split text into potential product blocks
         # Products are typically separated by price indicators
         blocks = re.split(r'\n(?=\$\$?\d)', self.raw_text)
+        if workers == 1:
+            self.products.extend(self.iter_products(blocks))
+            return self.products
         
+        cuts = [index + 1 for index in page_cuts(blocks) if index + 1 < len(blocks)]
+        shards = map_shards(_parse_block_shard, split_at(blocks, cuts), workers)
+        products = assign_ids([product for shard in shards for product in shard], 'CL', self.product_id_counter)
+        self.product_id_counter += len(products)
+        self.products.extend(products)
+        return self.products
+    
+    def iter_products(self, blocks: Iterable[str]) -> Iterator[Dict]:
+        """Parse blocks lazily, yielding each product as soon as it is parsed"""
         for block in blocks:
             product = self.parse_product_block(block)
             if product and product.get('productName'):
-                self.products.append(product)
-        
-        return self.products
+                yield product
+    
+    def stream_file(self, filename: str) -> Iterator[Dict]:
+        """Parse a catalogue file incrementally; products are not kept in self.products"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            yield from self.iter_products(iter_blocks(f))
+    
+    def save_to_jsonl(self, products: Iterable[Dict], filename: str = 'coles_catalog.jsonl') -> int:
+        """Write products as JSON Lines while they are produced, returning the count"""
+        count = 0
+        with open(filename, 'w', encoding='utf-8') as f:
+            for product in products:
+                f.write(json.dumps(product, ensure_ascii=False) + '\n')
+                count += 1
+        print(f"Saved {count} products to {filename}")
+        return count
     
     def save_to_json(self, filename: str = 'coles_catalog.json'):
         """Save parsed products to JSON file"""
@@ -159,9 +245,29 @@ class ColesCatalogParser:
             json.dump(self.products, f, indent=2, ensure_ascii=False)
         print(f"Saved {len(self.products)} products to {filename}")
 
+def _parse_block_shard(blocks: List[str]) -> List[Dict]:
+    """Process pool entry point: products of one page's blocks, numbered from 1"""
+    return list(ColesCatalogParser().iter_products(blocks))
+
 def main():
-    # Read the raw catalog text from file
-    # You would replace this with actual file reading
+    arg_parser = argparse.ArgumentParser(description='Parse Coles catalogue text into products')
+    arg_parser.add_argument('input', nargs='?', help='Extracted catalogue text (default: built-in sample)')
+    arg_parser.add_argument('-o', '--output', help='Output file (default: coles_catalog.json, '
+                                                   'or coles_catalog.jsonl with --stream)')
+    arg_parser.add_argument('--stream', action='store_true',
+                            help='Parse the input incrementally and write JSON Lines as products are found')
+    arg_parser.add_argument('--workers', type=int, default=1,
+                            help='Parse pages in this many processes (default: 1, 0 for one per CPU)')
+    args = arg_parser.parse_args()
+    
+    if args.stream:
+        if not args.input:
+            arg_parser.error('--stream needs an input file')
+        parser = ColesCatalogParser()
+        parser.save_to_jsonl(parser.stream_file(args.input), args.output or 'coles_catalog.jsonl')
+        return
+    
+    # Without an input file, parse this sample page
     raw_catalog_text = """
 
 --- Page 1 ---
@@ -1815,14 +1921,14 @@ WAS $180 |  |
 --- Page 43 ---
     """
     
-    # If reading from file:
-    # with open('coles_catalog_raw.txt', 'r', encoding='utf-8') as f:
-    #     raw_catalog_text = f.read()
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            raw_catalog_text = f.read()
     
     # Parse and save
     parser = ColesCatalogParser(raw_catalog_text)
-    parser.parse_catalog()
-    parser.save_to_json('coles_catalog.json')
+    parser.parse_catalog(args.workers)
+    parser.save_to_json(args.output or 'coles_catalog.json')
     
     # Print summary
     print(f"\nParsing complete!")
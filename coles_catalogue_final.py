@@ -16,7 +16,23 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
+
+from dom_harvester import LoadMoreHarvester, harvest_products, timestamped_stream_path
+from html_select import parse_html
+
+# Product tiles, best first (extract_products_advanced's methods 1 and 2)
+PRODUCT_TILE_SELECTORS = ["[data-itemid]", ".sf-item"]
+
+# "Load More" buttons: where to look, and the texts they show
+LOAD_MORE_SELECTORS = [
+    "button",
+    "a[role='button']",
+    ".button",
+    "[class*='button']",
+    "[id*='more']",
+    "[class*='more']"
+]
+LOAD_MORE_TEXTS = ["load more", "show more", "more products", "see more", "more items"]
 
 class ColesAdvancedScraper:
     def __init__(self, headless=False):
@@ -127,66 +143,22 @@ class ColesAdvancedScraper:
         print("No products found with any selector")
         return False
 
-    def smart_click_load_more(self, max_clicks=50):
-        """Intelligently find and click load more buttons"""
-        clicks = 0
-
-        # Common text patterns for load more buttons
-        load_more_texts = ["load more", "show more", "more products", "see more", "more items"]
-
+    def smart_click_load_more(self, max_clicks=50, stream_path=None):
+        """Click 'Load More' until a click adds no products, parsing each click's new product tiles as they arrive"""
         print("Looking for 'Load More' buttons...")
+        harvester = LoadMoreHarvester(self.driver, PRODUCT_TILE_SELECTORS, LOAD_MORE_SELECTORS, LOAD_MORE_TEXTS,
+                                      max_clicks=max_clicks, pause=(1, 2), click=self.human_like_click)
+        harvest_products(harvester, self.parse_product_comprehensive, self.products, stream_path,
+                         keep=lambda product: bool(product.get("title")))
 
-        while clicks < max_clicks:
-            try:
-                # Look for buttons with load more text
-                load_more_button = None
-
-                # Try different button selectors
-                button_selectors = [
-                    "button",
-                    "a[role='button']",
-                    ".button",
-                    "[class*='button']",
-                    "[id*='more']",
-                    "[class*='more']"
-                ]
-
-                for selector in button_selectors:
-                    try:
-                        buttons = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        for button in buttons:
-                            if button.is_displayed() and button.is_enabled():
-                                button_text = button.text.lower()
-                                if any(text in button_text for text in load_more_texts):
-                                    load_more_button = button
-                                    break
-                        if load_more_button:
-                            break
-                    except:
-                        continue
-
-                if not load_more_button:
-                    print(f"No more 'Load More' button found after {clicks} clicks")
-                    break
-
-                # Scroll to button with human-like movement
-                ActionChains(self.driver).move_to_element(load_more_button).perform()
-                self.human_like_delay(1, 2)
-
-                # Click the button
-                load_more_button.click()
-                clicks += 1
-                print(f"Clicked 'Load More' button {clicks} times")
-
-                # Wait for new content to load (2 seconds as requested)
-                self.human_like_delay(2, 3)
-
-            except Exception as e:
-                print(f"Error clicking load more after {clicks} clicks: {e}")
-                break
+        print(f"Total load more clicks: {harvester.clicks}, products parsed: {len(self.products)}")
+        return harvester.clicks
 
-        print(f"Total load more clicks: {clicks}")
-        return clicks
+    def human_like_click(self, button):
+        """Move to a button as a person would, then click it"""
+        ActionChains(self.driver).move_to_element(button).perform()
+        self.human_like_delay(0.3, 0.8)
+        button.click()
 
     def extract_products_advanced(self):
         """Advanced product extraction with multiple fallback methods"""
@@ -194,7 +166,7 @@ class ColesAdvancedScraper:
 
         # Get page source
         page_source = self.driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+        document = parse_html(page_source)
 
         # Save page source for debugging
         with open("debug_page_source.html", "w", encoding="utf-8") as f:
@@ -205,25 +177,25 @@ class ColesAdvancedScraper:
         products = []
 
         # Method 1: Look for elements with data-itemid
-        data_item_elements = soup.find_all(attrs={"data-itemid": True})
+        data_item_elements = document.select("[data-itemid]")
         if data_item_elements:
             print(f"Method 1: Found {len(data_item_elements)} elements with data-itemid")
             products = data_item_elements
 
         # Method 2: Look for sf-item class
         if not products:
-            sf_items = soup.find_all(class_="sf-item")
+            sf_items = document.select(".sf-item")
             if sf_items:
                 print(f"Method 2: Found {len(sf_items)} sf-item elements")
                 products = sf_items
 
         # Method 3: Look for any links that might be products
         if not products:
-            all_links = soup.find_all("a")
+            all_links = document.select("a")
             product_links = []
             for link in all_links:
                 link_text = link.get_text(strip=True).lower()
-                link_class = " ".join(link.get("class", []))
+                link_class = link.get("class", "")
                 # Filter for likely product links
                 if (len(link_text) > 10 and
                     any(word in link_text for word in ["pack", "g", "ml", "kg", "$"]) or
@@ -236,10 +208,10 @@ class ColesAdvancedScraper:
 
         # Method 4: Extract from JSON-LD or script tags
         if not products:
-            script_tags = soup.find_all("script", {"type": "application/ld+json"})
+            script_tags = document.select('script[type="application/ld+json"]')
             for script in script_tags:
                 try:
-                    data = json.loads(script.string)
+                    data = json.loads(script.get_text())
                     if isinstance(data, dict) and "offers" in str(data).lower():
                         print("Method 4: Found JSON-LD data with offers")
                         # Process JSON data here
@@ -403,9 +375,11 @@ class ColesAdvancedScraper:
             if not self.wait_for_products():
                 print("No products detected, but continuing to try extraction...")
 
-            self.smart_click_load_more()
+            self.smart_click_load_more(stream_path=timestamped_stream_path("coles_catalogue"))
 
-            self.extract_products_advanced()
+            # No product tiles to harvest: fall back to searching the whole page
+            if not self.products:
+                self.extract_products_advanced()
 
             if self.products:
                 return self.save_to_json()
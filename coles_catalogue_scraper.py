@@ -5,7 +5,6 @@ Automatically loads all products from a Coles catalogue page and extracts produc
 """
 
 import json
-import time
 import re
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -13,11 +12,12 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+from dom_harvester import LoadMoreHarvester, harvest_products, timestamped_stream_path
+
 class ColesCalculagogueScraper:
     def __init__(self, headless=False):
         self.chrome_options = Options()
@@ -57,43 +57,12 @@ class ColesCalculagogueScraper:
         )
         print("Catalogue page loaded successfully")
 
-    def click_load_more_until_end(self):
-        """Keep clicking 'Load more' button until no more products to load"""
-        load_more_clicks = 0
-
-        while True:
-            try:
-                # Wait for load more button to be clickable
-                load_more_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.ID, "show-more"))
-                )
-
-                # Scroll to the button to ensure it's visible
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", load_more_button)
-                time.sleep(1)
-
-                # Click the button
-                load_more_button.click()
-                load_more_clicks += 1
-                print(f"Clicked 'Load more' button {load_more_clicks} times")
-
-                # Wait 2 seconds before next click as requested
-                time.sleep(2)
-
-                # Wait for new content to load
-                time.sleep(1)
-
-            except TimeoutException:
-                print("No more 'Load more' button found - all products loaded")
-                break
-            except NoSuchElementException:
-                print("Load more button not found - all products loaded")
-                break
-            except Exception as e:
-                print(f"Error clicking load more button: {e}")
-                break
+    def click_load_more_until_end(self, max_clicks=500, stream_path=None):
+        """Keep clicking 'Load more' until it is gone or adds no products, parsing the new ones after each click"""
+        harvester = LoadMoreHarvester(self.driver, ["a.sf-item"], ["#show-more"], max_clicks=max_clicks, pause=(1, 1))
+        harvest_products(harvester, self.parse_product_element, self.products, stream_path)
 
-        print(f"Total 'Load more' clicks: {load_more_clicks}")
+        print(f"Total 'Load more' clicks: {harvester.clicks}, products extracted: {len(self.products)}")
 
     def parse_product_element(self, product_element):
         """Parse a single product element and extract product data"""
@@ -208,8 +177,10 @@ class ColesCalculagogueScraper:
         try:
             self.start_driver()
             self.load_catalogue_page(url)
-            self.click_load_more_until_end()
-            self.extract_all_products()
+            self.click_load_more_until_end(stream_path=timestamped_stream_path("coles_catalogue"))
+            # Nothing harvested while paging: parse the whole page instead
+            if not self.products:
+                self.extract_all_products()
             filename = self.save_to_json(output_file)
             return filename
 
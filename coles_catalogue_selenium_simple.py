@@ -5,7 +5,6 @@ Simplified Selenium approach with better error handling
 """
 
 import json
-import time
 import re
 from datetime import datetime
 import os
@@ -18,6 +17,35 @@ from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from bs4 import BeautifulSoup
 
+from dom_harvester import LoadMoreHarvester, harvest_products, timestamped_stream_path
+
+# Product tiles for the Load More harvester, best first; none of them matches page furniture
+TILE_SELECTORS = [
+    "a.sf-item",
+    ".sf-item",
+    "[data-itemid]"
+]
+
+# Product elements, best first, for searching the whole page
+PRODUCT_SELECTORS = [
+    "a.sf-item",
+    ".sf-item",
+    "[class*='item']",
+    "[class*='product']",
+    "[data-itemid]"
+]
+
+# Possible "load more" buttons, best first; the button's text must mention loading or more
+LOAD_MORE_SELECTORS = [
+    "#show-more",
+    "button#show-more",
+    ".sf-button-primary",
+    "[class*='load-more']",
+    "[class*='show-more']",
+    "button[class*='primary']"
+]
+LOAD_MORE_TEXTS = ["load", "more"]
+
 class ColesSeleniumSimpleScraper:
     def __init__(self, headless=True):
         self.firefox_options = FirefoxOptions()
@@ -83,55 +111,14 @@ class ColesSeleniumSimpleScraper:
             print("Timeout waiting for page content")
             return False
 
-    def click_load_more(self, max_clicks=50):
-        """Click load more button until no more"""
-        clicks = 0
-
-        while clicks < max_clicks:
-            try:
-                # Look for various possible "load more" button selectors
-                load_more_selectors = [
-                    "#show-more",
-                    "button#show-more",
-                    ".sf-button-primary",
-                    "[class*='load-more']",
-                    "[class*='show-more']",
-                    "button[class*='primary']"
-                ]
-
-                load_more_button = None
-                for selector in load_more_selectors:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        for element in elements:
-                            if "load" in element.text.lower() or "more" in element.text.lower():
-                                load_more_button = element
-                                break
-                        if load_more_button:
-                            break
-                    except:
-                        continue
-
-                if not load_more_button or not load_more_button.is_displayed():
-                    print(f"No more 'Load More' button found after {clicks} clicks")
-                    break
-
-                # Scroll to button and click
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", load_more_button)
-                time.sleep(1)
-                load_more_button.click()
-                clicks += 1
-                print(f"Clicked 'Load More' {clicks} times")
+    def click_load_more(self, max_clicks=50, stream_path=None):
+        """Click load more until a click adds no products, parsing the new products after each click"""
+        harvester = LoadMoreHarvester(self.driver, TILE_SELECTORS, LOAD_MORE_SELECTORS, LOAD_MORE_TEXTS,
+                                      max_clicks=max_clicks, pause=(1, 1))
+        harvest_products(harvester, self.parse_product_element, self.products, stream_path)
 
-                # Wait 2 seconds as requested
-                time.sleep(2)
-
-            except Exception as e:
-                print(f"Error clicking load more: {e}")
-                break
-
-        print(f"Total load more clicks: {clicks}")
-        return clicks
+        print(f"Total load more clicks: {harvester.clicks}, products parsed: {len(self.products)}")
+        return harvester.clicks
 
     def extract_products(self):
         """Extract products from the loaded page"""
@@ -142,16 +129,8 @@ class ColesSeleniumSimpleScraper:
         soup = BeautifulSoup(page_source, 'html.parser')
 
         # Try multiple selectors to find products
-        product_selectors = [
-            "a.sf-item",
-            ".sf-item",
-            "[class*='item']",
-            "[class*='product']",
-            "[data-itemid]"
-        ]
-
         all_products = []
-        for selector in product_selectors:
+        for selector in PRODUCT_SELECTORS:
             products = soup.select(selector)
             if products:
                 print(f"Found {len(products)} elements with selector '{selector}'")
@@ -197,7 +176,7 @@ class ColesSeleniumSimpleScraper:
             title_selectors = ["h4", ".sf-item-heading", "[class*='heading']", "[class*='title']"]
             title = ""
             for selector in title_selectors:
-                title_elem = product_element.find(selector) if hasattr(product_element, 'find') else None
+                title_elem = product_element.select_one(selector) if hasattr(product_element, 'select_one') else None
                 if title_elem:
                     title = title_elem.get_text(strip=True)
                     break
@@ -303,8 +282,11 @@ class ColesSeleniumSimpleScraper:
             if not self.load_page_and_wait(url):
                 raise Exception("Failed to load page content")
 
-            self.click_load_more()
-            self.extract_products()
+            self.click_load_more(stream_path=timestamped_stream_path("coles_catalogue"))
+
+            # Nothing harvested while paging: parse the whole page instead
+            if not self.products:
+                self.extract_products()
 
             if self.products:
                 return self.save_to_json()
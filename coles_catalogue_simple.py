@@ -5,15 +5,22 @@ Uses requests + BeautifulSoup approach for more stable scraping
 """
 
 import json
+import argparse
 import requests
 import re
 from bs4 import BeautifulSoup
 from datetime import datetime
 import time
 
+from http_cache import add_cache_arguments, print_cache_summary, session_from_args
+
 class ColesSimpleScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, session=None):
+        """
+        Args:
+            session: requests session to fetch through, e.g. a caching one (see http_cache.py)
+        """
+        self.session = session or requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -189,7 +196,11 @@ class ColesSimpleScraper:
 
 def main():
     """Main function to run the scraper"""
-    scraper = ColesSimpleScraper()
+    parser = argparse.ArgumentParser(description='Scrape Coles catalogue specials')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    scraper = ColesSimpleScraper(session=session_from_args(args))
 
     try:
         output_file = scraper.scrape_catalogue()
@@ -212,5 +223,9 @@ def main():
     except Exception as e:
         print(f"Scraping failed: {e}")
 
+    finally:
+        print_cache_summary(scraper.session)
+        scraper.session.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,11 +5,13 @@ Convert Coles HTML catalogue to JSON format with structured product data.
 
 import json
 import re
-from bs4 import BeautifulSoup
 import argparse
 import sys
 from pathlib import Path
 
+from brand_recognizer import recognize_brand
+from html_select import parse_html
+
 def parse_price(price_text):
     """Extract numeric price from price text."""
     if not price_text:
@@ -31,12 +33,12 @@ def calculate_savings(original_price, current_price):
 
 def extract_product_data(html_content):
     """Extract product data from Coles HTML catalogue."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    document = parse_html(html_content)
     products = []
     product_id_counter = 1
 
     # Split text into lines and process
-    lines = soup.get_text().split('\n')
+    lines = document.get_text().split('\n')
     lines = [line.strip() for line in lines if line.strip()]
 
     # Navigation/UI elements to skip
@@ -162,15 +164,9 @@ def categorize_product(product_name):
 
 def extract_brand(product_name):
     """Extract brand from product name."""
-    # Common brand patterns
-    brands = [
-        'Coles', 'Coca-Cola', 'Ben & Jerry\'s', 'Arnott\'s', 'Primo',
-        'Sunrice', 'Woolworths', 'Black & Gold'
-    ]
-
-    for brand in brands:
-        if brand.lower() in product_name.lower():
-            return brand
+    brand = recognize_brand(product_name)
+    if brand:
+        return brand
 
     # Extract first word as potential brand
     words = product_name.split()
@@ -2,6 +2,8 @@ import json
 import re
 from typing import List, Dict, Optional
 
+from brand_recognizer import recognize_brand
+
 def parse_catalog_to_json(input_file: str, output_file: str) -> None:
     """
     Convert catalog_extracted.txt to JSON format with better parsing
@@ -164,21 +166,9 @@ def clean_product_name(name: str) -> str:
 
 def extract_brand(product_name: str) -> str:
     """Extract brand from product name"""
-    known_brands = [
-        'Coles', 'Cadbury', 'Coca-Cola', 'Pepsi', 'Nestle', 'Arnott', 'Smith',
-        'Huggies', 'Colgate', 'L\'Oreal', 'Nivea', 'Dettol', 'Pantene',
-        'Nature\'s Way', 'Blackmores', 'Swisse', 'Berocca', 'Fantastic',
-        'Kettle', 'V Energy', 'Kirks', 'Quilton', 'Nice & Natural',
-        'Betty Crocker', 'Moccona', 'Lipton', 'Oreo', 'Life Savers',
-        'Lindt', 'Ferrero', 'Sunrice', 'John West', 'SPC', 'MasterFoods',
-        'McCain', 'Four\'N Twenty', 'Golden Circle', 'Uncle Tobys',
-        'Kellogg\'s', 'Bonne Maman', 'Vegemite', 'Campbell\'s'
-    ]
-
-    product_lower = product_name.lower()
-    for brand in known_brands:
-        if brand.lower() in product_lower:
-            return brand
+    brand = recognize_brand(product_name)
+    if brand:
+        return brand
 
     # Try first word if it looks like a brand
     words = product_name.split()
@@ -2,6 +2,8 @@ import json
 import re
 from typing import List, Dict, Optional
 
+from brand_recognizer import recognize_brand
+
 def clean_text(text: str) -> str:
     """Clean OCR artifacts and normalize text"""
     if not text:
@@ -74,33 +76,9 @@ def extract_brand(product_name: str) -> str:
     if not product_name:
         return "Unknown"
     
-    # Known brands mapping
-    brands_map = {
-        'farmers union': 'Farmers Union',
-        'sanitarium': 'Sanitarium',
-        'peters': 'Peters',
-        'coca-cola': 'Coca-Cola',
-        'gatorade': 'Gatorade',
-        'pringles': 'Pringles',
-        'lindt': 'Lindt',
-        'herbal essences': 'Herbal Essences',
-        'dove': 'Dove',
-        'schwarzkopf': 'Schwarzkopf',
-        'rexona': 'Rexona',
-        'toni & guy': 'Toni & Guy',
-        'blackmores': 'Blackmores',
-        'palmolive': 'Palmolive',
-        'glow lab': 'Glow Lab',
-        'colgate': 'Colgate',
-        'beach rd naturals': 'Beach Rd Naturals',
-        'thankyou': 'Thankyou',
-        'coles': 'Coles'
-    }
-    
-    name_lower = product_name.lower()
-    for brand_key, brand_name in brands_map.items():
-        if brand_key in name_lower:
-            return brand_name
+    brand = recognize_brand(product_name)
+    if brand:
+        return brand
     
     # Fallback: first word
     words = product_name.split()
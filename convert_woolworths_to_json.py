@@ -8,18 +8,13 @@ import json
 import sys
 from pathlib import Path
 
+from brand_recognizer import recognize_brand
+
 def extract_brand_from_name(product_name):
     """Extract brand from product name."""
-    # Common brands to look for
-    brands = [
-        'Woolworths', 'Coles', 'Primo', 'Cadbury', 'Mars', 'Smith\'s', 'CC\'s',
-        'Coca-Cola', 'Pepsi', 'Nestle', 'Unilever', 'Dettol', 'Tasmanian Heritage',
-        'M&M\'s', 'Maltesers', 'Pods'
-    ]
-
-    for brand in brands:
-        if brand.lower() in product_name.lower():
-            return brand
+    brand = recognize_brand(product_name)
+    if brand:
+        return brand
 
     # Try to extract first word as potential brand
     words = product_name.split()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Incremental "Load More" Harvester
+
+Pages that grow through a "Load More" button are harvested while they
+grow, instead of clicking to the end and parsing the whole page_source
+once. After each click, one in-page script returns the outerHTML of the
+product tiles appended since the last call, along with the next visible
+"Load More" button. Each call is a single WebDriver round trip, however
+many buttons and tiles the page holds, and only the new tiles are handed
+back to be parsed.
+
+The script remembers the last tile it returned, and new tiles are found
+by walking back from the end of the list to it. Tiles are matched by the
+most preferred selector that matches anything yet; if a better one only
+matches once the page has rendered further, the harvest switches to it.
+Paging stops as soon as a click adds no tiles, when the button is gone,
+or after max_clicks.
+
+The harvester needs only the driver's execute_script(). harvest_products()
+parses the tiles it returns with the scraper's own parser, collecting the
+products and streaming them to a JSONL file as they arrive.
+"""
+
+import time
+import random
+import hashlib
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from api_harvester import JSONLWriter
+from html_select import parse_fragment
+
+# Runs in the page. Arguments: tile selectors in order of preference, button
+# selectors in order of preference, lowercase texts a button must contain
+# (any, if empty). State lives on window between calls.
+HARVEST_SCRIPT = """
+const [tileSelectors, buttonSelectors, buttonTexts] = arguments;
+const state = window.__loadMoreHarvest || (window.__loadMoreHarvest = {selector: null, last: null, seen: new WeakSet()});
+
+// The best selector that matches anything is used; until the best of all
+// matches, a better one that has rendered since takes over
+const rank = state.selector === null ? tileSelectors.length : tileSelectors.indexOf(state.selector);
+if (rank > 0) {
+    const better = tileSelectors.slice(0, rank).find(selector => document.querySelector(selector));
+    if (better) {
+        state.selector = better;
+        state.last = null;
+    }
+}
+
+const fresh = [];
+if (state.selector) {
+    const tiles = document.querySelectorAll(state.selector);
+    // Tiles are appended, so the new ones follow the last one returned;
+    // if that one was re-rendered away, the whole list is checked
+    for (let i = tiles.length - 1; i >= 0 && tiles[i] !== state.last; i--) {
+        if (!state.seen.has(tiles[i])) {
+            fresh.push(tiles[i]);
+        }
+    }
+    fresh.reverse();
+    fresh.forEach(tile => state.seen.add(tile));
+    if (tiles.length) {
+        state.last = tiles[tiles.length - 1];
+    }
+}
+
+let button = null;
+search:
+for (const selector of buttonSelectors) {
+    for (const element of document.querySelectorAll(selector)) {
+        if (element.disabled || !element.getClientRects().length ||
+            getComputedStyle(element).visibility === 'hidden') {
+            continue;
+        }
+        const text = (element.innerText || element.textContent || '').toLowerCase();
+        if (!buttonTexts.length || buttonTexts.some(wanted => text.includes(wanted))) {
+            button = element;
+            break search;
+        }
+    }
+}
+
+return {selector: state.selector, tiles: fresh.map(tile => tile.outerHTML), button: button};
+"""
+
+RESET_SCRIPT = "delete window.__loadMoreHarvest;"
+
+# Seconds to wait for a click's tiles to appear, and between checks
+DEFAULT_WAIT = 10.0
+DEFAULT_POLL = 0.25
+
+
+class LoadMoreHarvester:
+    def __init__(self, driver, tile_selectors: Sequence[str], button_selectors: Sequence[str],
+                 button_texts: Sequence[str] = (), max_clicks: int = 50, pause: Tuple[float, float] = (1.0, 2.0),
+                 wait: float = DEFAULT_WAIT, poll: float = DEFAULT_POLL,
+                 click: Optional[Callable] = None):
+        """
+        Args:
+            driver: Selenium WebDriver showing the page
+            tile_selectors: CSS selectors for product tiles, best first; the best that matches is used
+            button_selectors: CSS selectors for the "Load More" button, best first
+            button_texts: Lowercase texts one of which the button's text must contain (default: any text)
+            max_clicks: Most clicks to make
+            pause: Range of seconds to pause before each click, drawn at random
+            wait: Seconds to wait for a click to add tiles before stopping
+            poll: Seconds between checks for new tiles
+            click: Clicks a button element (default: scroll it into view and click)
+        """
+        self.driver = driver
+        self.tile_selectors = list(tile_selectors)
+        self.button_selectors = list(button_selectors)
+        self.button_texts = [text.lower() for text in button_texts]
+        self.max_clicks = max_clicks
+        self.pause = pause
+        self.wait = wait
+        self.poll = poll
+        self.click = click or self._scroll_and_click
+        self.clicks = 0
+        self.tiles = 0
+        self.selector = None
+        self._digests = set()
+
+    def _scroll_and_click(self, button):
+        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
+        button.click()
+
+    def _collect(self) -> Tuple[List[str], object]:
+        """New tiles' HTML and the current button (or None), in one round trip"""
+        result = self.driver.execute_script(HARVEST_SCRIPT, self.tile_selectors, self.button_selectors,
+                                            self.button_texts)
+        selector = result.get('selector')
+        if self.selector and selector != self.selector:
+            print(f"Harvesting product tiles matching '{selector}' instead of '{self.selector}'")
+        self.selector = selector
+        fresh = []
+        for html in result.get('tiles') or []:
+            # A list the page re-rendered comes back whole; drop the tiles already returned
+            digest = hashlib.sha1(html.encode('utf-8')).digest()
+            if digest not in self._digests:
+                self._digests.add(digest)
+                fresh.append(html)
+        self.tiles += len(fresh)
+        return fresh, result.get('button')
+
+    def harvest(self) -> Iterator[str]:
+        """The outerHTML of every product tile: those already shown, then each click's as it arrives"""
+        self.driver.execute_script(RESET_SCRIPT)
+        tiles, _ = self._collect()
+        if self.selector:
+            print(f"Harvesting product tiles matching '{self.selector}': {len(tiles)} on the page")
+        yield from tiles
+
+        while self.clicks < self.max_clicks:
+            time.sleep(random.uniform(*self.pause))
+            # Tiles that arrived late from the last click, and a fresh handle on the button
+            tiles, button = self._collect()
+            yield from tiles
+            if button is None:
+                print(f"No more 'Load More' button after {self.clicks} clicks")
+                break
+            try:
+                self.click(button)
+            except Exception as e:
+                print(f"Error clicking 'Load More' after {self.clicks} clicks: {e}")
+                break
+            self.clicks += 1
+
+            added = 0
+            deadline = time.monotonic() + self.wait
+            while True:
+                tiles, _ = self._collect()
+                added += len(tiles)
+                yield from tiles
+                if added or time.monotonic() >= deadline:
+                    break
+                time.sleep(self.poll)
+
+            print(f"Click {self.clicks}: {added} new products ({self.tiles} so far)")
+            if not added:
+                print("The last click added no products; stopping")
+                break
+
+
+def timestamped_stream_path(prefix: str) -> str:
+    """A JSONL file name stamped with the current time, such as coles_catalogue_20260325_201500.jsonl"""
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+
+
+def harvest_products(harvester: LoadMoreHarvester, parse: Callable, products: List[Dict],
+                     stream_path: Optional[str] = None, keep: Callable[[Dict], bool] = bool) -> int:
+    """Parse each harvested tile as it arrives, returning how many products were added
+
+    Every tile's outerHTML is parsed with html_select.parse_fragment and
+    handed to parse. The products it returns that pass keep go to products
+    and, with stream_path, to that JSONL file, rather than waiting for one
+    parse of the finished page.
+    """
+    writer = None
+    if stream_path:
+        print(f"Streaming products to {stream_path}")
+        writer = JSONLWriter(stream_path)
+
+    added = 0
+    try:
+        for tile_html in harvester.harvest():
+            product = parse(parse_fragment(tile_html))
+            if product and keep(product):
+                products.append(product)
+                added += 1
+                if writer:
+                    writer.write(product)
+                    writer.flush()
+    finally:
+        if writer:
+            writer.close()
+    return added
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Concurrent Fetch Engine
+
+Runs many HTTP GETs at once from asyncio while staying polite to each
+host. Requests go through one shared requests.Session, whose connection
+pool is sized to the concurrency, on a bounded thread pool. Every host
+has its own token bucket: a steady rate of requests per second with a
+small burst. Connection errors, 429s and 5xx responses are retried with
+exponential, jittered backoff, honouring Retry-After.
+
+A sweep is then limited by the host's rate budget rather than by the
+sum of every request's latency plus a fixed sleep.
+"""
+
+import time
+import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import CacheMissError
+
+# Politeness budget per host, and how many requests may be in flight at once
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 5
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def grow_pools(session: requests.Session, size: int):
+    """Let each of the session's HTTPAdapters keep at least size connections per host
+
+    The adapters themselves, with their retries and TLS settings, are kept.
+    """
+    for adapter in set(session.adapters.values()):
+        if isinstance(adapter, HTTPAdapter) and adapter._pool_maxsize < size:
+            adapter.poolmanager.clear()
+            adapter.init_poolmanager(adapter._pool_connections, size, block=adapter._pool_block)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Requests per second, on average
+            burst: Requests that may go out back to back after a quiet spell
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait for a token; refilling and taking one never awaits, so no lock is needed"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class FetchEngine:
+    def __init__(self, session: Optional[requests.Session] = None, rate: float = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST, concurrency: int = DEFAULT_CONCURRENCY,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF, timeout: float = 10,
+                 host_rates: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            session: Session whose headers and cookies every request shares; its adapters are kept,
+                with their pools grown to the concurrency if smaller
+            rate: Requests per second per host
+            burst: Token bucket size per host
+            concurrency: Requests in flight at once, across hosts
+            retries: Extra attempts after a connection error, 429 or 5xx
+            backoff: First retry delay in seconds, doubled per attempt and jittered
+            timeout: Per-request timeout in seconds
+            host_rates: Rates for particular hosts, overriding rate
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        else:
+            grow_pools(session, concurrency)
+        self.session = session
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.host_rates = host_rates or {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.requests_sent = 0
+        self.retried = 0
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.host_rates.get(host, self.rate), self.burst)
+        return self.buckets[host]
+
+    def _slots(self) -> asyncio.Semaphore:
+        """The concurrency limit for the running event loop, made on first use in it"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    async def fetch(self, url: str, params: Optional[dict] = None) -> requests.Response:
+        """GET url once a token for its host is free, retrying transient failures
+
+        Returns the last response, which may still be an error status;
+        raises the last requests.RequestException if no attempt got one.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            await self._bucket(url).acquire()
+            response, error = None, None
+            async with self._slots():
+                self.requests_sent += 1
+                try:
+                    response = await loop.run_in_executor(
+                        self._executor, partial(self.session.get, url, params=params, timeout=self.timeout))
+                except CacheMissError:
+                    # Replaying from the HTTP cache: asking again will not help
+                    raise
+                except requests.RequestException as e:
+                    error = e
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                return response
+            if attempt == self.retries:
+                break
+            self.retried += 1
+            await asyncio.sleep(self._retry_delay(attempt, response))
+        if response is not None:
+            return response
+        raise error
+
+    async def fetch_all(self, requests_: Sequence[Union[str, Tuple[str, Optional[dict]]]]
+                        ) -> List[Union[requests.Response, Exception]]:
+        """Fetch URLs or (url, params) pairs at once; results, or the exceptions raised, in input order"""
+        pairs = [(request, None) if isinstance(request, str) else request for request in requests_]
+        return await asyncio.gather(*(self.fetch(url, params) for url, params in pairs), return_exceptions=True)
+
+    def run(self, coroutine):
+        """Run a coroutine that uses this engine to completion, from synchronous code"""
+        return asyncio.run(coroutine)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
@@ -11,15 +11,29 @@ import pdf2image
 import io
 import os
 import sys
+import argparse
+import tempfile
+from functools import partial
 from pathlib import Path
 
+from http_cache import add_cache_arguments, print_cache_summary, session_from_args
+from ocr_cache import OCRCache, image_digest
+from ocr_preprocess import PREPROCESS_PROFILES, preprocess_image
+from ocr_scheduler import OCRScheduler, PageImage
+
+# OCR configuration for better accuracy
+OCR_CONFIG = r'--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789.,!?@#$%&*()_+-=[]{}|;:"></ '
+
 class FlowPaperPDFReader:
-    def __init__(self, tesseract_path=None):
+    def __init__(self, tesseract_path=None, session=None):
         """Initialize the PDF OCR reader
         
         Args:
             tesseract_path: Path to tesseract executable if not in PATH
+            session: requests session to download through, e.g. a caching one (see http_cache.py)
         """
+        self.session = session or requests.Session()
+        
         if tesseract_path:
             # Check if the path exists
             if not os.path.exists(tesseract_path):
@@ -54,7 +68,7 @@ class FlowPaperPDFReader:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self.session.get(url, headers=headers, timeout=30)
             response.raise_for_status()
             
             if output_path:
@@ -69,9 +83,66 @@ class FlowPaperPDFReader:
             print(f"Error downloading PDF: {e}")
             return None
 
+    def iter_page_images(self, pdf_path_or_bytes, dpi=300):
+        """Convert PDF pages to images one page at a time
+        
+        Only the page being converted is held, so memory does not grow
+        with the page count. PDF bytes are written to a temporary file
+        once rather than once per page.
+        
+        Args:
+            pdf_path_or_bytes: Path to PDF file or PDF bytes
+            dpi: Resolution for conversion
+            
+        Yields:
+            PIL Images, one per page
+        """
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                if isinstance(pdf_path_or_bytes, (str, Path)):
+                    # File path
+                    pdf_path = pdf_path_or_bytes
+                else:
+                    # Bytes
+                    pdf_path = os.path.join(temp_dir, 'document.pdf')
+                    with open(pdf_path, 'wb') as f:
+                        f.write(pdf_path_or_bytes)
+                
+                page_count = pdf2image.pdfinfo_from_path(pdf_path)['Pages']
+                for page_num in range(1, page_count + 1):
+                    yield from pdf2image.convert_from_path(pdf_path, dpi=dpi, first_page=page_num,
+                                                           last_page=page_num)
+        except Exception as e:
+            print(f"Error converting PDF to images: {e}")
+
+    def iter_ocr_pages(self, pdf_path_or_bytes, dpi=300, profile='gray'):
+        """Convert PDF pages for the OCR scheduler one page at a time
+        
+        Each page is identified by a digest of its converted pixels and the
+        preprocessing profile, and is only preprocessed if the OCR cache
+        has no text for it.
+        
+        Args:
+            pdf_path_or_bytes: Path to PDF file or PDF bytes
+            dpi: Resolution for conversion
+            profile: Profile in ocr_preprocess.PREPROCESS_PROFILES, or 'none' for raw pages
+            
+        Yields:
+            PageImages, one per page
+        """
+        if profile == 'none':
+            yield from self.iter_page_images(pdf_path_or_bytes, dpi=dpi)
+            return
+        config = PREPROCESS_PROFILES[profile]
+        tag = config.tag()
+        for image in self.iter_page_images(pdf_path_or_bytes, dpi=dpi):
+            yield PageImage(image_digest(image, tag), partial(preprocess_image, image, config, dpi))
+
     def pdf_to_images(self, pdf_path_or_bytes, dpi=300):
         """Convert PDF pages to images
         
+        Holds every page at once; process_pdf uses iter_ocr_pages instead.
+        
         Args:
             pdf_path_or_bytes: Path to PDF file or PDF bytes
             dpi: Resolution for conversion
@@ -107,8 +178,7 @@ class FlowPaperPDFReader:
             Extracted text string
         """
         try:
-            # OCR configuration for better accuracy
-            custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789.,!?@#$%&*()_+-=[]{}|;:"></ '
+            custom_config = OCR_CONFIG
             
             text = pytesseract.image_to_string(image, lang=lang, config=custom_config)
             return text.strip()
@@ -117,7 +187,7 @@ class FlowPaperPDFReader:
             print(f"Error extracting text from image: {e}")
             return ""
 
-    def process_pdf(self, url, output_file=None, temp_pdf_path=None, dpi=300, lang='eng'):
+    def process_pdf(self, url, output_file=None, temp_pdf_path=None, dpi=300, lang='eng', workers=None, use_cache=True, preprocess='gray'):
         """Complete pipeline to process PDF from URL with OCR
         
         Args:
@@ -126,6 +196,9 @@ class FlowPaperPDFReader:
             temp_pdf_path: Where to save downloaded PDF (optional)
             dpi: Image resolution for OCR
             lang: Language for OCR
+            workers: OCR worker processes (default: one per CPU)
+            use_cache: Reuse OCR results of pages seen before (see ocr_cache.py)
+            preprocess: Profile in ocr_preprocess.PREPROCESS_PROFILES, or 'none' for raw pages
             
         Returns:
             Extracted text as string
@@ -140,18 +213,18 @@ class FlowPaperPDFReader:
             if not pdf_data:
                 return ""
 
-        # Convert to images
-        images = self.pdf_to_images(pdf_data, dpi=dpi)
-        if not images:
-            return ""
-
-        # Extract text from each page
+        # Convert and OCR each page, several pages at a time; only the
+        # pages queued for OCR are held in memory
+        pages = self.iter_ocr_pages(pdf_data, dpi=dpi, profile=preprocess)
         all_text = []
-        for i, image in enumerate(images, 1):
-            print(f"Processing page {i}/{len(images)}...")
-            text = self.extract_text_from_image(image, lang=lang)
-            if text:
-                all_text.append(f"=== PAGE {i} ===\n{text}\n")
+        cache = OCRCache() if use_cache else None
+        with OCRScheduler([OCR_CONFIG], lang=lang, workers=workers, cache=cache) as scheduler:
+            for result in scheduler.ocr_pages(pages):
+                i = result.page + 1
+                print(f"Processed page {i}")
+                text = result.text.strip()
+                if text:
+                    all_text.append(f"=== PAGE {i} ===\n{text}\n")
 
         # Combine all text
         full_text = "\n".join(all_text)
@@ -167,6 +240,14 @@ class FlowPaperPDFReader:
 
 def main():
     """Main function to process the FlowPaper PDF"""
+    parser = argparse.ArgumentParser(description='Extract text from a FlowPaper PDF with OCR')
+    parser.add_argument('--workers', type=int, help='OCR worker processes (default: one per CPU)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Run OCR on every page even if it was OCR\'d before (see ocr_cache.py)')
+    parser.add_argument('--preprocess', choices=sorted(PREPROCESS_PROFILES) + ['none'], default='gray',
+                        help='Page image preprocessing profile (default: gray, see ocr_preprocess.py)')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
     
     # PDF URL
     pdf_url = "https://78c4076d.flowpaper.com/Week36QLDlowres/docs/Week-36-QLD-lowres.pdf?refresh=1756432294061"
@@ -177,7 +258,7 @@ def main():
     
     # Initialize reader with proper tesseract path
     tesseract_path = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-    reader = FlowPaperPDFReader(tesseract_path=tesseract_path)
+    reader = FlowPaperPDFReader(tesseract_path=tesseract_path, session=session_from_args(args))
     
     print("FlowPaper PDF OCR Reader")
     print("=" * 50)
@@ -189,7 +270,10 @@ def main():
             output_file=output_text_file,
             temp_pdf_path=temp_pdf_file,
             dpi=300,  # High resolution for better OCR
-            lang='eng'  # English language
+            lang='eng',  # English language
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            preprocess=args.preprocess
         )
         
         if extracted_text:
@@ -209,6 +293,9 @@ def main():
         print(f"Error processing PDF: {e}")
     
     finally:
+        print_cache_summary(reader.session)
+        reader.session.close()
+        
         # Clean up temp PDF file
         if os.path.exists(temp_pdf_file):
             try:
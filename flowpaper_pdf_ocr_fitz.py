@@ -9,18 +9,31 @@ import requests
 import pytesseract
 from PIL import Image
 import fitz  # PyMuPDF
-import io
 import os
 import sys
+import argparse
+from functools import partial
 from pathlib import Path
 
+from http_cache import add_cache_arguments, print_cache_summary, session_from_args
+from ocr_cache import OCRCache, pixmap_digest
+from ocr_preprocess import PREPROCESS_PROFILES, preprocess
+from ocr_scheduler import OCRScheduler, PageImage
+from page_images import iter_page_images, iter_page_pixmaps, open_pdf, pixmap_array, pixmap_image
+
+# OCR configuration for better accuracy
+OCR_CONFIG = r'--oem 3 --psm 6'
+
 class FlowPaperPDFReader:
-    def __init__(self, tesseract_path=None):
+    def __init__(self, tesseract_path=None, session=None):
         """Initialize the PDF OCR reader
         
         Args:
             tesseract_path: Path to tesseract executable if not in PATH
+            session: requests session to download through, e.g. a caching one (see http_cache.py)
         """
+        self.session = session or requests.Session()
+        
         if tesseract_path:
             # Check if the path exists
             if not os.path.exists(tesseract_path):
@@ -55,7 +68,7 @@ class FlowPaperPDFReader:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self.session.get(url, headers=headers, timeout=30)
             response.raise_for_status()
             
             if output_path:
@@ -70,44 +83,71 @@ class FlowPaperPDFReader:
             print(f"Error downloading PDF: {e}")
             return None
 
-    def pdf_to_images(self, pdf_path_or_bytes, dpi=300):
-        """Convert PDF pages to images using PyMuPDF
+    def iter_page_images(self, pdf_path_or_bytes, dpi=300):
+        """Render PDF pages to images one at a time using PyMuPDF
+        
+        Each image wraps the page's pixmap directly (see page_images.py)
+        and is freed once the caller is done with it, so memory does not
+        grow with the page count.
         
         Args:
             pdf_path_or_bytes: Path to PDF file or PDF bytes
             dpi: Resolution for conversion
             
-        Returns:
-            List of PIL Images
+        Yields:
+            PIL Images, one per page
         """
         try:
-            print("Converting PDF to images...")
-            
-            # Open PDF with PyMuPDF
-            if isinstance(pdf_path_or_bytes, (str, Path)):
-                # File path
-                doc = fitz.open(pdf_path_or_bytes)
-            else:
-                # Bytes
-                doc = fitz.open(stream=pdf_path_or_bytes, filetype="pdf")
-            
-            images = []
-            mat = fitz.Matrix(dpi/72, dpi/72)  # Create transformation matrix for DPI
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                img = Image.open(io.BytesIO(img_data))
-                images.append(img)
-            
-            doc.close()
-            print(f"Converted {len(images)} pages to images")
-            return images
+            yield from iter_page_images(pdf_path_or_bytes, dpi=dpi)
+        except Exception as e:
+            print(f"Error converting PDF to images: {e}")
+
+    def iter_ocr_pages(self, pdf_path_or_bytes, dpi=300, profile='gray'):
+        """Render PDF pages for the OCR scheduler one at a time
+        
+        Each page is identified by a digest of its rendered pixels and the
+        preprocessing profile, and is only preprocessed if the OCR cache
+        has no text for it.
+        
+        Args:
+            pdf_path_or_bytes: Path to PDF file or PDF bytes
+            dpi: Resolution for conversion
+            profile: Profile in ocr_preprocess.PREPROCESS_PROFILES, or 'none' for raw pages
             
+        Yields:
+            PageImages, one per page
+        """
+        config = PREPROCESS_PROFILES[profile] if profile != 'none' else None
+        tag = config.tag() if config else 'none'
+        try:
+            # Every profile starts by converting to gray, so render gray: PIL can wrap it without a copy
+            for pix in iter_page_pixmaps(pdf_path_or_bytes, dpi=dpi, grayscale=config is not None):
+                yield PageImage(pixmap_digest(pix, tag), partial(self._prepare_for_ocr, pix, config, dpi))
         except Exception as e:
             print(f"Error converting PDF to images: {e}")
-            return []
+
+    def _prepare_for_ocr(self, pix, config, dpi):
+        """Turn a rendered pixmap into the image Tesseract reads (see ocr_preprocess.py)"""
+        if config is None:
+            return pixmap_image(pix)
+        return Image.fromarray(preprocess(pixmap_array(pix), config, dpi))
+
+    def pdf_to_images(self, pdf_path_or_bytes, dpi=300):
+        """Convert PDF pages to images using PyMuPDF
+        
+        Holds every page at once; process_pdf uses iter_ocr_pages instead.
+        
+        Args:
+            pdf_path_or_bytes: Path to PDF file or PDF bytes
+            dpi: Resolution for conversion
+            
+        Returns:
+            List of PIL Images
+        """
+        print("Converting PDF to images...")
+        images = list(self.iter_page_images(pdf_path_or_bytes, dpi=dpi))
+        print(f"Converted {len(images)} pages to images")
+        return images
 
     def extract_text_from_image(self, image, lang='eng'):
         """Extract text from image using OCR
@@ -120,8 +160,7 @@ class FlowPaperPDFReader:
             Extracted text string
         """
         try:
-            # OCR configuration for better accuracy
-            custom_config = r'--oem 3 --psm 6'
+            custom_config = OCR_CONFIG
             
             text = pytesseract.image_to_string(image, lang=lang, config=custom_config)
             return text.strip()
@@ -162,7 +201,7 @@ class FlowPaperPDFReader:
             print(f"Error extracting text directly: {e}")
             return ""
 
-    def process_pdf(self, url, output_file=None, temp_pdf_path=None, dpi=300, lang='eng', use_ocr=False):
+    def process_pdf(self, url, output_file=None, temp_pdf_path=None, dpi=300, lang='eng', use_ocr=False, workers=None, use_cache=True, preprocess='gray'):
         """Complete pipeline to process PDF from URL
         
         Args:
@@ -172,6 +211,9 @@ class FlowPaperPDFReader:
             dpi: Image resolution for OCR (if used)
             lang: Language for OCR (if used)
             use_ocr: Force OCR instead of direct text extraction
+            workers: OCR worker processes (default: one per CPU)
+            use_cache: Reuse OCR results of pages seen before (see ocr_cache.py)
+            preprocess: Profile in ocr_preprocess.PREPROCESS_PROFILES, or 'none' for raw pages
             
         Returns:
             Extracted text as string
@@ -196,18 +238,25 @@ class FlowPaperPDFReader:
         if not full_text.strip() or use_ocr:
             print("Using OCR for text extraction...")
             
-            # Convert to images
-            images = self.pdf_to_images(pdf_data, dpi=dpi)
-            if not images:
+            try:
+                with open_pdf(pdf_data) as doc:
+                    page_count = len(doc)
+            except Exception as e:
+                print(f"Error converting PDF to images: {e}")
                 return ""
 
-            # Extract text from each page
+            # Render and OCR each page, several pages at a time; only the
+            # pages queued for OCR are held in memory
+            pages = self.iter_ocr_pages(pdf_data, dpi=dpi, profile=preprocess)
             all_text = []
-            for i, image in enumerate(images, 1):
-                print(f"Processing page {i}/{len(images)}...")
-                text = self.extract_text_from_image(image, lang=lang)
-                if text:
-                    all_text.append(f"=== PAGE {i} ===\n{text}\n")
+            cache = OCRCache() if use_cache else None
+            with OCRScheduler([OCR_CONFIG], lang=lang, workers=workers, cache=cache) as scheduler:
+                for result in scheduler.ocr_pages(pages):
+                    i = result.page + 1
+                    print(f"Processed page {i}/{page_count}")
+                    text = result.text.strip()
+                    if text:
+                        all_text.append(f"=== PAGE {i} ===\n{text}\n")
 
             # Combine all text
             full_text = "\n".join(all_text)
@@ -223,6 +272,14 @@ class FlowPaperPDFReader:
 
 def main():
     """Main function to process the FlowPaper PDF"""
+    parser = argparse.ArgumentParser(description='Extract text from a FlowPaper PDF with OCR')
+    parser.add_argument('--workers', type=int, help='OCR worker processes (default: one per CPU)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Run OCR on every page even if it was OCR\'d before (see ocr_cache.py)')
+    parser.add_argument('--preprocess', choices=sorted(PREPROCESS_PROFILES) + ['none'], default='gray',
+                        help='Page image preprocessing profile (default: gray, see ocr_preprocess.py)')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
     
     # PDF URL
     pdf_url = "https://78c4076d.flowpaper.com/Week11QLDLOWRES/docs/Week-11-QLD-LOWRES.pdf?refresh=1771476547709"
@@ -233,7 +290,7 @@ def main():
     
     # Initialize reader with proper tesseract path
     tesseract_path = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-    reader = FlowPaperPDFReader(tesseract_path=tesseract_path)
+    reader = FlowPaperPDFReader(tesseract_path=tesseract_path, session=session_from_args(args))
     
     print("FlowPaper PDF OCR Reader (PyMuPDF Version)")
     print("=" * 50)
@@ -246,7 +303,10 @@ def main():
             temp_pdf_path=temp_pdf_file,
             dpi=300,  # High resolution for better OCR (if needed)
             lang='eng',  # English language
-            use_ocr=False  # Try direct extraction first
+            use_ocr=False,  # Try direct extraction first
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            preprocess=args.preprocess
         )
         
         if extracted_text:
@@ -266,6 +326,9 @@ def main():
         print(f"Error processing PDF: {e}")
     
     finally:
+        print_cache_summary(reader.session)
+        reader.session.close()
+        
         # Clean up temp PDF file
         if os.path.exists(temp_pdf_file):
             try:
@@ -4,6 +4,17 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from difflib import SequenceMatcher
 
+from brand_recognizer import recognize_brand
+from match_assignment import GLOBAL_ASSIGNMENT_MODES, assign_pairs
+from match_cache import DEFAULT_CACHE_PATH, MatchCache
+from product_key import BrandSizeBlocker, ProductKey, build_product_keys, make_product_key
+from size_parser import UNIT_LABELS, format_unit_price
+
+# "vectorized" imports vectorized_matcher (numpy, scipy) only when it is used
+SCORERS = ("legacy", "vectorized")
+# "greedy" walks Coles products in file order; the others are solved over all pairs
+ASSIGNMENT_MODES = ("greedy",) + GLOBAL_ASSIGNMENT_MODES
+
 def load_json_data(file_path: str) -> List[Dict]:
     """Load JSON data from file"""
     try:
@@ -24,79 +35,220 @@ def normalize_product_name(name: str) -> str:
 
 def extract_brand_from_name(name: str) -> str:
     """Extract brand from product name"""
-    brands = ['cadbury', 'mars', 'smiths', 'smith\'s', 'bulla', 'woolworths', 'coles', 
-              'peters', 'nestle', 'unilever', 'palmolive', 'dove', 'rexona', 'blackmores',
-              'farmers union', 'sanitarium', 'coca-cola', 'pepsi', 'gatorade', 'pringles',
-              'lindt', 'herbal essences', 'toni & guy', 'glow lab', 'colgate']
-    
-    name_lower = name.lower()
-    for brand in brands:
-        if brand in name_lower:
-            return brand.title()
+    brand = recognize_brand(name)
+    if brand:
+        return brand
     
     # Fallback: first word
     words = name.split()
     return words[0] if words else "Unknown"
 
-def calculate_similarity(name1: str, name2: str) -> float:
-    """Calculate similarity between two product names"""
-    norm1 = normalize_product_name(name1)
-    norm2 = normalize_product_name(name2)
-    
+def extract_brand_key(name: str) -> str:
+    """Lowercase brand used when comparing product keys"""
+    return extract_brand_from_name(name).lower()
+
+def make_key(name: str, price: str = '') -> ProductKey:
+    """Build the ProductKey this module's scorers compare"""
+    return make_product_key(name, price, normalize=normalize_product_name, brand_of=extract_brand_key)
+
+def build_keys(products: List[Dict]) -> List[ProductKey]:
+    """Build one ProductKey per loaded product"""
+    return build_product_keys(products, normalize=normalize_product_name, brand_of=extract_brand_key)
+
+def key_similarity(key1: ProductKey, key2: ProductKey) -> float:
+    """Calculate similarity between two precomputed product keys"""
     # Use SequenceMatcher for similarity
-    similarity = SequenceMatcher(None, norm1, norm2).ratio()
+    similarity = SequenceMatcher(None, key1.normalized, key2.normalized).ratio()
     
     # Boost similarity if brands match
-    brand1 = extract_brand_from_name(name1)
-    brand2 = extract_brand_from_name(name2)
-    if brand1.lower() == brand2.lower() and brand1.lower() != "unknown":
+    if key1.brand == key2.brand and key1.brand != "unknown":
         similarity += 0.2  # Boost for matching brands
     
     return min(similarity, 1.0)  # Cap at 1.0
 
+def calculate_similarity(name1: str, name2: str) -> float:
+    """Calculate similarity between two product names"""
+    return key_similarity(make_key(name1), make_key(name2))
+
+def blocking_brand(key: ProductKey) -> str:
+    """Brand used for blocking: only dictionary brands, never the first-word fallback"""
+    return recognize_brand(key.name) or ''
+
+def cache_name(key: ProductKey) -> str:
+    """Match cache key for a product: its brand and normalized name"""
+    return f"{key.brand}|{key.normalized}"
+
+def cached_similarity(key1: ProductKey, key2: ProductKey, cache=None,
+                      similarity_threshold: float = 0.6) -> float:
+    """key_similarity, served from the cross-week MatchCache when the pair was seen before"""
+    if cache is None:
+        return key_similarity(key1, key2)
+    
+    name1, name2 = cache_name(key1), cache_name(key2)
+    similarity = cache.lookup(name1, name2)
+    if similarity is None:
+        similarity = key_similarity(key1, key2)
+        cache.record(name1, name2, similarity, similarity >= similarity_threshold)
+    return similarity
+
+def build_match(coles_product: Dict, woolworths_product: Dict, similarity: float,
+                coles_key: Optional[ProductKey] = None, woolworths_key: Optional[ProductKey] = None) -> Dict:
+    """Build a match record and work out which store has the better price
+
+    When both pack sizes are known in the same unit the per-unit prices
+    decide the best deal, so different pack sizes are compared fairly.
+    """
+    coles_price = float(coles_product['price'].replace('$', ''))
+    woolworths_price = float(woolworths_product['price'].replace('$', ''))
+    coles_key = coles_key or make_key(coles_product['productName'], coles_product['price'])
+    woolworths_key = woolworths_key or make_key(woolworths_product['productName'], woolworths_product['price'])
+    
+    coles_unit = coles_key.unit_price
+    woolworths_unit = woolworths_key.unit_price
+    comparable = (coles_unit is not None and woolworths_unit is not None
+                  and coles_key.size.unit == woolworths_key.size.unit)
+    if comparable:
+        coles_compare, woolworths_compare = round(coles_unit, 4), round(woolworths_unit, 4)
+    else:
+        coles_compare, woolworths_compare = coles_price, woolworths_price
+    
+    best_deal = "COLES" if coles_compare < woolworths_compare else "WOOLWORTHS"
+    if coles_compare == woolworths_compare:
+        best_deal = "TIED"
+    
+    higher = max(coles_compare, woolworths_compare)
+    return {
+        'coles': coles_product,
+        'woolworths': woolworths_product,
+        'similarity': similarity,
+        'best_deal': best_deal,
+        'price_difference': abs(coles_price - woolworths_price),
+        'coles_unit_price': format_unit_price(coles_unit, coles_key.size),
+        'woolworths_unit_price': format_unit_price(woolworths_unit, woolworths_key.size),
+        'unit_basis': UNIT_LABELS[coles_key.size.unit] if comparable else None,
+        # Saving at the cheaper store, per unit when the sizes allow it
+        'saving_percent': abs(coles_compare - woolworths_compare) / higher * 100 if higher else 0.0
+    }
+
+def score_candidate_pairs(coles_keys: List[ProductKey], woolworths_keys: List[ProductKey],
+                          similarity_threshold: float = 0.6, scorer: str = "legacy",
+                          top_k: int = 10, cache=None, blocker=None) -> List[tuple]:
+    """Score every candidate pair once, returning (similarity, coles_index, woolworths_index)
+
+    With a BrandSizeBlocker over the Woolworths keys only pairs in the same
+    brand and size band are kept (and, for the legacy scorer, scored).
+    """
+    if scorer == "vectorized":
+        pairs = []
+        for row, candidates in enumerate(vectorized_candidates(coles_keys, woolworths_keys, top_k)):
+            allowed = set(blocker.candidates(coles_keys[row])) if blocker is not None else None
+            pairs.extend((s, row, i) for i, s in candidates
+                         if s >= similarity_threshold and (allowed is None or i in allowed))
+        return pairs
+    
+    pairs = []
+    for row, coles_key in enumerate(coles_keys):
+        indices = blocker.candidates(coles_key) if blocker is not None else range(len(woolworths_keys))
+        for i in indices:
+            similarity = cached_similarity(coles_key, woolworths_keys[i], cache, similarity_threshold)
+            if similarity >= similarity_threshold:
+                pairs.append((similarity, row, i))
+    return pairs
+
+def vectorized_candidates(coles_keys: List[ProductKey], woolworths_keys: List[ProductKey],
+                          top_k: int) -> List[List[tuple]]:
+    """Top-k Woolworths (index, similarity) candidates for each Coles product"""
+    from vectorized_matcher import CharNgramMatcher
+    matcher = CharNgramMatcher(normalize_product_name, extract_brand_key)
+    return matcher.top_k_keys(coles_keys, woolworths_keys, top_k)
+
 def find_matching_products(coles_data: List[Dict], woolworths_data: List[Dict], 
-                          similarity_threshold: float = 0.6) -> List[Dict]:
-    """Find matching products between Coles and Woolworths"""
+                          similarity_threshold: float = 0.6, scorer: str = "legacy",
+                          top_k: int = 10, assignment: str = "greedy", cache=None,
+                          blocking: str = "none") -> List[Dict]:
+    """Find matching products between Coles and Woolworths
+
+    scorer selects how pairs are scored: "legacy" runs calculate_similarity on
+    every pair, "vectorized" scores all names at once with TF-IDF character
+    n-grams (see vectorized_matcher) and only considers each Coles product's
+    top_k Woolworths candidates.
+
+    assignment selects how pairs are chosen: "greedy" walks Coles products in
+    file order and claims the best unused Woolworths product, "global" and
+    "optimal" score each candidate pair once and solve the one-to-one
+    matching over all pairs (see match_assignment).
+
+    cache is an optional match_cache.MatchCache; legacy scores for pairs seen
+    in earlier weeks are reused and only unseen pairs are scored. Vectorized
+    scores depend on the whole week's corpus and are never cached.
+
+    blocking is "none" to consider every pair, or "brand_size" to only
+    consider pairs whose brands agree and whose pack sizes are in the same
+    size band (see product_key.BrandSizeBlocker), which skips most pairs.
+    """
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer: {scorer}")
+    if assignment not in ASSIGNMENT_MODES:
+        raise ValueError(f"Unknown assignment mode: {assignment}")
+    if blocking not in ("none", "brand_size"):
+        raise ValueError(f"Unknown blocking mode: {blocking}")
+
+    coles_keys = build_keys(coles_data)
+    woolworths_keys = build_keys(woolworths_data)
+    if cache is not None and scorer == "legacy":
+        cache.load({cache_name(k) for k in coles_keys}, {cache_name(k) for k in woolworths_keys})
+    else:
+        cache = None
+    blocker = None
+    if blocking == "brand_size":
+        blocker = BrandSizeBlocker(woolworths_keys, brand_of=blocking_brand)
+
+    if assignment != "greedy":
+        pairs = score_candidate_pairs(coles_keys, woolworths_keys, similarity_threshold, scorer, top_k,
+                                      cache, blocker)
+        # Emit in Coles order before the similarity sort, like the greedy pass
+        accepted = sorted(assign_pairs(pairs, assignment), key=lambda pair: pair[1])
+        matches = [build_match(coles_data[row], woolworths_data[i], similarity,
+                               coles_keys[row], woolworths_keys[i])
+                   for similarity, row, i in accepted]
+        matches.sort(key=lambda x: x['similarity'], reverse=True)
+        return matches
+
+    candidates = None
+    if scorer == "vectorized":
+        candidates = vectorized_candidates(coles_keys, woolworths_keys, top_k)
+
     matches = []
     used_woolworths = set()
     
-    for coles_product in coles_data:
+    for row, coles_product in enumerate(coles_data):
         best_match = None
         best_similarity = 0
         best_index = -1
         
-        for i, woolworths_product in enumerate(woolworths_data):
-            if i in used_woolworths:
-                continue
-                
-            similarity = calculate_similarity(
-                coles_product['productName'], 
-                woolworths_product['productName']
+        allowed = blocker.candidates(coles_keys[row]) if blocker is not None else None
+        if candidates is None:
+            scored = (
+                (i, cached_similarity(coles_keys[row], woolworths_keys[i], cache, similarity_threshold))
+                for i in (allowed if allowed is not None else range(len(woolworths_data)))
+                if i not in used_woolworths
             )
-            
+        else:
+            # Walk candidates in Woolworths order so ties resolve like the legacy scan
+            allowed = set(allowed) if allowed is not None else None
+            scored = ((i, s) for i, s in sorted(candidates[row])
+                      if i not in used_woolworths and (allowed is None or i in allowed))
+        
+        for i, similarity in scored:
             if similarity > best_similarity and similarity >= similarity_threshold:
                 best_similarity = similarity
-                best_match = woolworths_product
+                best_match = woolworths_data[i]
                 best_index = i
         
         if best_match:
             used_woolworths.add(best_index)
-            
-            # Determine which has better price
-            coles_price = float(coles_product['price'].replace('$', ''))
-            woolworths_price = float(best_match['price'].replace('$', ''))
-            
-            best_deal = "COLES" if coles_price < woolworths_price else "WOOLWORTHS"
-            if coles_price == woolworths_price:
-                best_deal = "TIED"
-            
-            matches.append({
-                'coles': coles_product,
-                'woolworths': best_match,
-                'similarity': best_similarity,
-                'best_deal': best_deal,
-                'price_difference': abs(coles_price - woolworths_price)
-            })
+            matches.append(build_match(coles_product, best_match, best_similarity,
+                                       coles_keys[row], woolworths_keys[best_index]))
     
     # Sort by similarity (highest first)
     matches.sort(key=lambda x: x['similarity'], reverse=True)
@@ -162,6 +314,10 @@ def generate_comparison_card(match: Dict, card_id: int) -> str:
                             <div class="price-info">
                                 <div class="current-price">{coles_current}</div>'''
     
+    if match.get('coles_unit_price'):
+        card_html += f'''
+                                <div class="unit-price">{match['coles_unit_price']}</div>'''
+    
     if coles_original or coles_save:
         card_html += f'''
                                 <div>'''
@@ -187,6 +343,10 @@ def generate_comparison_card(match: Dict, card_id: int) -> str:
                             <div class="price-info">
                                 <div class="current-price">{woolworths_current}</div>'''
     
+    if match.get('woolworths_unit_price'):
+        card_html += f'''
+                                <div class="unit-price">{match['woolworths_unit_price']}</div>'''
+    
     if woolworths_original or woolworths_save:
         card_html += f'''
                                 <div>'''
@@ -233,8 +393,19 @@ def calculate_stats(matches: List[Dict]) -> Dict:
         'woolworths_percentage': woolworths_percentage
     }
 
-def generate_html_comparison(coles_file: str, woolworths_file: str, template_file: str, output_file: str):
-    """Generate HTML comparison file"""
+def rank_by_saving(matches: List[Dict]) -> List[Dict]:
+    """Order matches by their per-unit saving, biggest first, then by similarity"""
+    return sorted(matches, key=lambda m: (-m['saving_percent'], -m['similarity']))
+
+def generate_html_comparison(coles_file: str, woolworths_file: str, template_file: str, output_file: str,
+                             cache_path: Optional[str] = DEFAULT_CACHE_PATH, blocking: str = "brand_size"):
+    """Generate HTML comparison file
+
+    Pair scores are kept across weeks in the match cache at cache_path;
+    pass None to score every pair from scratch. Only pairs of the same
+    brand and size band are compared unless blocking is "none", and the
+    cards show the matches with the biggest per-unit savings.
+    """
     print("Loading data files...")
     coles_data = load_json_data(coles_file)
     woolworths_data = load_json_data(woolworths_file)
@@ -242,7 +413,14 @@ def generate_html_comparison(coles_file: str, woolworths_file: str, template_fil
     print(f"Loaded {len(coles_data)} Coles products and {len(woolworths_data)} Woolworths products")
     
     print("Finding matching products...")
-    matches = find_matching_products(coles_data, woolworths_data)
+    cache = MatchCache(cache_path) if cache_path else None
+    try:
+        matches = find_matching_products(coles_data, woolworths_data, cache=cache, blocking=blocking)
+        if cache is not None:
+            cache.save()
+    finally:
+        if cache is not None:
+            cache.close()
     
     print(f"Found {len(matches)} matching products")
     
@@ -252,7 +430,7 @@ def generate_html_comparison(coles_file: str, woolworths_file: str, template_fil
     
     # Generate comparison cards HTML
     comparison_cards_html = ""
-    for i, match in enumerate(matches[:20], 1):  # Limit to top 20 matches
+    for i, match in enumerate(rank_by_saving(matches)[:20], 1):  # Limit to top 20 matches
         comparison_cards_html += generate_comparison_card(match, i)
     
     # Calculate statistics
@@ -303,6 +481,8 @@ def generate_html_comparison(coles_file: str, woolworths_file: str, template_fil
     
     print(f"Generated comparison HTML: {output_file}")
     print(f"Statistics: {stats}")
+    if cache is not None:
+        print(cache.summary())
 
 if __name__ == "__main__":
     coles_file = r"C:\Users\advgen10\source\repos\AdvGenPriceComparer\data\cloes_10092025.json"
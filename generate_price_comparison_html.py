@@ -1,33 +1,29 @@
 import json
 from datetime import datetime
 
+from product_categorizer import RuleCategorizer, keyword_rules
+
 def load_comparison_data():
     """Load the price comparison results"""
     with open('price_comparison_results.json', 'r', encoding='utf-8') as f:
         return json.load(f)
 
+PRODUCT_CATEGORY_KEYWORDS = {
+    'Drinks': ['coca', 'sprite', 'fanta', 'soft drink', 'energy drink', 'red bull'],
+    'Snacks': ['chips', 'doritos', 'pringles', 'corn chips'],
+    'Condiments': ['sauce', 'tomato', 'barbecue'],
+    'Frozen': ['ice cream', 'frozen', 'dessert'],
+    'Confectionery': ['chocolate', 'biscuit', 'cookie'],
+    'Meat & Seafood': ['meat', 'beef', 'chicken', 'fish'],
+    'Dairy': ['milk', 'cheese', 'butter', 'yogurt'],
+    'Bakery': ['bread', 'bakery'],
+}
+
+PRODUCT_CATEGORIZER = RuleCategorizer(keyword_rules(PRODUCT_CATEGORY_KEYWORDS), default='General')
+
 def get_product_category(product_name):
     """Categorize products based on their names"""
-    name_lower = product_name.lower()
-
-    if any(word in name_lower for word in ['coca', 'sprite', 'fanta', 'soft drink', 'energy drink', 'red bull']):
-        return 'Drinks'
-    elif any(word in name_lower for word in ['chips', 'doritos', 'pringles', 'corn chips']):
-        return 'Snacks'
-    elif any(word in name_lower for word in ['sauce', 'tomato', 'barbecue']):
-        return 'Condiments'
-    elif any(word in name_lower for word in ['ice cream', 'frozen', 'dessert']):
-        return 'Frozen'
-    elif any(word in name_lower for word in ['chocolate', 'biscuit', 'cookie']):
-        return 'Confectionery'
-    elif any(word in name_lower for word in ['meat', 'beef', 'chicken', 'fish']):
-        return 'Meat & Seafood'
-    elif any(word in name_lower for word in ['milk', 'cheese', 'butter', 'yogurt']):
-        return 'Dairy'
-    elif any(word in name_lower for word in ['bread', 'bakery']):
-        return 'Bakery'
-    else:
-        return 'General'
+    return PRODUCT_CATEGORIZER.categorize(product_name)
 
 def create_product_card_html(product_match):
     """Create HTML for a single product comparison card"""
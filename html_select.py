@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+HTML Parsing Backends
+
+One small selector API over two parsers, for the scrapers and converters
+that pull products out of catalogue HTML. With lxml installed, pages are
+parsed by libxml2 and CSS selectors run as compiled XPath; without it,
+BeautifulSoup's pure-Python html.parser does the same job more slowly.
+
+    document = parse_html(html)
+    for tile in document.select('.product-tile'):
+        name = tile.select_one('h3')
+        price = tile.get_text(' ', strip=True)
+
+Nodes offer select(), select_one(), find_all(), find(), get_text(), get(),
+text and parent, with BeautifulSoup's meaning. Selectors are the simple
+CSS the scrapers use: tags, .class, #id, [attr], [attr=v] (also ~= ^= $=
+*= |=), chained with descendant or child (>) combinators and separated by
+commas.
+
+Run directly to time both backends on saved pages:
+    python html_select.py data/coles.html gooddeals.html liveinbne_deal.html
+"""
+
+import re
+import time
+import argparse
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+HTML_BACKENDS = ('lxml', 'html.parser')
+DEFAULT_HTML_BACKEND = 'lxml' if HAVE_LXML else 'html.parser'
+
+BENCHMARK_PAGES = ['data/coles.html', 'gooddeals.html', 'liveinbne_deal.html']
+
+# Elements whose text is code or markup rather than page text; get_text() leaves it out, as BeautifulSoup does
+HIDDEN_TEXT_TAGS = ('script', 'style', 'template')
+
+_SIMPLE_SELECTOR = re.compile(r"""
+    (?P<tag>[a-zA-Z][\w-]*|\*)
+  | \.(?P<cls>[\w-]+)
+  | \#(?P<id>[\w-]+)
+  | \[\s*(?P<attr>[\w:-]+)\s*
+      (?:(?P<op>[~^$*|]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[^\]\s]+))\s*)?
+    \]
+""", re.VERBOSE)
+
+if HAVE_LXML:
+    _all_text = etree.XPath('.//text()', smart_strings=False)
+    _text_nodes = etree.XPath('.//text()')
+    _has_hidden_text = etree.XPath('boolean(' + ' | '.join(f'.//{tag}' for tag in HIDDEN_TEXT_TAGS) + ')')
+
+
+def _literal(value: str) -> str:
+    """A string as an XPath literal"""
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return 'concat(' + ", '\"', ".join(f'"{part}"' for part in value.split('"')) + ')'
+
+
+def _token_test(attr: str, token: str) -> str:
+    return f"contains(concat(' ', normalize-space(@{attr}), ' '), {_literal(' ' + token + ' ')})"
+
+
+def _attr_test(attr: str, op: Optional[str], value: str) -> str:
+    if op is None:
+        return f'@{attr}'
+    if op == '=':
+        return f'@{attr}={_literal(value)}'
+    if op == '~=':
+        return _token_test(attr, value)
+    if op == '|=':
+        return f'(@{attr}={_literal(value)} or starts-with(@{attr}, {_literal(value + "-")}))'
+    if not value:
+        # CSS: an empty substring, prefix or suffix matches nothing
+        return 'false()'
+    if op == '*=':
+        return f'contains(@{attr}, {_literal(value)})'
+    if op == '^=':
+        return f'starts-with(@{attr}, {_literal(value)})'
+    return f'substring(@{attr}, string-length(@{attr}) - {len(value) - 1}) = {_literal(value)}'
+
+
+@lru_cache(maxsize=256)
+def css_to_xpath(selector: str, context: str = '.') -> str:
+    """Compile a simple CSS selector to an XPath matching the descendants it selects
+
+    The document itself is searched with context '', so that the root
+    element can match as well.
+    """
+    alternatives = []
+    path, axis = context, '//'
+    tag, tests = None, []
+    pos, end = 0, len(selector)
+    while pos < end and selector[pos].isspace():
+        pos += 1
+
+    while True:
+        match = _SIMPLE_SELECTOR.match(selector, pos)
+        if match and not (match.group('tag') and (tag or tests)):
+            if match.group('tag'):
+                tag = match.group('tag').lower()
+            elif match.group('cls'):
+                tests.append(_token_test('class', match.group('cls')))
+            elif match.group('id'):
+                tests.append(f'@id={_literal(match.group("id"))}')
+            else:
+                value = next((v for v in match.group('dq', 'sq', 'bare') if v is not None), '')
+                tests.append(_attr_test(match.group('attr').lower(), match.group('op'), value))
+            pos = match.end()
+            continue
+
+        if tag is None and not tests:
+            raise ValueError(f"Unsupported CSS selector: {selector!r}")
+        path += axis + (tag or '*') + ''.join(f'[{test}]' for test in tests)
+        tag, tests = None, []
+
+        start = pos
+        while pos < end and selector[pos].isspace():
+            pos += 1
+        if pos == end or selector[pos] == ',':
+            alternatives.append(path)
+            if pos == end:
+                return ' | '.join(alternatives)
+            path, axis = context, '//'
+            pos += 1
+        elif selector[pos] == '>':
+            axis = '/'
+            pos += 1
+        elif pos > start:
+            axis = '//'
+            continue
+        else:
+            raise ValueError(f"Unsupported CSS selector: {selector!r}")
+        while pos < end and selector[pos].isspace():
+            pos += 1
+
+
+def _find_xpath(name: Optional[str], class_: Optional[str], attrs: Optional[Dict], context: str) -> str:
+    tests = [_token_test('class', class_)] if class_ else []
+    for attr, value in (attrs or {}).items():
+        tests.append(f'@{attr}' if value is True else f'@{attr}={_literal(value)}')
+    return context + '//' + (name or '*') + ''.join(f'[{test}]' for test in tests)
+
+
+class LxmlNode:
+    """An element of a document parsed by lxml"""
+    __slots__ = ('element', 'context')
+
+    def __init__(self, element, document: bool = False):
+        self.element = element
+        # XPath context: the document node stands for its root element, which it contains
+        self.context = '' if document else '.'
+
+    @property
+    def tag(self) -> str:
+        return '[document]' if not self.context else self.element.tag
+
+    def _xpath(self, path: str) -> List['LxmlNode']:
+        return [LxmlNode(element) for element in self.element.xpath(path)]
+
+    def select(self, selector: str) -> List['LxmlNode']:
+        return self._xpath(css_to_xpath(selector, self.context))
+
+    def select_one(self, selector: str) -> Optional['LxmlNode']:
+        found = self._xpath(f'({css_to_xpath(selector, self.context)})[1]')
+        return found[0] if found else None
+
+    def find_all(self, name: Optional[str] = None, class_: Optional[str] = None,
+                 attrs: Optional[Dict] = None) -> List['LxmlNode']:
+        return self._xpath(_find_xpath(name, class_, attrs, self.context))
+
+    def find(self, name: Optional[str] = None, class_: Optional[str] = None,
+             attrs: Optional[Dict] = None) -> Optional['LxmlNode']:
+        found = self._xpath(f'({_find_xpath(name, class_, attrs, self.context)})[1]')
+        return found[0] if found else None
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        if self.element.tag in HIDDEN_TEXT_TAGS or not _has_hidden_text(self.element):
+            strings = _all_text(self.element)
+        else:
+            # Filtering in Python beats an XPath predicate on every text node; a tail belongs to the element before it
+            strings = [string for string in _text_nodes(self.element)
+                       if string.is_tail or string.getparent().tag not in HIDDEN_TEXT_TAGS]
+        if strip:
+            strings = [string.strip() for string in strings]
+            strings = [string for string in strings if string]
+        return separator.join(strings)
+
+    @property
+    def text(self) -> str:
+        return self.get_text()
+
+    def get(self, name: str, default=None):
+        return self.element.get(name, default) if self.context else default
+
+    @property
+    def parent(self) -> Optional['LxmlNode']:
+        if not self.context:
+            return None
+        parent = self.element.getparent()
+        return LxmlNode(parent) if parent is not None else LxmlNode(self.element, document=True)
+
+
+def _soup_attrs(class_: Optional[str], attrs: Optional[Dict]) -> Dict:
+    # class_=None would ask BeautifulSoup for elements without a class
+    return {**(attrs or {}), 'class': class_} if class_ else attrs or {}
+
+
+class SoupNode:
+    """An element of a document parsed by BeautifulSoup"""
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def tag(self) -> str:
+        return self.element.name
+
+    def select(self, selector: str) -> List['SoupNode']:
+        return [SoupNode(element) for element in self.element.select(selector)]
+
+    def select_one(self, selector: str) -> Optional['SoupNode']:
+        element = self.element.select_one(selector)
+        return SoupNode(element) if element is not None else None
+
+    def find_all(self, name: Optional[str] = None, class_: Optional[str] = None,
+                 attrs: Optional[Dict] = None) -> List['SoupNode']:
+        return [SoupNode(element) for element in self.element.find_all(name, attrs=_soup_attrs(class_, attrs))]
+
+    def find(self, name: Optional[str] = None, class_: Optional[str] = None,
+             attrs: Optional[Dict] = None) -> Optional['SoupNode']:
+        element = self.element.find(name, attrs=_soup_attrs(class_, attrs))
+        return SoupNode(element) if element is not None else None
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        return self.element.get_text(separator, strip=strip)
+
+    @property
+    def text(self) -> str:
+        return self.get_text()
+
+    def get(self, name: str, default=None):
+        # BeautifulSoup splits class and a few other attributes into lists; lxml gives the string
+        value = self.element.get(name, default)
+        return ' '.join(value) if isinstance(value, list) else value
+
+    @property
+    def parent(self) -> Optional['SoupNode']:
+        parent = self.element.parent
+        return SoupNode(parent) if parent is not None else None
+
+
+Node = Union[LxmlNode, SoupNode]
+
+
+def parse_html(markup: Union[str, bytes], backend: Optional[str] = None) -> Node:
+    """Parse a page with the given backend (default: lxml when installed); the document node"""
+    backend = backend or DEFAULT_HTML_BACKEND
+    if backend == 'html.parser':
+        return SoupNode(BeautifulSoup(markup, 'html.parser'))
+    if backend != 'lxml':
+        raise ValueError(f"Unknown HTML backend: {backend!r} (choose from {', '.join(HTML_BACKENDS)})")
+    if not HAVE_LXML:
+        raise ImportError("The lxml backend needs lxml: pip install lxml")
+
+    if not markup.strip():
+        markup = '<html></html>'
+    try:
+        return LxmlNode(lxml.html.document_fromstring(markup), document=True)
+    except ValueError:
+        # lxml refuses str input that declares its own encoding
+        return LxmlNode(lxml.html.document_fromstring(markup.encode('utf-8')), document=True)
+
+
+def parse_fragment(markup: str, backend: Optional[str] = None) -> Optional[Node]:
+    """The first element of a piece of HTML, such as one product tile's outerHTML"""
+    # lxml always builds a whole document around the markup
+    selector = 'body > *' if (backend or DEFAULT_HTML_BACKEND) == 'lxml' else '*'
+    return parse_html(markup, backend).select_one(selector)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the HTML parsing backends on saved pages')
+    parser.add_argument('pages', nargs='*', default=BENCHMARK_PAGES,
+                        help=f'HTML files (default: {" ".join(BENCHMARK_PAGES)})')
+    parser.add_argument('--repeat', type=int, default=5, help='Parses per page and backend (default: 5)')
+    parser.add_argument('--selector', default='[class*="product"], [class*="deal"], a[href]',
+                        help='Selector timed after parsing')
+    args = parser.parse_args()
+
+    backends = [backend for backend in HTML_BACKENDS if backend != 'lxml' or HAVE_LXML]
+    if not HAVE_LXML:
+        print("lxml is not installed; timing html.parser only")
+
+    for path in args.pages:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        print(f"\n{path} ({len(html) / 1024:.0f} KB)")
+
+        results = {}
+        for backend in backends:
+            timings = {'parse': 0.0, 'text': 0.0, 'select': 0.0}
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                document = parse_html(html, backend)
+                timings['parse'] += time.perf_counter() - start
+
+                start = time.perf_counter()
+                text = document.get_text()
+                timings['text'] += time.perf_counter() - start
+
+                start = time.perf_counter()
+                matches = document.select(args.selector)
+                timings['select'] += time.perf_counter() - start
+            results[backend] = (sum(timings.values()), ' '.join(text.split()), len(matches))
+            print(f"  {backend:12} " + '  '.join(f"{step} {elapsed * 1000 / args.repeat:7.1f} ms"
+                                                  for step, elapsed in timings.items())
+                  + f"  ({len(matches)} matches)")
+
+        if len(results) == 2:
+            (fast, fast_text, fast_matches), (slow, slow_text, slow_matches) = results['lxml'], results['html.parser']
+            same = 'same text and matches' if (fast_text, fast_matches) == (slow_text, slow_matches) else 'results differ'
+            print(f"  lxml is {slow / fast:.1f}x faster; {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,16 @@ Converts gooddeals.html deal cards to gooddeals.md format
 """
 
 import re
-from bs4 import BeautifulSoup
+
+from html_select import parse_html
 
 def extract_deals_from_html(html_content):
     """Extract deal information from HTML content"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    document = parse_html(html_content)
     deals = []
     
     # Find all deal cards
-    deal_cards = soup.find_all('div', class_='deal-card')
+    deal_cards = document.find_all('div', class_='deal-card')
     
     for card in deal_cards:
         deal = {}
@@ -48,7 +49,7 @@ def extract_deals_from_html(html_content):
             deal['current_price'] = current_price
             
             # Extract original price from strikethrough span
-            strikethrough = price_elem.find('span', style=lambda x: x and 'line-through' in x)
+            strikethrough = price_elem.select_one('span[style*="line-through"]')
             if strikethrough:
                 deal['original_price'] = strikethrough.text.strip()
             else:
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+On-Disk HTTP Cache
+
+A requests.Session for the scrapers and PDF downloaders that keeps every
+successful GET on disk. Bodies are stored once per content hash under
+data/http_cache/bodies, so identical pages and PDFs fetched from different
+URLs share a file; a SQLite index maps each URL to its body, headers and
+validators.
+
+Fetching a URL that is already cached sends If-None-Match/If-Modified-Since,
+and a 304 is answered from the cache. In replay mode nothing goes to the
+network: cached URLs are served as they were, and any other request raises
+CacheMissError (a requests.ConnectionError, so the scrapers' usual error
+handling applies). Reruns during parser development then cost no network
+time, and a whole scraping run can be repeated offline.
+
+The cache is bounded by body size: once it holds more than max_bytes, the
+least recently used URLs are evicted first.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_HTTP_CACHE_DIR = "data/http_cache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Headers describing the transfer rather than the body; the cached body is already decoded
+TRANSFER_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+
+class CacheMissError(requests.ConnectionError):
+    """A replayed request for a URL that is not in the cache"""
+
+
+class CachedResponse(NamedTuple):
+    url: str
+    headers: dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    digest: str
+
+
+class HTTPCache:
+    def __init__(self, directory: str = DEFAULT_HTTP_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.bodies = self.directory / "bodies"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.stored = 0
+        self.misses = 0
+        self.evicted = 0
+
+        self.bodies.mkdir(parents=True, exist_ok=True)
+        # The fetch engine sends from several threads; every use of the connection holds the lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.directory / "index.sqlite"), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                final_url TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self.conn.commit()
+
+    def _body_path(self, digest: str) -> Path:
+        return self.bodies / digest[:2] / digest
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """The cached response for a URL, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT final_url, headers, etag, last_modified, digest FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or not self._body_path(row[4]).exists():
+            return None
+        final_url, headers, etag, last_modified, digest = row
+        return CachedResponse(final_url, json.loads(headers), etag, last_modified, digest)
+
+    def touch(self, url: str):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE url = ?", (time.time(), url))
+
+    def put(self, url: str, response: requests.Response):
+        """Store a 200 response's body and validators under the URL it was requested as"""
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._body_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            temp_path = path.with_name(f'{digest}.{threading.get_ident()}.tmp')
+            temp_path.write_bytes(body)
+            temp_path.replace(path)
+
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in TRANSFER_HEADERS}
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.url, json.dumps(headers), response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), digest, len(body), time.time())
+            )
+            self._evict()
+        self.stored += 1
+
+    def response(self, entry: CachedResponse, request: requests.PreparedRequest) -> requests.Response:
+        """Rebuild a requests.Response from a cached entry"""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = self._body_path(entry.digest).read_bytes()
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry.url
+        response.request = request
+        response.from_cache = True
+        return response
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        for url, digest, size in self.conn.execute("SELECT url, digest, size FROM responses ORDER BY last_used ASC"):
+            doomed.append((url, digest))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM responses WHERE url = ?", ((url,) for url, _ in doomed))
+        self.evicted += len(doomed)
+        # Bodies are shared between URLs; only drop the ones nothing points at any more
+        for _, digest in doomed:
+            if self.conn.execute("SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                self._body_path(digest).unlink(missing_ok=True)
+
+    def summary(self) -> str:
+        return (f"HTTP cache: {self.hits} replayed, {self.revalidated} not modified, "
+                f"{self.stored} stored, {self.evicted} evicted")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class CachingSession(requests.Session):
+    def __init__(self, cache: Optional[HTTPCache] = None, replay: bool = False):
+        """
+        Args:
+            cache: Where responses are kept (default: data/http_cache)
+            replay: Serve only from the cache, never touching the network
+        """
+        super().__init__()
+        self.cache = cache or HTTPCache()
+        self.replay = replay
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        # Streamed bodies are left alone: reading them here would defeat the streaming
+        cacheable = request.method == 'GET' and not kwargs.get('stream')
+        entry = self.cache.get(request.url) if cacheable else None
+
+        if self.replay:
+            if entry is None:
+                self.cache.misses += 1
+                raise CacheMissError(f"Not in the HTTP cache: {request.method} {request.url}", request=request)
+            self.cache.hits += 1
+            self.cache.touch(request.url)
+            return self.cache.response(entry, request)
+
+        if entry is not None:
+            if entry.etag:
+                request.headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                request.headers['If-Modified-Since'] = entry.last_modified
+
+        response = super().send(request, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            self.cache.revalidated += 1
+            self.cache.touch(request.url)
+            return self.cache.response(entry, request)
+        if cacheable and response.status_code == 200:
+            self.cache.put(request.url, response)
+        return response
+
+    def close(self):
+        super().close()
+        self.cache.close()
+
+
+def add_cache_arguments(parser):
+    """The --replay and --no-http-cache options every scraper takes"""
+    parser.add_argument('--replay', action='store_true',
+                        help='Serve every request from the HTTP cache, without network access')
+    parser.add_argument('--no-http-cache', action='store_true',
+                        help='Fetch everything fresh and keep nothing (see http_cache.py)')
+
+
+def session_from_args(args) -> requests.Session:
+    """A caching session, or a plain one with --no-http-cache, as the options ask"""
+    if args.no_http_cache:
+        if args.replay:
+            raise SystemExit("--replay needs the HTTP cache")
+        return requests.Session()
+    return CachingSession(replay=args.replay)
+
+
+def print_cache_summary(session: requests.Session):
+    """Report what the HTTP cache saved, if the session has one"""
+    if isinstance(session, CachingSession):
+        print(session.cache.summary())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+One-to-One Match Assignment
+
+Solves cross-store matching globally instead of walking one store's products
+in file order. Candidate pairs are scored once and passed in as
+(score, left_index, right_index) tuples; each solver returns the accepted
+pairs with every left and right product used at most once.
+
+- "global":  heap-driven global greedy, always accepts the best remaining pair
+- "optimal": Hungarian assignment maximizing the total similarity, solved
+             separately on each connected component of the candidate graph
+"""
+
+import heapq
+from typing import Iterable, List, Tuple
+
+# Modes assign_pairs() solves; each caller adds its own per-row default mode
+GLOBAL_ASSIGNMENT_MODES = ("global", "optimal")
+
+Pair = Tuple[float, int, int]
+
+
+def assign_global_greedy(pairs: Iterable[Pair]) -> List[Pair]:
+    """Accept pairs best-first, skipping any whose products are already taken"""
+    # Ties resolve to the lowest (left, right) indices so results are stable
+    heap = [(-score, left, right) for score, left, right in pairs]
+    heapq.heapify(heap)
+
+    used_left = set()
+    used_right = set()
+    accepted = []
+    while heap:
+        neg_score, left, right = heapq.heappop(heap)
+        if left in used_left or right in used_right:
+            continue
+        used_left.add(left)
+        used_right.add(right)
+        accepted.append((-neg_score, left, right))
+    return accepted
+
+
+def assign_optimal(pairs: Iterable[Pair]) -> List[Pair]:
+    """Maximum total-similarity one-to-one matching over the sparse candidate graph"""
+    import numpy as np
+    from scipy import sparse
+    from scipy.optimize import linear_sum_assignment
+    from scipy.sparse.csgraph import connected_components
+
+    pairs = list(pairs)
+    if not pairs:
+        return []
+
+    # Compact the indices that actually appear in a candidate pair
+    lefts = sorted({left for _, left, _ in pairs})
+    rights = sorted({right for _, _, right in pairs})
+    left_pos = {left: i for i, left in enumerate(lefts)}
+    right_pos = {right: i for i, right in enumerate(rights)}
+
+    # Nodes 0..L-1 are left products, L..L+R-1 right products
+    offset = len(lefts)
+    rows = [left_pos[left] for _, left, _ in pairs]
+    cols = [offset + right_pos[right] for _, _, right in pairs]
+    graph = sparse.coo_matrix((np.ones(len(pairs)), (rows, cols)),
+                              shape=(offset + len(rights), offset + len(rights)))
+    _, labels = connected_components(graph, directed=False)
+
+    components = {}
+    for pair, row in zip(pairs, rows):
+        components.setdefault(labels[row], []).append(pair)
+
+    accepted = []
+    for component in components.values():
+        if len(component) == 1:
+            accepted.append(component[0])
+            continue
+
+        comp_lefts = sorted({left for _, left, _ in component})
+        comp_rights = sorted({right for _, _, right in component})
+        li = {left: i for i, left in enumerate(comp_lefts)}
+        ri = {right: i for i, right in enumerate(comp_rights)}
+
+        weights = np.zeros((len(comp_lefts), len(comp_rights)))
+        for score, left, right in component:
+            weights[li[left], ri[right]] = score
+
+        for i, j in zip(*linear_sum_assignment(weights, maximize=True)):
+            # Zero weight means the solver filled a slot with a non-candidate
+            if weights[i, j] > 0:
+                accepted.append((float(weights[i, j]), comp_lefts[i], comp_rights[j]))
+
+    accepted.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+    return accepted
+
+
+def assign_pairs(pairs: Iterable[Pair], mode: str) -> List[Pair]:
+    """Dispatch to the solver for a global assignment mode"""
+    if mode == "global":
+        return assign_global_greedy(pairs)
+    if mode == "optimal":
+        return assign_optimal(pairs)
+    raise ValueError(f"Unknown assignment mode: {mode}")
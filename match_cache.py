@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Persistent Cross-Week Match Cache
+
+Most weekly specials repeat, so pair scores from earlier weeks are kept in a
+SQLite database keyed by the two normalized product names. A run loads the
+scores for the names it is about to compare, only scores pairs it has never
+seen, and writes the new scores back with the week they were last seen.
+
+The cache is bounded: once it holds more than max_entries pairs, the pairs
+with the oldest last-seen week are evicted first.
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+DEFAULT_CACHE_PATH = "data/match_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 500000
+
+
+def current_week() -> str:
+    """ISO week label such as 2026-W11; sorts chronologically as text"""
+    return datetime.now().strftime("%G-W%V")
+
+
+class MatchCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, namespace: str = "legacy",
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        self._scores: Dict[Tuple[str, str], float] = {}
+        self._seen = set()
+        self._new: Dict[Tuple[str, str], Tuple[float, bool]] = {}
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pair_scores (
+                namespace TEXT NOT NULL,
+                left_name TEXT NOT NULL,
+                right_name TEXT NOT NULL,
+                score REAL NOT NULL,
+                accepted INTEGER NOT NULL,
+                last_seen TEXT NOT NULL,
+                PRIMARY KEY (namespace, left_name, right_name)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pair_scores_last_seen ON pair_scores (last_seen)")
+
+    def load(self, left_names: Iterable[str], right_names: Iterable[str]):
+        """Pull every cached score between the two name sets into memory"""
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS run_left (name TEXT PRIMARY KEY)")
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS run_right (name TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM run_left")
+        self.conn.execute("DELETE FROM run_right")
+        self.conn.executemany("INSERT OR IGNORE INTO run_left VALUES (?)", ((n,) for n in left_names))
+        self.conn.executemany("INSERT OR IGNORE INTO run_right VALUES (?)", ((n,) for n in right_names))
+
+        rows = self.conn.execute("""
+            SELECT p.left_name, p.right_name, p.score FROM pair_scores p
+            JOIN run_left l ON l.name = p.left_name
+            JOIN run_right r ON r.name = p.right_name
+            WHERE p.namespace = ?
+        """, (self.namespace,))
+        for left, right, score in rows:
+            self._scores[(left, right)] = score
+
+    def lookup(self, left: str, right: str) -> Optional[float]:
+        """Return the cached score for a pair, or None if it has never been scored"""
+        pair = (left, right)
+        score = self._scores.get(pair)
+        if score is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._seen.add(pair)
+        return score
+
+    def record(self, left: str, right: str, score: float, accepted: bool):
+        """Remember a freshly scored pair until the next save()"""
+        pair = (left, right)
+        self._scores[pair] = score
+        self._new[pair] = (score, accepted)
+
+    def save(self, week: Optional[str] = None):
+        """Write new pairs, refresh last-seen on hits and evict the oldest entries"""
+        week = week or current_week()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pair_scores VALUES (?, ?, ?, ?, ?, ?)",
+                ((self.namespace, left, right, score, int(accepted), week)
+                 for (left, right), (score, accepted) in self._new.items())
+            )
+            self.conn.executemany(
+                "UPDATE pair_scores SET last_seen = ? WHERE namespace = ? AND left_name = ? AND right_name = ?",
+                ((week, self.namespace, left, right) for left, right in self._seen)
+            )
+            self._evict()
+        self._new.clear()
+        self._seen.clear()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COUNT(*) FROM pair_scores").fetchone()[0]
+        excess = total - self.max_entries
+        if excess <= 0:
+            return
+        self.conn.execute("""
+            DELETE FROM pair_scores WHERE rowid IN (
+                SELECT rowid FROM pair_scores ORDER BY last_seen ASC LIMIT ?
+            )
+        """, (excess,))
+        self.evicted += excess
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        return (f"Match cache: {self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate():.1%} hit rate), {self.evicted} evicted")
+
+    def close(self):
+        self.conn.close()
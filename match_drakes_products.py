@@ -2,6 +2,8 @@ import json
 import re
 import sys
 
+from minhash_index import MinHashLSHIndex
+
 sys.stdout.reconfigure(encoding='utf-8')
 
 def normalize_product_name(name):
@@ -15,7 +17,10 @@ def normalize_product_name(name):
 
 def extract_keywords(name):
     """Extract meaningful keywords from product name"""
-    normalized = normalize_product_name(name)
+    return keywords_from_normalized(normalize_product_name(name))
+
+def keywords_from_normalized(normalized):
+    """Extract meaningful keywords from an already normalized product name"""
     words = [w for w in re.findall(r'\w+', normalized) if len(w) > 2]
     stop_words = {'and', 'the', 'with', 'for', 'per', 'from', 'assorted', 'selected', 'various', 'pack'}
     keywords = [w for w in words if w not in stop_words]
@@ -51,8 +56,38 @@ def extract_drakes_products(markdown_file):
 
     return products
 
-def find_best_match(json_product_name, drakes_products):
-    """Find the best matching Drakes product"""
+def keyword_score(json_keywords, drakes_keywords):
+    """Match score: common keywords weighted by their share of the longer keyword set"""
+    common = len(json_keywords & drakes_keywords)
+    if common == 0:
+        return 0
+    return common * (common / max(len(json_keywords), len(drakes_keywords)))
+
+def build_drakes_index(drakes_products):
+    """MinHash-LSH index over the Drakes keywords, built once per catalogue
+
+    One row per band, because a single shared keyword can already reach the
+    0.25 match threshold.
+    """
+    index = MinHashLSHIndex(extract_keywords, score=keyword_score, rows=1)
+    for drakes_name, drakes_price in drakes_products.items():
+        index.add(drakes_name, (drakes_name, drakes_price))
+    return index
+
+def find_best_match(json_product_name, drakes_products, index=None):
+    """Find the best matching Drakes product
+
+    Pass an index from build_drakes_index() to look up candidates instead
+    of scanning and re-tokenizing every Drakes product.
+    """
+    if index is not None:
+        found = index.query(json_product_name, 1)
+        if found and found[0][1] >= 0.25:
+            position, score = found[0]
+            drakes_name, drakes_price = index.items[position]
+            return (drakes_name, drakes_price, score)
+        return None
+
     json_keywords = extract_keywords(json_product_name)
 
     best_match = None
@@ -89,6 +124,7 @@ def update_price_comparison(json_file, drakes_file):
         price_data = json.load(f)
 
     drakes_products = extract_drakes_products(drakes_file)
+    drakes_index = build_drakes_index(drakes_products)
     print(f"Extracted {len(drakes_products)} products from drakes.md\n")
 
     matches_found = 0
@@ -104,7 +140,7 @@ def update_price_comparison(json_file, drakes_file):
                         total_products += 1
                         product_name = product.get('name', '')
 
-                        match = find_best_match(product_name, drakes_products)
+                        match = find_best_match(product_name, drakes_products, drakes_index)
 
                         if match:
                             drakes_name, drakes_price, score = match
@@ -135,8 +171,9 @@ def update_price_comparison(json_file, drakes_file):
     print(f"Match rate: {(matches_found/total_products*100):.1f}%")
     print(f"Updated {json_file}")
 
-# Run the update
-update_price_comparison(
-    'price_comparison_data.json',
-    'drakes.md'
-)
+if __name__ == "__main__":
+    # Run the update
+    update_price_comparison(
+        'price_comparison_data.json',
+        'drakes.md'
+    )
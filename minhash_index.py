@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+MinHash-LSH Candidate Index
+
+Top-k retrieval over keyword sets. Each entry's keywords get a MinHash
+signature once, when the index is built; the signature is cut into bands and
+every band is a bucket key. A query only looks at entries sharing at least
+one band bucket with it, then scores those candidates exactly with the
+matcher's own score function, so the cost of a lookup depends on the bucket
+sizes rather than on the size of the corpus.
+
+The chance that an entry with Jaccard similarity s becomes a candidate is
+1 - (1 - s**rows) ** bands. The defaults (64 hashes, 2 rows per band) find
+pairs at s=0.5 almost surely; matchers with lower score thresholds should
+use rows=1.
+
+Run directly to check recall and speed against an exhaustive scan:
+    python minhash_index.py data/*.json --queries data/woolworths_25032026.json
+"""
+
+import json
+import time
+import random
+import hashlib
+import argparse
+from typing import Any, Callable, FrozenSet, Iterable, List, Tuple
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_ROWS = 2
+
+_PRIME = (1 << 61) - 1
+
+
+def jaccard(tokens1: FrozenSet[str], tokens2: FrozenSet[str]) -> float:
+    if not tokens1 or not tokens2:
+        return 0.0
+    return len(tokens1 & tokens2) / len(tokens1 | tokens2)
+
+
+def token_hash(token: str) -> int:
+    """Stable 64-bit token hash (str hashes change between runs)"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class MinHashLSHIndex:
+    def __init__(self, tokenize: Callable[[str], Iterable[str]],
+                 score: Callable[[FrozenSet[str], FrozenSet[str]], float] = jaccard,
+                 num_perm: int = DEFAULT_NUM_PERM, rows: int = DEFAULT_ROWS, seed: int = 1):
+        if num_perm % rows:
+            raise ValueError("num_perm must be a multiple of rows")
+        self.tokenize = tokenize
+        self.score = score
+        self.rows = rows
+        self.bands = num_perm // rows
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._hashes = {}
+        self.tokens: List[FrozenSet[str]] = []
+        self.items: List[Any] = []
+        self.buckets: List[dict] = [{} for _ in range(self.bands)]
+
+    @classmethod
+    def from_keys(cls, keys, tokenize: Callable[[str], Iterable[str]], **options) -> 'MinHashLSHIndex':
+        """Index precomputed ProductKeys; positions match the key list"""
+        index = cls(tokenize, **options)
+        for key in keys:
+            index.add_tokens(key.tokens, key)
+        return index
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def signature(self, tokens: FrozenSet[str]) -> List[int]:
+        hashes = self._hashes
+        values = []
+        for token in tokens:
+            value = hashes.get(token)
+            if value is None:
+                value = hashes[token] = token_hash(token)
+            values.append(value)
+        return [min((a * value + b) % _PRIME for value in values) for a, b in self._perms]
+
+    def _band_keys(self, tokens: FrozenSet[str]) -> List[tuple]:
+        signature = self.signature(tokens)
+        rows = self.rows
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, name: str, item: Any = None) -> int:
+        """Index a name's keywords with an item (the name by default), returning its position"""
+        return self.add_tokens(self.tokenize(name), name if item is None else item)
+
+    def add_tokens(self, tokens: Iterable[str], item: Any = None) -> int:
+        """Index a keyword set, returning its position; empty sets are never returned"""
+        tokens = frozenset(tokens)
+        position = len(self.tokens)
+        self.tokens.append(tokens)
+        self.items.append(item)
+        if tokens:
+            for bucket, band_key in zip(self.buckets, self._band_keys(tokens)):
+                bucket.setdefault(band_key, []).append(position)
+        return position
+
+    def candidates(self, tokens: FrozenSet[str]) -> List[int]:
+        """Positions sharing at least one band bucket with the keywords"""
+        if not tokens:
+            return []
+        found = set()
+        for bucket, band_key in zip(self.buckets, self._band_keys(tokens)):
+            found.update(bucket.get(band_key, ()))
+        return sorted(found)
+
+    def query(self, name: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Best k (position, score) candidates for a name, highest score first"""
+        return self.query_tokens(self.tokenize(name), k)
+
+    def query_tokens(self, tokens: Iterable[str], k: int = 10) -> List[Tuple[int, float]]:
+        """Best k (position, score) candidates for a keyword set
+
+        Candidates scoring 0 are dropped; ties keep index order, so the top
+        result is the first best entry, like a linear scan with '>'.
+        """
+        tokens = frozenset(tokens)
+        scored = []
+        for position in self.candidates(tokens):
+            score = self.score(tokens, self.tokens[position])
+            if score > 0:
+                scored.append((position, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:k]
+
+    def exhaustive_query(self, name: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Score every entry; the reference result for recall checks"""
+        tokens = frozenset(self.tokenize(name))
+        scored = [(position, self.score(tokens, entry)) for position, entry in enumerate(self.tokens)]
+        scored = [item for item in scored if item[1] > 0]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:k]
+
+
+def main():
+    from update_html_categories import word_set
+
+    parser = argparse.ArgumentParser(description='Check MinHash-LSH recall and speed against an exhaustive scan')
+    parser.add_argument('corpus', nargs='+', help='Product JSON files to index')
+    parser.add_argument('--queries', required=True, help='Product JSON file whose names are looked up')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help=f'Rows per band (default: {DEFAULT_ROWS})')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Only count recall for best matches at or above this Jaccard score (default: 0.5)')
+    args = parser.parse_args()
+
+    corpus = []
+    for path in args.corpus:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            corpus.extend(p.get('productName', '') for p in data if isinstance(p, dict))
+    with open(args.queries, 'r', encoding='utf-8') as f:
+        queries = [p.get('productName', '') for p in json.load(f)]
+
+    start = time.perf_counter()
+    index = MinHashLSHIndex(word_set, rows=args.rows)
+    for name in corpus:
+        index.add(name)
+    print(f"Indexed {len(index)} names in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    expected = [index.exhaustive_query(name, 1) for name in queries]
+    exhaustive_time = time.perf_counter() - start
+    start = time.perf_counter()
+    found = [index.query(name, 1) for name in queries]
+    lsh_time = time.perf_counter() - start
+
+    relevant = [i for i, best in enumerate(expected) if best and best[0][1] >= args.threshold]
+    hits = sum(1 for i in relevant if found[i] and found[i][0][1] == expected[i][0][1])
+    recall = hits / len(relevant) if relevant else 1.0
+    print(f"Exhaustive: {exhaustive_time:.2f}s, LSH: {lsh_time:.2f}s for {len(queries)} queries")
+    print(f"Top-1 recall at Jaccard >= {args.threshold}: {recall:.1%} ({hits}/{len(relevant)})")
+
+
+if __name__ == "__main__":
+    main()
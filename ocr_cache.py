@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed OCR Cache
+
+OCR results are stored in a SQLite database under a hash of the page image
+pixels, the Tesseract config, the language and the Tesseract version, so
+rerunning an unchanged catalogue (or one that shares pages with a previous
+run) skips Tesseract for every page it has already seen, whatever the file
+is called.
+
+The cache is bounded by the size of the stored text: once it holds more
+than max_bytes, the least recently used results are evicted first.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+DEFAULT_OCR_CACHE_PATH = "data/ocr_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class OCRText(NamedTuple):
+    text: str
+    confidence: Optional[float]
+    word_confidences: List[float]
+
+
+def image_digest(image, preprocessing: str = '') -> str:
+    """Hash of a PIL image's mode, size and pixels, and the steps that turn it into the OCR image"""
+    prefix = f"{image.mode}:{image.size[0]}x{image.size[1]}:"
+    if preprocessing:
+        prefix += f"{preprocessing}:"
+    digest = hashlib.sha256(prefix.encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def pixmap_digest(pixmap, preprocessing: str = '') -> str:
+    """Hash of a PyMuPDF pixmap's pixels, and the steps that turn it into the OCR image"""
+    digest = hashlib.sha256(f"{pixmap.width}x{pixmap.height}x{pixmap.n}:{preprocessing}:".encode())
+    digest.update(getattr(pixmap, 'samples_mv', None) or pixmap.samples)
+    return digest.hexdigest()
+
+
+def result_key(digest: str, config: str, lang: str, engine: str, with_confidence: bool) -> str:
+    """Cache key for one OCR run; text rebuilt for confidences is kept apart from plain text"""
+    mode = 'data' if with_confidence else 'string'
+    return hashlib.sha256('\0'.join((digest, config, lang, engine, mode)).encode()).hexdigest()
+
+
+class OCRCache:
+    def __init__(self, path: str = DEFAULT_OCR_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_results (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                confidence REAL,
+                word_confidences TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_results_last_used ON ocr_results (last_used)")
+
+    def get(self, key: str) -> Optional[OCRText]:
+        """Return a stored result, or None if this image was never OCR'd with these settings"""
+        row = self.conn.execute(
+            "SELECT text, confidence, word_confidences FROM ocr_results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+        text, confidence, word_confidences = row
+        return OCRText(text, confidence, json.loads(word_confidences))
+
+    def put(self, key: str, result: OCRText):
+        """Store a result until the next save()"""
+        word_confidences = json.dumps(result.word_confidences)
+        size = len(result.text.encode('utf-8')) + len(word_confidences)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO ocr_results VALUES (?, ?, ?, ?, ?, ?)",
+            (key, result.text, result.confidence, word_confidences, size, time.time())
+        )
+
+    def save(self):
+        """Commit new results and recency updates, evicting the least recently used results"""
+        with self.conn:
+            self._evict()
+
+    def close(self):
+        self.save()
+        self.conn.close()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM ocr_results ORDER BY last_used ASC"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM ocr_results WHERE key = ?", doomed)
+        self.evicted += len(doomed)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+OCR Image Preprocessing
+
+One NumPy pipeline, shared by the OCR extractors, that a page image goes
+through before Tesseract sees it: grayscale, downscaling to the resolution
+Tesseract needs, a 3x3 median denoise, adaptive binarization and deskewing.
+Every step is a few passes over whole arrays rather than a chain of PIL
+filters, and the clean black-on-white page is also quicker for Tesseract
+to segment than an enhanced grayscale one.
+
+Catalogue sources differ (PDF renders, low-res flipbooks, scans), so the
+steps are chosen per source from PREPROCESS_PROFILES. The extractors
+default to 'gray': on deal posters rendered like low-res FlowPaper pages,
+Tesseract read fewer prices and more spurious ones from binarized pages
+than from grayscale ones, so binarization is opt-in until real catalogue
+pages show it helps.
+
+Run directly to time the pipeline, step by step, against the PIL chain
+pdf_catalog_extractor used:
+    python ocr_preprocess.py page1.png page2.png --profile catalogue --dpi 216
+"""
+
+import math
+import time
+import argparse
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter
+
+# Dark pixels sampled when estimating skew; plenty for a page of text lines
+SKEW_SAMPLE = 200000
+
+
+class PreprocessConfig(NamedTuple):
+    min_dpi: int = 300         # Downscale by whole factors while staying at or above this
+    denoise: bool = True       # 3x3 median filter
+    binarize: bool = True      # Adaptive threshold against the local mean
+    window: int = 31           # Side of the local mean window, in pixels
+    threshold: float = 0.15    # How far below the local mean a pixel turns black
+    deskew: bool = False       # Straighten text lines skewed by up to max_skew degrees
+    max_skew: float = 5.0
+    min_skew: float = 0.3      # Smaller skews are left alone
+
+    def tag(self) -> str:
+        """The settings as a string, for OCR cache keys"""
+        return 'np-' + ','.join(f'{name}={value}' for name, value in self._asdict().items())
+
+
+PREPROCESS_PROFILES: Dict[str, PreprocessConfig] = {
+    # PDF pages rendered by PyMuPDF at 3x (216 dpi): straight, mostly clean
+    'catalogue': PreprocessConfig(min_dpi=200),
+    # FlowPaper low-res flipbook PDFs rendered at 300 dpi: blocky, so a wider window
+    'flowpaper': PreprocessConfig(window=41),
+    # Scanned or photographed flyers: noisy and rarely straight
+    'scanned': PreprocessConfig(window=51, threshold=0.2, deskew=True),
+    # Grayscale only, leaving thresholding to Tesseract
+    'gray': PreprocessConfig(denoise=False, binarize=False),
+}
+
+
+def to_gray(pixels: np.ndarray) -> np.ndarray:
+    """HxW, HxWx1, HxWx3 or HxWx4 uint8 pixels to HxW luma, rounded as PIL's convert('L') does"""
+    if pixels.ndim == 2:
+        return pixels
+    if pixels.shape[2] == 1:
+        return pixels[..., 0]
+    r = pixels[..., 0].astype(np.uint32)
+    g = pixels[..., 1].astype(np.uint32)
+    b = pixels[..., 2].astype(np.uint32)
+    return ((r * 19595 + g * 38470 + b * 7471 + 0x8000) >> 16).astype(np.uint8)
+
+
+def downscale(gray: np.ndarray, dpi: float, min_dpi: int) -> Tuple[np.ndarray, float]:
+    """Average whole blocks of pixels while the result stays at or above min_dpi"""
+    factor = int(dpi // min_dpi)
+    if factor < 2:
+        return gray, dpi
+    height = gray.shape[0] // factor
+    width = gray.shape[1] // factor
+    blocks = gray[:height * factor, :width * factor].reshape(height, factor, width, factor)
+    area = factor * factor
+    sums = blocks.sum(axis=(1, 3), dtype=np.uint32)
+    return ((sums + area // 2) // area).astype(np.uint8), dpi / factor
+
+
+def _median_of_3(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    return np.maximum(np.minimum(a, b), np.minimum(np.maximum(a, b), c))
+
+
+def median3(gray: np.ndarray) -> np.ndarray:
+    """3x3 median filter, repeating the edge pixels
+
+    Each column of three is sorted once and shared by the three windows
+    over it; the median of a window is then the median of its columns'
+    largest low, middle median and smallest high.
+    """
+    padded = np.pad(gray, 1, mode='edge')
+    above, middle, below = padded[:-2], padded[1:-1], padded[2:]
+    low = np.minimum(np.minimum(above, middle), below)
+    high = np.maximum(np.maximum(above, middle), below)
+    mid = _median_of_3(above, middle, below)
+
+    def columns(values):
+        return values[:, :-2], values[:, 1:-1], values[:, 2:]
+
+    low_left, low_centre, low_right = columns(low)
+    high_left, high_centre, high_right = columns(high)
+    return _median_of_3(np.maximum(np.maximum(low_left, low_centre), low_right),
+                        _median_of_3(*columns(mid)),
+                        np.minimum(np.minimum(high_left, high_centre), high_right))
+
+
+def binarize(gray: np.ndarray, window: int, threshold: float) -> np.ndarray:
+    """Black where a pixel is threshold darker than the mean of the window around it, else white
+
+    Local means come from running sums, so the cost does not depend on
+    the window size; uneven backgrounds and coloured panels keep their
+    text where one global threshold would lose it.
+    """
+    height, width = gray.shape
+    radius = window // 2
+    size = 2 * radius + 1
+
+    # Running sums padded so every window is a plain slice: the start
+    # repeats the leading zero, the end repeats the total
+    column_sums = np.zeros((height + size, width), dtype=np.int32)
+    np.cumsum(gray, axis=0, dtype=np.int32, out=column_sums[radius + 1:radius + 1 + height])
+    column_sums[radius + 1 + height:] = column_sums[radius + height]
+    vertical = column_sums[size:] - column_sums[:height]
+
+    row_sums = np.zeros((height, width + size), dtype=np.int32)
+    np.cumsum(vertical, axis=1, dtype=np.int32, out=row_sums[:, radius + 1:radius + 1 + width])
+    row_sums[:, radius + 1 + width:] = row_sums[:, radius + width:radius + width + 1]
+    sums = row_sums[:, size:] - row_sums[:, :width]
+
+    def spans(length):
+        positions = np.arange(length)
+        return np.minimum(positions + radius + 1, length) - np.maximum(positions - radius, 0)
+
+    counts = spans(height)[:, None] * spans(width)[None, :]
+    black = gray * counts <= sums * (1.0 - threshold)
+    return np.where(black, 0, 255).astype(np.uint8)
+
+
+def estimate_skew(gray: np.ndarray, max_skew: float, step: float = 0.25) -> float:
+    """Angle in degrees (positive: lines run down to the right) that best lines up the dark pixels
+
+    Each candidate angle shears the dark pixels' rows; straight text lines
+    then fall into few rows, which maximises the sum of squared row counts.
+    """
+    ys, xs = np.nonzero(gray < 128)
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > SKEW_SAMPLE:
+        sample = np.linspace(0, len(ys) - 1, SKEW_SAMPLE).astype(np.int64)
+        ys, xs = ys[sample], xs[sample]
+
+    best_angle, best_score = 0.0, -1.0
+    # Ties go to the smallest correction
+    for angle in sorted(np.arange(-max_skew, max_skew + step / 2, step), key=abs):
+        rows = np.round(ys - xs * math.tan(math.radians(angle))).astype(np.int64)
+        counts = np.bincount(rows - rows.min()).astype(np.float64)
+        score = float(np.dot(counts, counts))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def deskew(gray: np.ndarray, angle: float) -> np.ndarray:
+    """Undo a skew found by estimate_skew(), shearing columns onto white; small angles need no rotation"""
+    height, width = gray.shape
+    shifts = np.round(np.arange(width) * math.tan(math.radians(angle))).astype(np.int64)
+    out_height = height + int(shifts.max() - shifts.min())
+    source_rows = np.arange(out_height)[:, None] + (shifts - shifts.max())[None, :]
+    inside = (source_rows >= 0) & (source_rows < height)
+    out = np.take_along_axis(gray, np.clip(source_rows, 0, height - 1), axis=0)
+    out[~inside] = 255
+    return out
+
+
+def preprocess(pixels: np.ndarray, config: PreprocessConfig, dpi: float = 300) -> np.ndarray:
+    """Run a page's pixels, rendered at dpi, through the steps config turns on"""
+    gray = to_gray(pixels)
+    gray, dpi = downscale(gray, dpi, config.min_dpi)
+    if config.denoise:
+        gray = median3(gray)
+    if config.binarize:
+        gray = binarize(gray, config.window, config.threshold)
+    if config.deskew:
+        angle = estimate_skew(gray, config.max_skew)
+        if abs(angle) >= config.min_skew:
+            gray = deskew(gray, angle)
+    return gray
+
+
+def preprocess_image(image: Image.Image, config: PreprocessConfig, dpi: float = 300) -> Image.Image:
+    """preprocess() for a PIL image"""
+    return Image.fromarray(preprocess(np.asarray(image), config, dpi))
+
+
+def legacy_enhance(image: Image.Image) -> Image.Image:
+    """The PIL chain pdf_catalog_extractor ran before OCR, for benchmarking"""
+    image = image.convert('L')
+    image = ImageEnhance.Contrast(image).enhance(1.5)
+    image = ImageEnhance.Sharpness(image).enhance(1.2)
+    return image.filter(ImageFilter.MedianFilter(size=3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OCR preprocessing in ms/page')
+    parser.add_argument('images', nargs='+', help='Rendered page images')
+    parser.add_argument('--profile', choices=sorted(PREPROCESS_PROFILES), default='catalogue',
+                        help='Preprocessing profile (default: catalogue)')
+    parser.add_argument('--dpi', type=float, default=216, help='Resolution the pages were rendered at (default: 216)')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the pages (default: 3)')
+    parser.add_argument('--save', help='Save the first preprocessed page to this path')
+    args = parser.parse_args()
+
+    config = PREPROCESS_PROFILES[args.profile]
+    pages = [np.asarray(Image.open(path).convert('RGB')) for path in args.images]
+    print(f"Loaded {len(pages)} pages, profile '{args.profile}': {config.tag()}")
+
+    steps = {'gray': 0.0, 'downscale': 0.0, 'denoise': 0.0, 'binarize': 0.0, 'deskew': 0.0}
+    for _ in range(args.repeat):
+        for pixels in pages:
+            start = time.perf_counter()
+            gray = to_gray(pixels)
+            steps['gray'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            gray, dpi = downscale(gray, args.dpi, config.min_dpi)
+            steps['downscale'] += time.perf_counter() - start
+
+            if config.denoise:
+                start = time.perf_counter()
+                gray = median3(gray)
+                steps['denoise'] += time.perf_counter() - start
+
+            if config.binarize:
+                start = time.perf_counter()
+                gray = binarize(gray, config.window, config.threshold)
+                steps['binarize'] += time.perf_counter() - start
+
+            if config.deskew:
+                start = time.perf_counter()
+                angle = estimate_skew(gray, config.max_skew)
+                if abs(angle) >= config.min_skew:
+                    gray = deskew(gray, angle)
+                steps['deskew'] += time.perf_counter() - start
+
+    runs = len(pages) * args.repeat
+    for step, elapsed in steps.items():
+        print(f"{step:10} {elapsed * 1000 / runs:8.1f} ms/page")
+    print(f"{'numpy':10} {sum(steps.values()) * 1000 / runs:8.1f} ms/page")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for pixels in pages:
+            legacy_enhance(Image.fromarray(pixels))
+    print(f"{'pil chain':10} {(time.perf_counter() - start) * 1000 / runs:8.1f} ms/page")
+
+    if args.save:
+        preprocess_image(Image.fromarray(pages[0]), config, args.dpi).save(args.save)
+        print(f"Saved preprocessed page to: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Parallel OCR Scheduler
+
+Spreads Tesseract runs over a process pool as (page, config) jobs, so the
+page segmentation modes tried for a page, and the pages themselves, run at
+the same time instead of one after another.
+
+The configs for a page are ranked in the order given. With a confidence
+target, a page's text comes from the first config whose mean word
+confidence reaches it, and the page's later configs are cancelled as soon
+as one does. Without a target, or when no config reaches it, every config
+runs and the longest text wins, as in the serial loops. The choice never
+depends on which job finishes first, so any number of workers gives the
+same text.
+
+Pages are yielded in page order as soon as they and every earlier page are
+done; only a few pages per worker are queued at a time, so pages can be
+rendered lazily. With an OCRCache, (page, config) jobs seen in an earlier
+run are answered from the cache, and a page given as a PageImage is only
+rendered if some config still needs Tesseract.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+import pytesseract
+
+from ocr_cache import OCRCache, OCRText, image_digest, result_key
+
+
+class PageOCR(NamedTuple):
+    page: int
+    text: str
+    config: str
+    confidence: Optional[float]
+    word_confidences: List[float] = []
+
+
+class PageImage(NamedTuple):
+    """A page image identified by a digest of its source, rendered only when it must be OCR'd"""
+    digest: str
+    render: Callable[[], Any]
+
+
+def ocr_image(image, config: str, lang: str = 'eng', with_confidence: bool = False) -> OCRText:
+    """OCR one image with one config, returning the text and its word confidences
+
+    Without with_confidence the text is exactly what image_to_string()
+    gives and there are no confidences. With it, Tesseract runs once for
+    word data and the text is rebuilt from the words: one line per text
+    line, a blank line between paragraphs.
+    """
+    if not with_confidence:
+        return OCRText(pytesseract.image_to_string(image, lang=lang, config=config), None, [])
+
+    data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    lines = []
+    confidences = []
+    previous_paragraph = previous_line = None
+    for block, paragraph, line, word, confidence in zip(data['block_num'], data['par_num'], data['line_num'],
+                                                        data['text'], data['conf']):
+        word = word.strip()
+        if not word:
+            continue
+        if (block, paragraph) != previous_paragraph:
+            if lines:
+                lines.append('')
+            previous_paragraph = (block, paragraph)
+        if (block, paragraph, line) != previous_line:
+            lines.append(word)
+            previous_line = (block, paragraph, line)
+        else:
+            lines[-1] += ' ' + word
+        if float(confidence) >= 0:
+            confidences.append(float(confidence))
+
+    text = '\n'.join(lines) + '\n' if lines else ''
+    return OCRText(text, sum(confidences) / len(confidences) if confidences else 0.0, confidences)
+
+
+def _ocr_job(image, config: str, lang: str, with_confidence: bool, tesseract_cmd: str) -> Optional[OCRText]:
+    """Process pool entry point; a failing config gives no result, like the serial loops"""
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    try:
+        return ocr_image(image, config, lang, with_confidence)
+    except Exception:
+        return None
+
+
+class OCRScheduler:
+    def __init__(self, configs: Sequence[str], lang: str = 'eng', workers: Optional[int] = None,
+                 confidence_target: Optional[float] = None, pages_ahead: Optional[int] = None,
+                 cache: Optional[OCRCache] = None):
+        """
+        Args:
+            configs: Tesseract configs to try per page, best first
+            lang: OCR language
+            workers: Worker processes (default: one per CPU); 1 runs in this process
+            confidence_target: Mean word confidence (0-100) that ends a page's search early
+            pages_ahead: Pages queued ahead of the next page to yield (default: 2 per worker)
+            cache: Results of earlier runs, looked up before running Tesseract
+        """
+        self.configs = list(configs)
+        self.lang = lang
+        self.workers = workers or os.cpu_count() or 1
+        self.confidence_target = confidence_target
+        self.pages_ahead = pages_ahead or 2 * self.workers
+        self.cache = cache
+        self._engine = None
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes (the next OCR call starts new ones) and close the cache"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    def _job_args(self, image, config: str) -> tuple:
+        # Workers may be spawned without the caller's tesseract_cmd setting
+        return (image, config, self.lang, self.confidence_target is not None,
+                pytesseract.pytesseract.tesseract_cmd)
+
+    def _clears_target(self, result: Optional[OCRText]) -> bool:
+        return (self.confidence_target is not None and result is not None
+                and result.confidence is not None and result.confidence >= self.confidence_target)
+
+    def _choose(self, page: int, results: List[Optional[OCRText]]) -> PageOCR:
+        """The first config clearing the target, else the longest text; None marks skipped configs"""
+        for config, result in zip(self.configs, results):
+            if self._clears_target(result):
+                return PageOCR(page, result.text, config, result.confidence, result.word_confidences)
+        best = PageOCR(page, '', '', None)
+        for config, result in zip(self.configs, results):
+            if result is not None and len(result.text.strip()) > len(best.text.strip()):
+                best = PageOCR(page, result.text, config, result.confidence, result.word_confidences)
+        return best
+
+    def _cache_keys(self, item) -> List[Optional[str]]:
+        """Cache key per config for a page image or PageImage, or Nones without a cache"""
+        if self.cache is None:
+            return [None] * len(self.configs)
+        if self._engine is None:
+            self._engine = str(pytesseract.get_tesseract_version())
+        digest = item.digest if isinstance(item, PageImage) else image_digest(item)
+        with_confidence = self.confidence_target is not None
+        return [result_key(digest, config, self.lang, self._engine, with_confidence) for config in self.configs]
+
+    def _cached(self, key: Optional[str]) -> Optional[OCRText]:
+        return self.cache.get(key) if key is not None else None
+
+    def _store(self, key: Optional[str], result: Optional[OCRText]):
+        if key is not None and result is not None:
+            self.cache.put(key, result)
+
+    def _ocr_serial(self, page: int, item) -> PageOCR:
+        image = None
+        results = []
+        for config, key in zip(self.configs, self._cache_keys(item)):
+            result = self._cached(key)
+            if result is None:
+                if image is None:
+                    image = item.render() if isinstance(item, PageImage) else item
+                result = _ocr_job(*self._job_args(image, config))
+                self._store(key, result)
+            results.append(result)
+            if self._clears_target(result):
+                break
+        return self._choose(page, results)
+
+    def _submit_page(self, item) -> list:
+        """Futures for a page's configs in rank order; cached results come back as done futures"""
+        image = None
+        futures = []
+        for config, key in zip(self.configs, self._cache_keys(item)):
+            result = self._cached(key)
+            if result is not None:
+                future = Future()
+                future.set_result(result)
+                futures.append(future)
+                if self._clears_target(result):
+                    break
+                continue
+            if image is None:
+                image = item.render() if isinstance(item, PageImage) else item
+            future = self._executor.submit(_ocr_job, *self._job_args(image, config))
+            future.cache_key = key
+            futures.append(future)
+        return futures
+
+    def _cancel_after_target(self, futures: list):
+        """Cancel the configs ranked below one that already cleared the target"""
+        for index, future in enumerate(futures):
+            if future.done() and not future.cancelled() and self._clears_target(future.result()):
+                for later in futures[index + 1:]:
+                    later.cancel()
+                return
+
+    def _settled(self, futures: list) -> bool:
+        """Whether every config that could still decide the page has finished"""
+        for future in futures:
+            if not future.done():
+                return False
+            if not future.cancelled() and self._clears_target(future.result()):
+                return True
+        return True
+
+    def ocr_pages(self, images: Iterable) -> Iterator[PageOCR]:
+        """OCR page images (or PageImages), yielding a PageOCR per image in input order"""
+        if self.workers <= 1:
+            try:
+                for page, image in enumerate(images):
+                    yield self._ocr_serial(page, image)
+            finally:
+                if self.cache is not None:
+                    self.cache.save()
+            return
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        images = iter(images)
+        pending = {}
+        next_page = submitted = 0
+        try:
+            while True:
+                while len(pending) < self.pages_ahead:
+                    image = next(images, None)
+                    if image is None:
+                        break
+                    pending[submitted] = self._submit_page(image)
+                    submitted += 1
+                if not pending:
+                    return
+
+                for futures in pending.values():
+                    self._cancel_after_target(futures)
+                if self._settled(pending[next_page]):
+                    futures = pending.pop(next_page)
+                    results = [future.result() if future.done() and not future.cancelled() else None
+                               for future in futures]
+                    for future, result in zip(futures, results):
+                        self._store(getattr(future, 'cache_key', None), result)
+                    yield self._choose(next_page, results)
+                    next_page += 1
+                    continue
+
+                running = [future for futures in pending.values() for future in futures if not future.done()]
+                wait(running, return_when=FIRST_COMPLETED)
+        finally:
+            for futures in pending.values():
+                for future in futures:
+                    future.cancel()
+            if self.cache is not None:
+                self.cache.save()
+
+    def ocr_page(self, image) -> PageOCR:
+        """OCR a single page, running its configs in parallel"""
+        return next(self.ocr_pages([image]))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Lazy PDF Page Images
+
+Renders PDF pages with PyMuPDF one at a time and hands Tesseract the
+pixmap's own sample buffer as a PIL image, instead of encoding every page
+to PNG and decoding it again. Only the page being worked on is held, so
+memory stays flat however many pages the catalogue has.
+"""
+
+from pathlib import Path
+from typing import Iterator, Union
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+# PIL modes for pixmaps by colour components; 'L' and 'RGBA' images can share the buffer
+PIXMAP_MODES = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+
+
+def pixmap_image(pix) -> Image.Image:
+    """A PIL image over a pixmap's samples, without a PNG round-trip
+
+    Grayscale pixmaps are wrapped without copying, and the image keeps a
+    reference to the pixmap so the buffer outlives the caller's variable.
+    RGB pixmaps are copied once, as PIL has no shared-memory RGB mode;
+    render in grayscale where the consumer converts to gray anyway.
+    """
+    mode = PIXMAP_MODES[pix.n]
+    samples = getattr(pix, 'samples_mv', None) or pix.samples
+    image = Image.frombuffer(mode, (pix.width, pix.height), samples, 'raw', mode, pix.stride, 1)
+    if image.readonly:
+        # PIL mapped the samples rather than copying them
+        image.pixmap = pix
+    return image
+
+
+def pixmap_array(pix) -> np.ndarray:
+    """A height x width x components view of a pixmap's samples, without copying"""
+    samples = getattr(pix, 'samples_mv', None) or pix.samples
+    rows = np.frombuffer(samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return rows[:, :pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+
+
+def open_pdf(pdf_path_or_bytes):
+    """Open a PDF from a path or from bytes"""
+    if isinstance(pdf_path_or_bytes, (str, Path)):
+        return fitz.open(pdf_path_or_bytes)
+    return fitz.open(stream=pdf_path_or_bytes, filetype="pdf")
+
+
+def iter_page_pixmaps(pdf_path_or_bytes: Union[str, Path, bytes], dpi: int = 300,
+                      grayscale: bool = False) -> Iterator["fitz.Pixmap"]:
+    """Render a PDF's pages to pixmaps one at a time
+
+    The document stays open until the iterator is exhausted or closed.
+    """
+    doc = open_pdf(pdf_path_or_bytes)
+    try:
+        matrix = fitz.Matrix(dpi / 72, dpi / 72)
+        colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+        for page_num in range(len(doc)):
+            yield doc.load_page(page_num).get_pixmap(matrix=matrix, colorspace=colorspace)
+    finally:
+        doc.close()
+
+
+def iter_page_images(pdf_path_or_bytes: Union[str, Path, bytes], dpi: int = 300,
+                     grayscale: bool = False) -> Iterator[Image.Image]:
+    """Render a PDF's pages one at a time
+
+    Each page's pixmap is released once the caller drops its image.
+    """
+    for pix in iter_page_pixmaps(pdf_path_or_bytes, dpi=dpi, grayscale=grayscale):
+        yield pixmap_image(pix)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Page-Parallel Catalogue Parsing
+
+Extracted catalogue text keeps its page markers ('--- Page N ---' from
+PDFCatalogExtractor, '=== PAGE N ===' in the Woolworths dumps). The parsers
+cut their input into shards at these markers, parse the shards in a process
+pool and merge the results back in page order.
+
+Product IDs are numbered after the merge, so they come out exactly as in a
+sequential run. Where a parser's state can run over a page break (a product
+block continuing on the next page, a look-ahead window), it moves each cut
+to the nearest point where the sequential parse starts afresh, or uses
+scan_shards(), which re-synchronises a line scanner at every cut.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+PAGE_MARKER = re.compile(r'^[ \t]*(?:--- Page \d+ ---|=== PAGE \d+ ===)[ \t]*$', re.MULTILINE)
+
+# Data every worker needs whole (such as the file's lines), sent once per worker
+_shared = None
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def page_cuts(items: Sequence[str]) -> List[int]:
+    """Positions of the lines or blocks containing a page marker, after the first item"""
+    return [index for index in range(1, len(items)) if PAGE_MARKER.search(items[index])]
+
+
+def split_at(items: Sequence, cuts: Sequence[int]) -> List[list]:
+    """Split a sequence at ascending positions, dropping empty shards"""
+    bounds = [0, *cuts, len(items)]
+    return [list(items[start:end]) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _share(shared):
+    global _shared
+    _shared = shared
+
+
+def _run_shard(task):
+    func, shard = task
+    return func(shard) if _shared is None else func(shard, _shared)
+
+
+def map_shards(func: Callable, shards: Sequence, workers: Optional[int] = None, shared: Any = None) -> List:
+    """Apply func to every shard in a process pool, returning the results in shard order
+
+    func must be a module-level function. With shared, it is called as
+    func(shard, shared). workers=None or 0 uses every CPU; with one worker or
+    one shard everything runs in this process.
+    """
+    workers = min(workers or default_workers(), len(shards))
+    if workers <= 1:
+        if shared is None:
+            return [func(shard) for shard in shards]
+        return [func(shard, shared) for shard in shards]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_share, initargs=(shared,)) as executor:
+        return list(executor.map(_run_shard, [(func, shard) for shard in shards]))
+
+
+def assign_ids(products: List[Dict], prefix: str, start: int = 1, width: int = 3) -> List[Dict]:
+    """Number merged products in order ('CL001', 'CL002', ...), keeping the key's position"""
+    for number, product in enumerate(products, start):
+        product['productID'] = f"{prefix}{number:0{width}d}"
+    return products
+
+
+StepFunction = Callable[[List[str], int], Tuple[int, Any]]
+
+
+def _scan(task: Tuple[StepFunction, int, int], lines: List[str]):
+    step, start, end = task
+    positions, found = [], []
+    i = start
+    while i < end:
+        positions.append(i)
+        i, item = step(lines, i)
+        if item is not None:
+            found.append((positions[-1], item))
+    return positions, found, i
+
+
+def scan_shards(step: StepFunction, lines: List[str], cuts: Sequence[int], workers: Optional[int] = None) -> List:
+    """Run a line scanner over shards in parallel, with exactly the sequential result
+
+    step(lines, i) returns (next position, item or None) and may only depend
+    on the lines and i. Each shard is scanned from its cut; when the scan of
+    the previous shard stops past the cut, the merge drops the shard's items
+    before the first position both scans visit, stepping in this process
+    until they meet.
+    """
+    bounds = [0, *cuts, len(lines)]
+    tasks = [(step, start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+    results = map_shards(_scan, tasks, workers, shared=lines)
+
+    items = []
+    i = 0
+    for (_, _, end), (positions, found, stop) in zip(tasks, results):
+        visited = set(positions)
+        while i < end and i not in visited:
+            i, item = step(lines, i)
+            if item is not None:
+                items.append(item)
+        if i < end:
+            items.extend(item for position, item in found if position >= i)
+            i = stop
+    return items
@@ -9,6 +9,12 @@ import json
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
+from brand_recognizer import recognize_brand
+from page_parallel import map_shards, page_cuts, split_at
+
+# Price lines closer than this to an extracted product's price line are skipped
+PROCESSED_RANGE = 15
+
 class WoolworthsProductExtractor:
     def __init__(self):
         self.products = []
@@ -53,23 +59,7 @@ class WoolworthsProductExtractor:
     
     def extract_brand(self, text: str) -> Optional[str]:
         """Extract brand name from text"""
-        known_brands = [
-            'Olay', 'Pantene', 'Nescafe', 'Mars', 'Pringles', 'Leggo\'s', 
-            'Maltesers', 'M&M\'s', 'Sorbent', 'Woolworths', 'Dove', 'Dettol',
-            'Colgate', 'Earth Choice', 'Air Wick', 'Chux', 'Vileda', 'Jackson',
-            'Decor', 'Primo', 'Heinz', 'Western Star', 'Danone', 'Yoplait',
-            'Peters', 'Cadbury', 'Moccona', 'Coca-Cola', 'Red Rock Deli',
-            'Blackmores', 'Millie Moon', 'Supercoat', 'Ramesses', 'Devant',
-            'Nice & Natural', 'The Spice Tailor', 'Green\'s', 'Bertolli',
-            'Allen\'s', 'Darrell Lea', 'McCain', 'Madura'
-        ]
-        
-        text_lower = text.lower()
-        for brand in known_brands:
-            if brand.lower() in text_lower:
-                return brand
-        
-        return None
+        return recognize_brand(text)
     
     def find_price_context(self, lines: List[str], price_line_idx: int, window_size: int = 10) -> Dict:
         """Find product information around a price line"""
@@ -232,16 +222,8 @@ class WoolworthsProductExtractor:
             'specialType': discount_type
         }
     
-    def parse_catalog(self, file_path: str) -> List[Dict]:
-        """Parse the catalog text file and extract products"""
-        print(f"Reading catalog file: {file_path}")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        print(f"Total lines: {len(lines)}")
-        
-        # Find all price occurrences
+    def find_price_lines(self, lines: List[str]) -> List[Tuple[int, str]]:
+        """(line index, price) for every price in a plausible product price range"""
         price_lines = []
         for i, line in enumerate(lines):
             matches = self.price_pattern.findall(line.strip())
@@ -251,28 +233,77 @@ class WoolworthsProductExtractor:
                 price_value = float(f"{match[0]}.{match[1]}")
                 if 0.50 <= price_value <= 200.0:  # Reasonable product price range
                     price_lines.append((i, price))
-        
-        print(f"Found {len(price_lines)} potential product prices")
-        
+        return price_lines
+    
+    def extract_products(self, lines: List[str], price_lines: List[Tuple[int, str]]) -> List[Dict]:
+        """Extract products around price lines, without productIDs"""
+        products = []
         processed_ranges = set()
         
         for line_idx, price in price_lines:
             # Skip if we've already processed this area
-            if any(abs(line_idx - r) < 15 for r in processed_ranges):
+            if any(abs(line_idx - r) < PROCESSED_RANGE for r in processed_ranges):
                 continue
             
             context = self.find_price_context(lines, line_idx)
             product_info = self.extract_product_info(context['context'], price)
             
             if product_info:
-                # Add product ID
-                product_info['productID'] = f"WW{self.current_product_id:03d}"
-                self.current_product_id += 1
-                
-                self.products.append(product_info)
+                products.append(product_info)
                 processed_ranges.add(line_idx)
-                
-                print(f"Extracted: {product_info['productName']} - {price}")
+        
+        return products
+    
+    def page_shards(self, lines: List[str], price_lines: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+        """Split the price lines by page for extract_products()
+        
+        A page's shard starts at its first price line, moved on to the first
+        one at least PROCESSED_RANGE lines after the previous price line, so
+        no shard is affected by areas processed in the shard before it.
+        """
+        cuts = []
+        k = 0
+        for marker in page_cuts(lines):
+            while k < len(price_lines) and price_lines[k][0] < marker:
+                k += 1
+            while 0 < k < len(price_lines) and price_lines[k][0] - price_lines[k - 1][0] < PROCESSED_RANGE:
+                k += 1
+            if 0 < k < len(price_lines) and (not cuts or k > cuts[-1]):
+                cuts.append(k)
+        return split_at(price_lines, cuts)
+    
+    def parse_catalog(self, file_path: str, workers: int = 1) -> List[Dict]:
+        """Parse the catalog text file and extract products
+        
+        With more than one worker, the pages are parsed in a process pool
+        with the same products and IDs as a sequential run.
+        """
+        print(f"Reading catalog file: {file_path}")
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        
+        print(f"Total lines: {len(lines)}")
+        
+        # Find all price occurrences
+        price_lines = self.find_price_lines(lines)
+        
+        print(f"Found {len(price_lines)} potential product prices")
+        
+        if workers == 1:
+            products = self.extract_products(lines, price_lines)
+        else:
+            shards = map_shards(_extract_shard, self.page_shards(lines, price_lines), workers, shared=lines)
+            products = [product for shard in shards for product in shard]
+        
+        for product_info in products:
+            # Add product ID
+            product_info['productID'] = f"WW{self.current_product_id:03d}"
+            self.current_product_id += 1
+            
+            self.products.append(product_info)
+            
+            print(f"Extracted: {product_info['productName']} - {product_info['price']}")
         
         print(f"Successfully extracted {len(self.products)} products")
         return self.products
@@ -288,6 +319,10 @@ class WoolworthsProductExtractor:
         
         print(f"Saved {len(self.products)} products to {output_path}")
 
+def _extract_shard(price_lines: List[Tuple[int, str]], lines: List[str]) -> List[Dict]:
+    """Process pool entry point for one page shard"""
+    return WoolworthsProductExtractor().extract_products(lines, price_lines)
+
 def main():
     # Initialize extractor
     extractor = WoolworthsProductExtractor()
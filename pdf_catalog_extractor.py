@@ -19,13 +19,123 @@ import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
 import re
+import time
 import pytesseract
+from collections import Counter
+from functools import partial
+
+from http_cache import add_cache_arguments, print_cache_summary, session_from_args
+from ocr_cache import OCRCache, pixmap_digest
+from ocr_scheduler import OCRScheduler, PageImage
+from ocr_preprocess import PREPROCESS_PROFILES, preprocess
+from page_images import pixmap_array
+
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+# A text layer is kept when it has at least 100 characters per A4 page
+# (scaled by page area) and nearly all of it is readable; otherwise the page
+# falls back to another extractor or OCR
+MIN_PAGE_CHARS = 100
+MIN_CHARS_PER_POINT = MIN_PAGE_CHARS / (595 * 842)
+MIN_READABLE_RATIO = 0.85
+READABLE_PUNCTUATION = set('$¢%.,:;!?&\'"()/-+*#@|')
+
+def text_readable(text):
+    """Whether nearly all of a text is readable; broken font encodings come out as symbols"""
+    stripped = text.strip()
+    if not stripped:
+        return False
+    readable = sum(1 for ch in stripped if ch.isalnum() or ch.isspace() or ch in READABLE_PUNCTUATION)
+    return readable / len(stripped) >= MIN_READABLE_RATIO
+
+def text_layer_ok(text, page_area):
+    """Whether a page's extracted text is dense and readable enough to use"""
+    if len(text.strip()) < max(MIN_PAGE_CHARS, page_area * MIN_CHARS_PER_POINT):
+        return False
+    return text_readable(text)
+
+# Images smaller than this on either side (in points) are icons and rules, not worth OCR
+MIN_OCR_REGION_POINTS = 24
+
+def text_span_rects(page):
+    """Bounding boxes of a PyMuPDF page's non-blank text spans"""
+    rects = []
+    for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                if span["text"].strip():
+                    rects.append(fitz.Rect(span["bbox"]))
+    return rects
+
+def ocr_regions(page, span_rects):
+    """Image areas of a page with no text span over them, top to bottom"""
+    regions = []
+    for info in page.get_image_info():
+        rect = fitz.Rect(info["bbox"]) & page.rect
+        if rect.width < MIN_OCR_REGION_POINTS or rect.height < MIN_OCR_REGION_POINTS:
+            continue
+        if rect in regions or any(rect.intersects(span) for span in span_rects):
+            continue
+        regions.append(rect)
+    return sorted(regions, key=lambda rect: (rect.y0, rect.x0))
+
+def merge_by_position(pieces):
+    """Join (rect, text) pieces of a page top to bottom, then left to right"""
+    pieces = sorted(pieces, key=lambda piece: (round(piece[0].y0), piece[0].x0))
+    return "".join(text if text.endswith("\n") else text + "\n" for _, text in pieces)
+
+# Pages are rendered at this zoom for OCR (72 dpi per 1x)
+OCR_ZOOM = 3.0
+
+# Common price patterns for Australian supermarkets, in one pattern so a
+# price is found once: the longest form at a position wins
+PRICE_PATTERN = re.compile(
+    r'(?P<multibuy>\d+\s*for\s*\$\d+\.?\d*)'  # 2 for $5
+    r'|(?P<each>\$\d+\.?\d*\s*ea(?:ch)?\b)'   # $2.50 ea, $2.50 each
+    r'|(?P<dollars>\$\d+\.?\d*)'              # $1.50, $5, $12.99
+    r'|(?P<cents>\d+\.?\d*\s*¢)',             # 99¢, 1.50¢
+    re.IGNORECASE
+)
+CATALOG_NOISE = re.compile(r'^(save|was|now|special|\d+)', re.IGNORECASE)
+
+# OCR configuration optimized for catalog layouts, best first
+OCR_CONFIGS = [
+    '--psm 6',   # Uniform block of text
+    '--psm 11',  # Sparse text, find as much text as possible
+    '--psm 12',  # Sparse text with OSD
+    '--psm 8',   # Single word
+    '--psm 13'   # Raw line, treat image as single text line
+]
+
 class PDFCatalogExtractor:
-    def __init__(self):
+    def __init__(self, ocr_workers=None, ocr_confidence=None, ocr_cache=True, preprocess='gray', session=None):
+        """
+        Args:
+            ocr_workers: OCR worker processes (default: one per CPU)
+            ocr_confidence: Mean word confidence (0-100) at which a page's OCR
+                stops trying further configs (default: try them all)
+            ocr_cache: Reuse OCR results of pages seen before (see ocr_cache.py)
+            preprocess: Profile in ocr_preprocess.PREPROCESS_PROFILES for page images
+            session: requests session to download through, e.g. a caching one (see http_cache.py)
+        """
+        self.session = session or requests.Session()
         self.text_content = ""
+        self.page_methods = []
+        self.preprocess = PREPROCESS_PROFILES[preprocess]
         self.ocr_available = self._check_ocr_availability()
+        cache = OCRCache() if ocr_cache and self.ocr_available else None
+        self.ocr_scheduler = OCRScheduler(OCR_CONFIGS, workers=ocr_workers, confidence_target=ocr_confidence,
+                                          cache=cache)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Stop the OCR worker processes and close the OCR cache"""
+        self.ocr_scheduler.close()
     
     def _check_ocr_availability(self):
         """Check if OCR is available and properly configured"""
@@ -55,7 +165,7 @@ class PDFCatalogExtractor:
     def download_pdf(self, url):
         """Download PDF from URL and return file-like object"""
         try:
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
+            response = self.session.get(url, headers={'User-Agent': 'Mozilla/5.0'})
             response.raise_for_status()
             return io.BytesIO(response.content)
         except requests.RequestException as e:
@@ -82,39 +192,59 @@ class PDFCatalogExtractor:
             with pdfplumber.open(pdf_file) as pdf:
                 for page_num, page in enumerate(pdf.pages):
                     text += f"\n--- Page {page_num + 1} ---\n"
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text
-                    
-                    # Extract tables if present
-                    tables = page.extract_tables()
-                    if tables:
-                        text += "\n[TABLES FOUND]\n"
-                        for table in tables:
-                            for row in table:
-                                text += " | ".join(str(cell) if cell else "" for cell in row) + "\n"
-                        text += "[END TABLES]\n"
+                    text += self._pdfplumber_page_text(page)
         except Exception as e:
             print(f"Error with pdfplumber extraction: {e}")
         return text
     
-    def extract_from_url(self, url):
+    def _pdfplumber_page_text(self, page):
+        """Text and tables of one pdfplumber page"""
+        text = ""
+        page_text = page.extract_text()
+        if page_text:
+            text += page_text
+        
+        # Extract tables if present
+        return text + self._tables_text(page.extract_tables())
+    
+    def _tables_text(self, tables):
+        """A [TABLES FOUND] section for tables given as lists of rows, or '' without any"""
+        if not tables:
+            return ""
+        text = "\n[TABLES FOUND]\n"
+        for table in tables:
+            for row in table:
+                text += " | ".join(str(cell) if cell else "" for cell in row) + "\n"
+        return text + "[END TABLES]\n"
+    
+    def _pymupdf_tables_text(self, page):
+        """The [TABLES FOUND] section for a PyMuPDF page, as pdfplumber pages get one"""
+        if not hasattr(page, "find_tables"):
+            # PyMuPDF before 1.23 has no table finder
+            return ""
+        try:
+            return self._tables_text([table.extract() for table in page.find_tables().tables])
+        except Exception as e:
+            print(f"Page {page.number + 1}: table detection failed - {e}")
+            return ""
+    
+    def extract_from_url(self, url, all_methods=False):
         """Extract text from PDF URL"""
         print(f"Downloading PDF from: {url}")
         pdf_file = self.download_pdf(url)
         if not pdf_file:
             return ""
         
-        return self.extract_from_file_object(pdf_file)
+        return self.extract_from_file_object(pdf_file, all_methods)
     
-    def extract_from_file(self, file_path):
+    def extract_from_file(self, file_path, all_methods=False):
         """Extract text from local PDF file"""
         if not Path(file_path).exists():
             print(f"File not found: {file_path}")
             return ""
         
         with open(file_path, 'rb') as file:
-            return self.extract_from_file_object(file)
+            return self.extract_from_file_object(file, all_methods)
     
     def extract_with_pymupdf(self, pdf_file):
         """Extract text using PyMuPDF with enhanced methods"""
@@ -175,52 +305,15 @@ class PDFCatalogExtractor:
                         try:
                             print(f"Page {page_num + 1}: Attempting OCR (insufficient or no text found)")
                             
-                            # Convert page to image with high resolution for better OCR
-                            mat = fitz.Matrix(3.0, 3.0)  # 3x zoom for better OCR quality
-                            pix = page.get_pixmap(matrix=mat)
-                            img_data = pix.tobytes("png")
-                            
-                            # Convert to PIL Image
-                            image = Image.open(io.BytesIO(img_data))
-                            
-                            # Enhance image for better OCR
-                            # Convert to grayscale
-                            image = image.convert('L')
-                            
-                            # Apply image enhancement techniques
-                            from PIL import ImageEnhance, ImageFilter
-                            
-                            # Increase contrast
-                            enhancer = ImageEnhance.Contrast(image)
-                            image = enhancer.enhance(1.5)
-                            
-                            # Increase sharpness
-                            enhancer = ImageEnhance.Sharpness(image)
-                            image = enhancer.enhance(1.2)
-                            
-                            # Apply slight blur to reduce noise
-                            image = image.filter(ImageFilter.MedianFilter(size=3))
-                            
-                            # OCR configuration optimized for catalog layouts
-                            ocr_configs = [
-                                '--psm 6',   # Uniform block of text
-                                '--psm 11',  # Sparse text, find as much text as possible
-                                '--psm 12',  # Sparse text with OSD
-                                '--psm 8',   # Single word
-                                '--psm 13'   # Raw line, treat image as single text line
-                            ]
-                            
-                            best_ocr_text = ""
-                            best_config = ""
-                            
-                            for config in ocr_configs:
-                                try:
-                                    ocr_text = pytesseract.image_to_string(image, config=config)
-                                    if len(ocr_text.strip()) > len(best_ocr_text.strip()):
-                                        best_ocr_text = ocr_text
-                                        best_config = config
-                                except Exception as config_error:
-                                    continue  # Try next config
+                            clips = self._plan_ocr(page, page_text)
+                            if clips != [None]:
+                                images = (self._render_for_ocr(page, clip) for clip in clips)
+                                best_ocr_text = "\n".join(result.text.strip() for result
+                                                          in self.ocr_scheduler.ocr_pages(images)
+                                                          if result.text.strip())
+                                best_config = "regions"
+                            else:
+                                best_ocr_text, best_config = self._ocr_page(page)
                             
                             if best_ocr_text.strip():
                                 print(f"Page {page_num + 1}: OCR successful with config '{best_config}' ({len(best_ocr_text)} chars)")
@@ -247,6 +340,59 @@ class PDFCatalogExtractor:
             
         return text
     
+    def _render_for_ocr(self, page, clip=None):
+        """Render a PyMuPDF page, or the clip rect of it, for OCR; it is only preprocessed if the OCR cache misses"""
+        # Convert page to image with high resolution for better OCR
+        mat = fitz.Matrix(OCR_ZOOM, OCR_ZOOM)
+        pix = page.get_pixmap(matrix=mat, clip=clip)
+        return PageImage(pixmap_digest(pix, self.preprocess.tag()), partial(self._enhance_for_ocr, pix))
+    
+    def _enhance_for_ocr(self, pix):
+        """Turn a rendered pixmap into the image Tesseract reads (see ocr_preprocess.py)"""
+        pixels = preprocess(pixmap_array(pix), self.preprocess, dpi=72 * OCR_ZOOM)
+        return Image.fromarray(pixels)
+    
+    def _ocr_page(self, page):
+        """OCR a PyMuPDF page with every config in parallel, returning the best text and its config"""
+        result = self.ocr_scheduler.ocr_page(self._render_for_ocr(page))
+        return result.text, result.config
+    
+    def _plan_ocr(self, page, page_text):
+        """The clip rects of a page to OCR, or [None] to OCR the whole page
+        
+        When the page's sparse text layer is readable, only the image
+        regions with no text over them are OCR'd; the text layer already
+        covers the rest. A page without text, with garbled text, or whose
+        images all sit under text is OCR'd whole.
+        """
+        if text_readable(page_text):
+            regions = ocr_regions(page, text_span_rects(page))
+            if regions:
+                page_area = page.rect.width * page.rect.height
+                ocr_area = sum(rect.width * rect.height for rect in regions)
+                print(f"Page {page.number + 1}: OCR of {len(regions)} image regions "
+                      f"({ocr_area / page_area:.0%} of the page)")
+                return regions
+        return [None]
+    
+    def _merge_ocr_regions(self, page, regions):
+        """A page's text blocks and the OCR text of its (rect, text) regions, in reading order"""
+        pieces = [(fitz.Rect(block[:4]), block[4]) for block in page.get_text("blocks")
+                  if block[6] == 0 and block[4].strip()]
+        pieces += [(rect, f"[OCR EXTRACTED TEXT]\n{text.strip()}\n[END OCR]\n") for rect, text in regions]
+        return merge_by_position(pieces)
+    
+    def _render_pages_for_ocr(self, pdf_document, jobs, rendered):
+        """Render (page number, clip) jobs lazily for the OCR scheduler, noting in rendered which ones succeeded"""
+        for page_num, clip in jobs:
+            try:
+                image = self._render_for_ocr(pdf_document.load_page(page_num), clip)
+            except Exception as render_error:
+                print(f"Page {page_num + 1}: OCR failed - {render_error}")
+                continue
+            rendered.append((page_num, clip))
+            yield image
+    
     def _extract_from_text_dict(self, text_dict):
         """Extract text from PyMuPDF text dictionary format"""
         text = ""
@@ -261,8 +407,111 @@ class PDFCatalogExtractor:
             print(f"Error extracting from text dict: {e}")
         return text
     
-    def extract_from_file_object(self, pdf_file):
-        """Extract text from file object using multiple methods"""
+    def extract_adaptive(self, pdf_file):
+        """Extract each page once, falling back per page only where the text layer fails
+        
+        The document is opened once with PyMuPDF. A page whose text layer
+        passes text_layer_ok() is used as is; a page with a poor text layer
+        is read again with pdfplumber, and the pages that still have no
+        usable text are OCR'd together by the OCR scheduler: whole, or only
+        their text-free image regions when the sparse text is readable (see
+        _plan_ocr()). The method used for every page is kept in
+        self.page_methods.
+        """
+        page_texts = []
+        table_texts = []
+        self.page_methods = []
+        ocr_jobs = []
+        plumber_pdf = None
+        
+        pdf_file.seek(0)
+        pdf_document = fitz.open(stream=pdf_file.read(), filetype="pdf")
+        try:
+            for page_num in range(len(pdf_document)):
+                page = pdf_document.load_page(page_num)
+                page_area = page.rect.width * page.rect.height
+                
+                page_text = page.get_text()
+                method = "pymupdf" if page_text.strip() else "none"
+                
+                # pdfplumber can read some fonts PyMuPDF garbles, but it reads
+                # the same text layer, so pages without one go straight to OCR
+                if page_text.strip() and not text_layer_ok(page_text, page_area):
+                    if plumber_pdf is None:
+                        pdf_file.seek(0)
+                        plumber_pdf = pdfplumber.open(pdf_file)
+                    try:
+                        plumber_text = self._pdfplumber_page_text(plumber_pdf.pages[page_num])
+                    except Exception as e:
+                        print(f"Page {page_num + 1}: pdfplumber failed - {e}")
+                        plumber_text = ""
+                    if text_layer_ok(plumber_text, page_area):
+                        page_text, method = plumber_text, "pdfplumber"
+                
+                if method != "pdfplumber" and not text_layer_ok(page_text, page_area) and self.ocr_available:
+                    ocr_jobs.extend((page_num, clip) for clip in self._plan_ocr(page, page_text))
+                
+                # pdfplumber text already carries its tables
+                table_texts.append(self._pymupdf_tables_text(page) if method == "pymupdf" else "")
+                page_texts.append(page_text)
+                self.page_methods.append(method)
+            
+            # OCR every page and region that needs it at once; results stream back in page order
+            rendered = []
+            region_texts = {}
+            images = self._render_pages_for_ocr(pdf_document, ocr_jobs, rendered)
+            for result in self.ocr_scheduler.ocr_pages(images):
+                page_num, clip = rendered[result.page]
+                if clip is not None:
+                    regions = region_texts.setdefault(page_num, [])
+                    if result.text.strip():
+                        regions.append((clip, result.text))
+                elif result.text.strip():
+                    page_texts[page_num] += f"\n[OCR EXTRACTED TEXT]\n{result.text}\n[END OCR]\n"
+                    self.page_methods[page_num] = "ocr"
+                    print(f"Page {page_num + 1}: OCR with config '{result.config}' ({len(result.text)} chars)")
+                else:
+                    print(f"Page {page_num + 1}: OCR produced no readable text")
+            
+            # Region OCR goes between the page's own text blocks by position
+            for page_num, regions in region_texts.items():
+                if not regions:
+                    print(f"Page {page_num + 1}: OCR produced no readable text")
+                    continue
+                page_texts[page_num] = self._merge_ocr_regions(pdf_document.load_page(page_num), regions)
+                self.page_methods[page_num] = "hybrid"
+                print(f"Page {page_num + 1}: OCR of {len(regions)} regions "
+                      f"({sum(len(text) for _, text in regions)} chars)")
+        finally:
+            if plumber_pdf is not None:
+                plumber_pdf.close()
+            pdf_document.close()
+        
+        text = ""
+        for page_num, (page_text, tables_text) in enumerate(zip(page_texts, table_texts)):
+            page_text += tables_text
+            print(f"Page {page_num + 1}: {self.page_methods[page_num]} ({len(page_text)} chars)")
+            text += f"\n--- Page {page_num + 1} ---\n" + page_text
+        return text
+    
+    def extract_from_file_object(self, pdf_file, all_methods=False):
+        """Extract text from file object, page by page with extract_adaptive()
+        
+        With all_methods, run pdfplumber, PyPDF2 and PyMuPDF over the whole
+        document and keep the longest result instead.
+        """
+        if not all_methods:
+            start = time.perf_counter()
+            try:
+                self.text_content = self.extract_adaptive(pdf_file)
+            except Exception as e:
+                print(f"Error with adaptive extraction: {e}, trying every method")
+                return self.extract_from_file_object(pdf_file, all_methods=True)
+            counts = Counter(self.page_methods)
+            print(f"Extracted {len(self.page_methods)} pages in {time.perf_counter() - start:.1f}s ("
+                  + ", ".join(f"{method}: {count}" for method, count in counts.most_common()) + ")")
+            return self.text_content
+        
         # Reset file pointer
         pdf_file.seek(0)
         
@@ -304,59 +553,42 @@ class PDFCatalogExtractor:
         return self.text_content
     
     def extract_product_info(self):
-        """Extract structured product information from the text"""
-        products = []
+        """Extract structured product information from the text
         
-        # Common price patterns for Australian supermarkets
-        price_patterns = [
-            r'\$\d+\.?\d*',  # $1.50, $5, $12.99
-            r'\d+\.?\d*\s*¢',  # 99¢, 1.50¢
-            r'\d+\s*for\s*\$\d+\.?\d*',  # 2 for $5
-            r'\$\d+\.?\d*\s*ea',  # $2.50 ea
-            r'\$\d+\.?\d*\s*each',  # $2.50 each
-        ]
-        
-        # Split text into lines and process
-        lines = self.text_content.split('\n')
+        One pass over the lines: the page marker in effect is tracked as
+        lines go by, and one combined pattern finds each price once, with
+        its type, so the time is linear in the length of the text.
+        """
+        products = []
+        page_context = "Unknown page"
         
-        for i, line in enumerate(lines):
+        for line in self.text_content.split('\n'):
+            if line.startswith('--- Page'):
+                page_context = line.strip()
             line = line.strip()
             if not line or line.startswith('---'):
                 continue
+            
+            for match in PRICE_PATTERN.finditer(line):
+                # Extract product name (text before the price)
+                product_name = line[:match.start()].strip()
                 
-            # Look for price patterns
-            for pattern in price_patterns:
-                matches = re.finditer(pattern, line, re.IGNORECASE)
-                for match in matches:
-                    price_text = match.group()
-                    
-                    # Extract product name (text before the price)
-                    price_start = match.start()
-                    product_name = line[:price_start].strip()
+                # Clean up product name
+                if product_name and len(product_name) > 3:
+                    # Remove common catalog noise
+                    product_name = CATALOG_NOISE.sub('', product_name).strip()
                     
-                    # Clean up product name
-                    if product_name and len(product_name) > 3:
-                        # Remove common catalog noise
-                        product_name = re.sub(r'^(save|was|now|special|\d+)', '', product_name, flags=re.IGNORECASE).strip()
-                        
-                        if product_name:
-                            products.append({
-                                'name': product_name,
-                                'price': price_text,
-                                'line': line,
-                                'page_context': self._get_page_context(i, lines)
-                            })
+                    if product_name:
+                        products.append({
+                            'name': product_name,
+                            'price': match.group(),
+                            'price_type': match.lastgroup,
+                            'line': line,
+                            'page_context': page_context
+                        })
         
         return products
     
-    def _get_page_context(self, line_index, lines):
-        """Get the page number context for a line"""
-        # Look backwards to find the most recent page marker
-        for i in range(line_index, -1, -1):
-            if lines[i].startswith('--- Page'):
-                return lines[i].strip()
-        return "Unknown page"
-    
     def save_to_file(self, output_path):
         """Save extracted text to file"""
         try:
@@ -377,7 +609,7 @@ class PDFCatalogExtractor:
                 
                 for i, product in enumerate(products, 1):
                     f.write(f"{i}. {product['name']}\n")
-                    f.write(f"   Price: {product['price']}\n")
+                    f.write(f"   Price: {product['price']} ({product['price_type']})\n")
                     f.write(f"   Context: {product['page_context']}\n")
                     f.write(f"   Full line: {product['line']}\n")
                     f.write("-" * 50 + "\n")
@@ -401,6 +633,12 @@ class PDFCatalogExtractor:
         print(f"- Total characters: {chars}")
         print(f"- Total words: {len(words)}")
         print(f"- Total lines: {len(lines)}")
+        if self.page_methods:
+            print("- Pages by method: " + ", ".join(
+                f"{method} {count}" for method, count in Counter(self.page_methods).most_common()))
+        cache = self.ocr_scheduler.cache
+        if cache is not None and cache.hits + cache.misses:
+            print(f"- OCR cache: {cache.hits} hits, {cache.misses} misses, {cache.evicted} evicted")
 
 def main():
     parser = argparse.ArgumentParser(description='Extract text from supermarket catalog PDFs')
@@ -408,56 +646,73 @@ def main():
     parser.add_argument('-o', '--output', help='Output text file path')
     parser.add_argument('-p', '--preview', action='store_true', help='Show first 500 characters of extracted text')
     parser.add_argument('-s', '--structured', action='store_true', help='Extract structured product information')
+    parser.add_argument('--workers', type=int, help='OCR worker processes (default: one per CPU)')
+    parser.add_argument('--ocr-confidence', type=float,
+                        help='Stop trying OCR configs for a page once one reaches this mean word '
+                             'confidence, 0-100 (default: try every config and keep the longest text)')
+    parser.add_argument('--preprocess', choices=sorted(PREPROCESS_PROFILES), default='gray',
+                        help='OCR image preprocessing profile (default: gray, see ocr_preprocess.py)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Run OCR on every page even if it was OCR\'d before (see ocr_cache.py)')
+    parser.add_argument('--all-methods', action='store_true',
+                        help='Run every extractor over the whole PDF and keep the longest text '
+                             '(slower; the default extracts each page once with the method it needs)')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
     
-    extractor = PDFCatalogExtractor()
+    extractor = PDFCatalogExtractor(args.workers, args.ocr_confidence, not args.no_cache, args.preprocess,
+                                    session=session_from_args(args))
     
-    # Determine if input is URL or file path
-    if args.input.startswith(('http://', 'https://')):
-        text = extractor.extract_from_url(args.input)
-    else:
-        text = extractor.extract_from_file(args.input)
-    
-    if not text.strip():
-        print("No text extracted from PDF")
-        return
-    
-    # Show preview if requested
-    if args.preview:
-        print("\nPreview (first 500 characters):")
-        print("-" * 50)
-        print(text[:500])
-        if len(text) > 500:
-            print("...")
-        print("-" * 50)
-    
-    # Determine base filename
-    if args.input.startswith(('http://', 'https://')):
-        base_name = "catalog"
-    else:
-        base_name = Path(args.input).stem
+    try:
+        # Determine if input is URL or file path
+        if args.input.startswith(('http://', 'https://')):
+            text = extractor.extract_from_url(args.input, args.all_methods)
+            print_cache_summary(extractor.session)
+        else:
+            text = extractor.extract_from_file(args.input, args.all_methods)
     
-    # Save raw text
-    if args.output:
-        extractor.save_to_file(args.output)
-    else:
-        extractor.save_to_file(f"{base_name}_extracted.txt")
+        if not text.strip():
+            print("No text extracted from PDF")
+            return
+    
+        # Show preview if requested
+        if args.preview:
+            print("\nPreview (first 500 characters):")
+            print("-" * 50)
+            print(text[:500])
+            if len(text) > 500:
+                print("...")
+            print("-" * 50)
+    
+        # Determine base filename
+        if args.input.startswith(('http://', 'https://')):
+            base_name = "catalog"
+        else:
+            base_name = Path(args.input).stem
     
-    # Extract and save structured product information
-    if args.structured:
-        products = extractor.save_products_to_file(f"{base_name}_products.txt")
-        print(f"\nFound {len(products)} products")
+        # Save raw text
+        if args.output:
+            extractor.save_to_file(args.output)
+        else:
+            extractor.save_to_file(f"{base_name}_extracted.txt")
+    
+        # Extract and save structured product information
+        if args.structured:
+            products = extractor.save_products_to_file(f"{base_name}_products.txt")
+            print(f"\nFound {len(products)} products")
         
-        # Show a few examples
-        if products:
-            print("\nSample products found:")
-            for i, product in enumerate(products[:5]):
-                print(f"  {i+1}. {product['name']} - {product['price']}")
-            if len(products) > 5:
-                print(f"  ... and {len(products) - 5} more")
-    
-    extractor.print_summary()
+            # Show a few examples
+            if products:
+                print("\nSample products found:")
+                for i, product in enumerate(products[:5]):
+                    print(f"  {i+1}. {product['name']} - {product['price']}")
+                if len(products) > 5:
+                    print(f"  ... and {len(products) - 5} more")
+    
+        extractor.print_summary()
+    finally:
+        extractor.close()
 
 if __name__ == "__main__":
     # Check if running with arguments
@@ -468,19 +723,19 @@ if __name__ == "__main__":
         print("Demo mode: Extracting from Woolworths catalog URL")
         url = "https://d3vvi2v9oj75wh.cloudfront.net/uploads/pdf/WW_QLD_230725_W9L66PJK3.pdf"
         
-        extractor = PDFCatalogExtractor()
-        text = extractor.extract_from_url(url)
+        with PDFCatalogExtractor() as extractor:
+            text = extractor.extract_from_url(url)
         
-        if text.strip():
-            print("\nPreview (first 1000 characters):")
-            print("-" * 50)
-            print(text[:1000])
-            if len(text) > 1000:
-                print("...")
-            print("-" * 50)
+            if text.strip():
+                print("\nPreview (first 1000 characters):")
+                print("-" * 50)
+                print(text[:1000])
+                if len(text) > 1000:
+                    print("...")
+                print("-" * 50)
             
-            # Save to default file
-            extractor.save_to_file("woolworths_catalog_extracted.txt")
-            extractor.print_summary()
-        else:
-            print("Failed to extract text from the PDF")
\ No newline at end of file
+                # Save to default file
+                extractor.save_to_file("woolworths_catalog_extracted.txt")
+                extractor.print_summary()
+            else:
+                print("Failed to extract text from the PDF")
\ No newline at end of file
@@ -9,6 +9,9 @@ import re
 from typing import Dict, List, Tuple
 from pathlib import Path
 
+from product_categorizer import RuleCategorizer, keyword_rules
+from product_key import ProductKey, make_product_key
+
 class PriceMatcher:
     def __init__(self):
         self.coles_file = "data/colse_05112025.json"
@@ -52,6 +55,7 @@ class PriceMatcher:
             "Instant Coffee": ["coffee", "nescafe", "moccona"],
             "Rice 5kg Bags": ["rice", "jasmine", "basmati", "5kg"]
         }
+        self.keyword_categorizer = RuleCategorizer(keyword_rules(self.product_keywords), default="Other")
 
     def load_json_data(self, file_path: str) -> List[Dict]:
         """Load JSON data from file."""
@@ -91,14 +95,7 @@ class PriceMatcher:
             return self.category_mapping[json_category]
 
         # Then try keyword matching on product name
-        product_name = product.get('productName', '').lower()
-
-        for html_category, keywords in self.product_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in product_name:
-                    return html_category
-
-        return "Other"
+        return self.keyword_categorizer.categorize(product.get('productName', ''))
 
     def extract_products_by_category(self) -> Dict[str, List[Dict]]:
         """Extract and categorize products from both stores."""
@@ -184,6 +181,18 @@ class PriceMatcher:
 
         return categorized_products
 
+    def make_key(self, name: str, price: float = 0.0) -> ProductKey:
+        """Build the ProductKey (lowercase word set) used for matching."""
+        return make_product_key(name, price, normalize=str.lower, tokenize=str.split)
+
+    def build_token_index(self, keys: List[ProductKey]) -> Dict[str, List[int]]:
+        """Build an inverted index from token to the positions of products containing it."""
+        index = {}
+        for position, key in enumerate(keys):
+            for token in key.tokens:
+                index.setdefault(token, []).append(position)
+        return index
+
     def find_price_comparisons(self, categorized_products: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
         """Find comparable products between stores."""
         comparisons = {}
@@ -195,19 +204,31 @@ class PriceMatcher:
             coles_products = [p for p in products if p['store'] == 'Coles']
             woolworths_products = [p for p in products if p['store'] == 'Woolworths']
 
+            # Tokenize each name once and index Woolworths tokens so that only
+            # products sharing at least one word are ever scored. A pair with no
+            # shared word has zero similarity and can never pass the threshold.
+            woolworths_keys = [self.make_key(p['name'], p['pricing']['current_price']) for p in woolworths_products]
+            token_index = self.build_token_index(woolworths_keys)
+
             category_comparisons = []
 
             # Find similar products
             for coles_product in coles_products:
-                for woolworths_product in woolworths_products:
-                    similarity_score = self.calculate_similarity(
-                        coles_product['name'],
-                        woolworths_product['name']
-                    )
+                coles_key = self.make_key(coles_product['name'], coles_product['pricing']['current_price'])
+
+                candidates = set()
+                for token in coles_key.tokens:
+                    candidates.update(token_index.get(token, ()))
+
+                # Visit candidates in Woolworths order to keep the output identical
+                # to the exhaustive all-pairs scan
+                for index in sorted(candidates):
+                    woolworths_product = woolworths_products[index]
+                    similarity_score = self.token_similarity(coles_key.tokens, woolworths_keys[index].tokens)
 
                     if similarity_score > 0.5:  # 50% similarity threshold
-                        coles_price = coles_product['pricing']['current_price']
-                        woolworths_price = woolworths_product['pricing']['current_price']
+                        coles_price = coles_key.price
+                        woolworths_price = woolworths_keys[index].price
 
                         comparison = {
                             'coles': coles_product,
@@ -225,11 +246,8 @@ class PriceMatcher:
 
         return comparisons
 
-    def calculate_similarity(self, name1: str, name2: str) -> float:
-        """Calculate similarity between two product names."""
-        name1_words = set(name1.lower().split())
-        name2_words = set(name2.lower().split())
-
+    def token_similarity(self, name1_words: frozenset, name2_words: frozenset) -> float:
+        """Jaccard similarity between two pre-tokenized product names."""
         # Common words
         common_words = name1_words.intersection(name2_words)
         total_words = name1_words.union(name2_words)
@@ -239,6 +257,10 @@ class PriceMatcher:
 
         return len(common_words) / len(total_words)
 
+    def calculate_similarity(self, name1: str, name2: str) -> float:
+        """Calculate similarity between two product names."""
+        return self.token_similarity(self.make_key(name1).tokens, self.make_key(name2).tokens)
+
     def generate_report(self, categorized_products: Dict[str, List[Dict]],
                        comparisons: Dict[str, List[Dict]]) -> str:
         """Generate a comprehensive price comparison report."""
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Compiled Product Categorizer
+
+Compiles an ordered {category: [patterns]} rule table into one regular
+expression and classifies a name in a single pass, instead of running
+re.search once per pattern.
+
+Each category becomes a named group inside a zero-width lookahead, with the
+groups in rule order:
+
+    (?=(?P<c0>pat|pat...)|(?P<c1>pat|...)|...)
+
+At every position the regex engine reports the first category whose pattern
+matches there, so the highest-priority category over all positions is
+exactly what the pattern-by-pattern loop would have returned.
+
+Rules are regexes (as in categorize_products.CATEGORY_RULES) or plain
+substrings via keyword_rules(). Plain keyword tables can use
+RuleCategorizer.from_keywords() instead, which groups the keywords by first
+character so the regex engine only stops where some keyword can start.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+
+def keyword_rules(rules: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """Turn {category: [substrings]} into regex rules with the same meaning"""
+    return {category: [re.escape(keyword.lower()) for keyword in keywords]
+            for category, keywords in rules.items()}
+
+
+class RuleCategorizer:
+    def __init__(self, rules: Dict[str, Iterable[str]], default: str = 'General'):
+        self.default = default
+        self.categories = list(rules)
+        alternatives = []
+        for index, patterns in enumerate(rules.values()):
+            patterns = list(patterns)
+            if patterns:
+                alternatives.append(f"(?P<c{index}>{'|'.join(patterns)})")
+        self.pattern = re.compile(f"(?=(?:{'|'.join(alternatives)}))") if alternatives else None
+
+    @classmethod
+    def from_keywords(cls, rules: Dict[str, Iterable[str]], default: str = 'General') -> 'RuleCategorizer':
+        """Categorizer for {category: [substrings]} with the same results as keyword_rules()
+
+        Each branch starts with a keyword's first character, so positions
+        where no keyword starts are skipped without trying any pattern:
+
+            b(?=(?P<c0_98>eef)|(?P<c3_98>iscuit))|c(?=...)|...
+
+        Keywords must not be empty.
+        """
+        categorizer = cls({}, default)
+        categorizer.categories = list(rules)
+        by_first = {}
+        for index, keywords in enumerate(rules.values()):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                by_first.setdefault(keyword[0], {}).setdefault(index, []).append(re.escape(keyword[1:]))
+        branches = []
+        for first, categories in by_first.items():
+            groups = '|'.join(f"(?P<c{index}_{ord(first)}>{'|'.join(rests)})"
+                              for index, rests in sorted(categories.items()))
+            branches.append(f"{re.escape(first)}(?=(?:{groups}))")
+        categorizer.pattern = re.compile('|'.join(branches)) if branches else None
+        return categorizer
+
+    def category_index(self, text: str) -> int:
+        """Rule position of the best matching category, or -1 for none"""
+        if self.pattern is None:
+            return -1
+        best = -1
+        for match in self.pattern.finditer(text):
+            index = int(match.lastgroup[1:].partition('_')[0])
+            if best == -1 or index < best:
+                best = index
+                if best == 0:
+                    break
+        return best
+
+    def categorize(self, product_name: str) -> str:
+        """Category for one name; names are lowercased like the original rule loops"""
+        index = self.category_index(product_name.lower())
+        return self.categories[index] if index >= 0 else self.default
+
+    def categorize_many(self, product_names: Iterable[str]) -> List[str]:
+        """Categorize a list of names, classifying each distinct name once"""
+        seen = {}
+        results = []
+        for name in product_names:
+            category = seen.get(name)
+            if category is None:
+                category = seen[name] = self.categorize(name)
+            results.append(category)
+        return results
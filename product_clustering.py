@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+N-Way Product Clustering
+
+Groups the same product across every store's weekly records in one pass,
+instead of running a separate pairwise matching script per store pair.
+
+All records are keyed once (see product_key), then blocked with a single
+inverted index over their keywords. Only records from different stores that
+share a block, and whose brands and pack sizes could be the same product
+(see product_key.keys_comparable), are scored. Candidate edges are merged best-first with a
+union-find that allows at most one record per store in each group, so every
+group is one product with one price per store. The cheapest store is the
+one with the lowest unit price when every member's size is in the same
+unit, otherwise the lowest shelf price.
+
+Adding another store adds its records to the same index, which is linear
+extra work rather than another quadratic matching script.
+"""
+
+import re
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from brand_recognizer import recognize_brand
+from match_drakes_products import extract_drakes_products, keywords_from_normalized, normalize_product_name
+from product_key import ProductKey, keys_comparable, make_product_key
+from size_parser import format_unit_price
+
+DEFAULT_THRESHOLD = 0.5
+# Keywords shared by more records than this ("chicken", "chocolate") make
+# blocks too large to be useful and are left out of blocking, not scoring
+DEFAULT_MAX_BLOCK_SIZE = 300
+
+
+def load_json_records(path: str) -> List[Tuple[str, str]]:
+    """(name, price) records from a weekly Coles/Woolworths JSON export"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(p.get('productName', ''), p.get('price', '')) for p in json.load(f)]
+
+
+def load_drakes_records(path: str) -> List[Tuple[str, str]]:
+    """(name, price) records from a Drakes markdown catalogue"""
+    return [(name, price) for name, price in extract_drakes_products(path).items()]
+
+
+def load_aldi_records(path: str) -> List[Tuple[str, str]]:
+    """(name, price) records from an ALDI markdown catalogue"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = re.match(r'- \*\*(.+?)\*\*(?: - (.+?))? - \$(\d+\.\d+)', line)
+            if match:
+                brand = match.group(2) or ''
+                name = f"{brand} {match.group(1)}".strip()
+                records.append((name, match.group(3)))
+    return records
+
+
+STORE_LOADERS = {
+    'coles': load_json_records,
+    'woolworths': load_json_records,
+    'drakes': load_drakes_records,
+    'aldi': load_aldi_records,
+}
+
+
+class StoreRecord:
+    __slots__ = ('store', 'key')
+
+    def __init__(self, store: str, key: ProductKey):
+        self.store = store
+        self.key = key
+
+
+def make_record(store: str, name: str, price) -> StoreRecord:
+    """Key a record with the Drakes matcher's size-stripping normalization
+
+    The size is still parsed from the full name, for blocking and unit prices.
+    """
+    return StoreRecord(store, make_product_key(name, price, normalize=normalize_product_name,
+                                               tokenize=keywords_from_normalized, brand_of=recognize_brand))
+
+
+class ProductClusterer:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD,
+                 max_block_size: int = DEFAULT_MAX_BLOCK_SIZE):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.records: List[StoreRecord] = []
+
+    def add_store(self, store: str, records: List[Tuple[str, str]]):
+        """Add one store's (name, price) records"""
+        for name, price in records:
+            if name:
+                self.records.append(make_record(store, name, price))
+
+    def build_blocks(self) -> Dict[str, List[int]]:
+        """Inverted index from keyword to the records containing it"""
+        blocks = {}
+        for position, record in enumerate(self.records):
+            for token in record.key.tokens:
+                blocks.setdefault(token, []).append(position)
+        return {token: members for token, members in blocks.items()
+                if len(members) <= self.max_block_size}
+
+    def candidate_edges(self) -> List[Tuple[float, int, int]]:
+        """Score each comparable cross-store pair that shares a block exactly once"""
+        records = self.records
+        scored = set()
+        edges = []
+        for members in self.build_blocks().values():
+            for i, left in enumerate(members):
+                left_record = records[left]
+                for right in members[i + 1:]:
+                    right_record = records[right]
+                    if left_record.store == right_record.store or (left, right) in scored:
+                        continue
+                    scored.add((left, right))
+                    if not keys_comparable(left_record.key, right_record.key):
+                        continue
+
+                    left_tokens, right_tokens = left_record.key.tokens, right_record.key.tokens
+                    score = len(left_tokens & right_tokens) / len(left_tokens | right_tokens)
+                    if score >= self.threshold:
+                        edges.append((score, left, right))
+        return edges
+
+    def cluster(self) -> List[List[int]]:
+        """Merge candidate edges best-first, keeping one record per store in each group"""
+        parent = list(range(len(self.records)))
+        stores = [{record.store} for record in self.records]
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for score, left, right in sorted(self.candidate_edges(), key=lambda e: (-e[0], e[1], e[2])):
+            left_root, right_root = find(left), find(right)
+            if left_root == right_root or stores[left_root] & stores[right_root]:
+                continue
+            parent[right_root] = left_root
+            stores[left_root] |= stores[right_root]
+
+        groups = {}
+        for position in range(len(self.records)):
+            groups.setdefault(find(position), []).append(position)
+        return [members for members in groups.values() if len(members) > 1]
+
+    @staticmethod
+    def _price_of(records: List[StoreRecord]):
+        """Ranking price for a group: unit price when all sizes share a unit, else shelf price"""
+        units = {r.key.size.unit if r.key.unit_price is not None else None for r in records}
+        if len(units) == 1 and None not in units:
+            return lambda r: r.key.unit_price
+        return lambda r: r.key.price if r.key.price > 0 else float('inf')
+
+    def product_groups(self) -> List[Dict]:
+        """One canonical item with per-store prices for every multi-store group"""
+        output = []
+        for members in self.cluster():
+            records = [self.records[m] for m in members]
+            # The most descriptive name (most keywords) stands for the group
+            canonical = max(records, key=lambda r: len(r.key.tokens))
+            prices = {r.store: {'name': r.key.name, 'price': r.key.price,
+                                'unit_price': format_unit_price(r.key.unit_price, r.key.size)}
+                      for r in records}
+            cheapest = min(records, key=self._price_of(records))
+            output.append({
+                'canonical_name': canonical.key.name,
+                'stores': prices,
+                'store_count': len(records),
+                'cheapest_store': cheapest.store
+            })
+        output.sort(key=lambda g: (-g['store_count'], g['canonical_name']))
+        return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Group the same product across all stores in one pass')
+    parser.add_argument('--store', action='append', required=True, metavar='STORE=PATH',
+                        help='Store records, e.g. coles=data/coles_25032026.json (repeatable)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Minimum keyword similarity (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--max-block-size', type=int, default=DEFAULT_MAX_BLOCK_SIZE,
+                        help=f'Skip keywords shared by more records than this (default: {DEFAULT_MAX_BLOCK_SIZE})')
+    parser.add_argument('-o', '--output', default='product_groups.json', help='Output JSON file')
+    args = parser.parse_args()
+
+    clusterer = ProductClusterer(args.threshold, args.max_block_size)
+    for spec in args.store:
+        store, _, path = spec.partition('=')
+        store = store.strip().lower()
+        loader = STORE_LOADERS.get(store, load_json_records if path.endswith('.json') else load_aldi_records)
+        if not Path(path).exists():
+            print(f"Warning: {path} not found, skipping {store}")
+            continue
+        records = loader(path)
+        clusterer.add_store(store, records)
+        print(f"Loaded {len(records)} {store} products")
+
+    groups = clusterer.product_groups()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(groups, f, indent=2, ensure_ascii=False)
+
+    print(f"Found {len(groups)} product groups across stores")
+    print(f"Groups saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Precomputed Product Keys
+
+A ProductKey holds everything the name matchers need about one product:
+normalized text, token set, brand, parsed size (see size_parser) and
+numeric price. Keys are built once per loaded product, so scorers compare
+precomputed fields instead of re-normalizing both names for every pair.
+
+BrandSizeBlocker indexes keys by brand and size band so matchers only
+score pairs that could be the same product; keys_comparable applies the
+same rules to a single pair.
+
+Each matcher keeps its own normalization rules and passes them in when the
+keys are built; the key type itself is shared.
+"""
+
+import re
+import math
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from size_parser import DEFAULT_SIZE_BAND, ProductSize, parse_size, sizes_compatible, unit_price
+
+# Store brands are compared against every brand when blocking
+HOUSE_BRANDS = frozenset({'coles', 'woolworths', 'unknown'})
+
+
+def parse_price(price_str) -> float:
+    """Extract a numeric price, returning 0.0 when there is none"""
+    if not price_str:
+        return 0.0
+    price_clean = re.sub(r'[^\d.]', '', str(price_str))
+    try:
+        return float(price_clean) if price_clean else 0.0
+    except ValueError:
+        return 0.0
+
+
+def block_brand(brand: Optional[str]) -> str:
+    """Lowercase blocking brand, '*' when the brand should match anything"""
+    brand = (brand or '').lower()
+    return '*' if not brand or brand in HOUSE_BRANDS else brand
+
+
+class ProductKey:
+    """Immutable, precomputed matching fields for a single product"""
+
+    __slots__ = ('name', 'normalized', 'tokens', 'brand', 'size', 'price')
+
+    def __init__(self, name: str, normalized: str, tokens: FrozenSet[str],
+                 brand: str, size: Optional[ProductSize], price: float):
+        for field, value in (('name', name), ('normalized', normalized), ('tokens', tokens),
+                             ('brand', brand), ('size', size), ('price', price)):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, field, value):
+        raise AttributeError("ProductKey is immutable")
+
+    def __delattr__(self, field):
+        raise AttributeError("ProductKey is immutable")
+
+    def __repr__(self):
+        return f"ProductKey({self.name!r}, brand={self.brand!r}, size={self.size!r}, price={self.price!r})"
+
+    @property
+    def unit_price(self) -> Optional[float]:
+        """Price per 100g, per 100ml or per item, or None"""
+        return unit_price(self.price, self.size)
+
+
+def make_product_key(name: str, price='',
+                     normalize: Callable[[str], str] = str.lower,
+                     tokenize: Callable[[str], Iterable[str]] = str.split,
+                     brand_of: Optional[Callable[[str], str]] = None,
+                     price_of: Callable[[object], float] = parse_price) -> ProductKey:
+    """Build a ProductKey using a matcher's own normalization rules"""
+    normalized = normalize(name)
+    return ProductKey(
+        name=name,
+        normalized=normalized,
+        tokens=frozenset(tokenize(normalized)),
+        brand=brand_of(name) if brand_of else '',
+        size=parse_size(name),
+        price=price_of(price)
+    )
+
+
+def build_product_keys(products: List[Dict], name_field: str = 'productName',
+                       price_field: str = 'price', **key_options) -> List[ProductKey]:
+    """Build one key per loaded product, aligned with the product list"""
+    return [make_product_key(product.get(name_field, ''), product.get(price_field, ''), **key_options)
+            for product in products]
+
+
+def keys_comparable(left: ProductKey, right: ProductKey, band: float = DEFAULT_SIZE_BAND) -> bool:
+    """Whether two keys pass BrandSizeBlocker's brand and size band rules"""
+    left_brand, right_brand = block_brand(left.brand), block_brand(right.brand)
+    if left_brand != right_brand and '*' not in (left_brand, right_brand):
+        return False
+    return sizes_compatible(left.size, right.size, band)
+
+
+class BrandSizeBlocker:
+    """Index of keys by brand and size band, returning only comparable candidates
+
+    Two keys are candidates when their brands agree (an empty, unknown or
+    store brand agrees with anything) and their sizes are compatible (see
+    size_parser.sizes_compatible). Sizes are bucketed on a log scale with
+    one bucket per size band, so a lookup only visits its neighbouring
+    buckets instead of every key.
+    """
+
+    def __init__(self, keys: List[ProductKey], band: float = DEFAULT_SIZE_BAND,
+                 brand_of: Optional[Callable[[ProductKey], str]] = None):
+        self.keys = keys
+        self.band = band
+        self.brand_of = brand_of or (lambda key: key.brand)
+        self._log_band = math.log(band)
+        # Buckets are (unit, band) pairs, (None, None) for keys without a size
+        self.by_brand: Dict[str, Dict[tuple, List[int]]] = {}
+        self.by_size: Dict[tuple, List[int]] = {}
+        for position, key in enumerate(keys):
+            brand_buckets = self.by_brand.setdefault(self.block_brand(key), {})
+            for bucket in self._buckets(key.size):
+                brand_buckets.setdefault(bucket, []).append(position)
+                self.by_size.setdefault(bucket, []).append(position)
+
+    def block_brand(self, key: ProductKey) -> str:
+        """Lowercase blocking brand, '*' when the brand should match anything"""
+        return block_brand(self.brand_of(key))
+
+    def _band(self, quantity: float) -> int:
+        return math.floor(math.log(quantity) / self._log_band)
+
+    def _buckets(self, size: Optional[ProductSize], spread: int = 0) -> List[tuple]:
+        if size is None:
+            return [(None, None)]
+        low, high = self._band(size.total_low), self._band(size.total_high)
+        return [(size.unit, band) for band in range(low - spread, high + spread + 1)]
+
+    def candidates(self, key: ProductKey) -> List[int]:
+        """Positions of comparable keys, in key order"""
+        brand = self.block_brand(key)
+        if brand == '*':
+            indexes = [self.by_size]
+        else:
+            indexes = [self.by_brand.get(brand, {}), self.by_brand.get('*', {})]
+
+        found = set()
+        if key.size is None:
+            # An unknown size can't rule anything out
+            for index in indexes:
+                for members in index.values():
+                    found.update(members)
+            return sorted(found)
+
+        # Neighbouring bands cover every size within the band factor
+        buckets = self._buckets(key.size, spread=1) + [(None, None)]
+        for index in indexes:
+            for bucket in buckets:
+                found.update(index.get(bucket, ()))
+        keys, band = self.keys, self.band
+        return sorted(position for position in found
+                      if sizes_compatible(key.size, keys[position].size, band))
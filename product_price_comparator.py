@@ -1,8 +1,19 @@
 import json
 import re
+import argparse
 from difflib import SequenceMatcher
 from datetime import datetime
 
+from brand_recognizer import recognize_brand
+from match_assignment import GLOBAL_ASSIGNMENT_MODES, assign_pairs
+from product_key import BrandSizeBlocker, build_product_keys, make_product_key
+from size_parser import format_unit_price, unit_price
+
+# "vectorized" imports vectorized_matcher (numpy, scipy) only when it is used
+SCORERS = ("legacy", "vectorized")
+# "best" lets every Woolworths product take its best Coles match; the others are one-to-one
+ASSIGNMENT_MODES = ("best",) + GLOBAL_ASSIGNMENT_MODES
+
 def normalize_product_name(name):
     """Normalize product name for better matching"""
     # Convert to lowercase
@@ -29,57 +40,136 @@ def extract_price_value(price_str):
             return 0.0
     return 0.0
 
+def build_keys(products):
+    """Build one ProductKey per loaded product with this module's normalization"""
+    return build_product_keys(products, normalize=normalize_product_name, price_of=extract_price_value,
+                              brand_of=recognize_brand)
+
+def key_similarity(key1, key2):
+    """Calculate similarity between two precomputed product keys"""
+    return SequenceMatcher(None, key1.normalized, key2.normalized).ratio()
+
 def calculate_similarity(name1, name2):
     """Calculate similarity between two product names"""
-    norm1 = normalize_product_name(name1)
-    norm2 = normalize_product_name(name2)
-    return SequenceMatcher(None, norm1, norm2).ratio()
+    return key_similarity(make_product_key(name1, normalize=normalize_product_name),
+                          make_product_key(name2, normalize=normalize_product_name))
+
+def build_match_data(w_product, c_product, similarity, w_price, c_price, w_size=None, c_size=None):
+    """Build the match record for a Woolworths/Coles product pair
+
+    When both pack sizes are known in the same unit, the cheaper store and
+    the saving are worked out per unit rather than per shelf price.
+    """
+    w_unit = unit_price(w_price, w_size)
+    c_unit = unit_price(c_price, c_size)
+    if w_unit is not None and c_unit is not None and w_size.unit == c_size.unit:
+        w_compare, c_compare = round(w_unit, 4), round(c_unit, 4)
+        unit_price_difference = round(w_unit - c_unit, 4)
+    else:
+        w_compare, c_compare = w_price, c_price
+        unit_price_difference = None
+    higher = max(w_compare, c_compare)
+
+    return {
+        'woolworths_product': {
+            'id': w_product['productID'],
+            'name': w_product['productName'],
+            'brand': w_product['brand'],
+            'price': w_product['price'],
+            'price_numeric': w_price,
+            'unit_price': format_unit_price(w_unit, w_size),
+            'original_price': w_product.get('originalPrice', w_product['price']),
+            'savings': w_product.get('savings', '$0.00'),
+            'special_type': w_product.get('specialType', 'REGULAR')
+        },
+        'coles_product': {
+            'id': c_product['productID'],
+            'name': c_product['productName'],
+            'brand': c_product['brand'],
+            'price': c_product['price'],
+            'price_numeric': c_price,
+            'unit_price': format_unit_price(c_unit, c_size),
+            'original_price': c_product.get('originalPrice', c_product['price']),
+            'savings': c_product.get('savings', '$0.00'),
+            'special_type': c_product.get('specialType', 'REGULAR')
+        },
+        'similarity_score': round(similarity, 3),
+        'price_difference': round(w_price - c_price, 2),
+        'unit_price_difference': unit_price_difference,
+        'saving_percent': round(abs(w_compare - c_compare) / higher * 100, 2) if higher else 0.0,
+        'cheaper_store': 'Coles' if c_compare < w_compare else 'Woolworths' if w_compare < c_compare else 'Same Price'
+    }
+
+def score_row(w_key, coles_keys, indices):
+    """(index, similarity) for one Woolworths key against the Coles keys at indices, scored as iterated"""
+    return ((i, key_similarity(w_key, coles_keys[i])) for i in indices)
+
+def find_product_matches(woolworths_products, coles_products, similarity_threshold=0.6,
+                         scorer="legacy", top_k=10, assignment="best", blocking="none"):
+    """Find matching products between Woolworths and Coles
+
+    scorer is "legacy" (SequenceMatcher on every pair) or "vectorized"
+    (TF-IDF character n-gram cosine, top_k Coles candidates per product).
+
+    assignment is "best" (every Woolworths product takes its best Coles
+    match, a Coles product may be reused), or "global"/"optimal" for a
+    one-to-one matching solved over all scored pairs (see match_assignment).
+
+    blocking is "none" or "brand_size", which only scores pairs whose known
+    brands agree and whose pack sizes fall in the same size band (see
+    product_key.BrandSizeBlocker).
+    """
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer: {scorer}")
+    if assignment not in ASSIGNMENT_MODES:
+        raise ValueError(f"Unknown assignment mode: {assignment}")
+    if blocking not in ("none", "brand_size"):
+        raise ValueError(f"Unknown blocking mode: {blocking}")
+
+    woolworths_keys = build_keys(woolworths_products)
+    coles_keys = build_keys(coles_products)
+    blocker = BrandSizeBlocker(coles_keys) if blocking == "brand_size" else None
+
+    if scorer == "vectorized":
+        from vectorized_matcher import CharNgramMatcher
+        matcher = CharNgramMatcher(normalize_product_name)
+        candidates = [sorted(row) for row in matcher.top_k_keys(woolworths_keys, coles_keys, top_k)]
+        if blocker is not None:
+            allowed = [set(blocker.candidates(w_key)) for w_key in woolworths_keys]
+            candidates = [[(i, s) for i, s in row if i in allowed[index]]
+                          for index, row in enumerate(candidates)]
+    else:
+        # Rows are scored lazily, one Woolworths product at a time
+        every_coles = range(len(coles_keys))
+        candidates = (
+            score_row(w_key, coles_keys, blocker.candidates(w_key) if blocker is not None else every_coles)
+            for w_key in woolworths_keys
+        )
+
+    if assignment != "best":
+        pairs = [(s, row, i) for row, scored in enumerate(candidates)
+                 for i, s in scored if s > similarity_threshold]
+        accepted = sorted(assign_pairs(pairs, assignment), key=lambda pair: pair[1])
+        return [build_match_data(woolworths_products[row], coles_products[i], s,
+                                 woolworths_keys[row].price, coles_keys[i].price,
+                                 woolworths_keys[row].size, coles_keys[i].size)
+                for s, row, i in accepted]
 
-def find_product_matches(woolworths_products, coles_products, similarity_threshold=0.6):
-    """Find matching products between Woolworths and Coles"""
     matches = []
 
-    for w_product in woolworths_products:
+    for row, (w_product, scored) in enumerate(zip(woolworths_products, candidates)):
         best_match = None
         best_similarity = 0
 
-        for c_product in coles_products:
-            similarity = calculate_similarity(w_product['productName'], c_product['productName'])
-
+        for i, similarity in scored:
             if similarity > similarity_threshold and similarity > best_similarity:
                 best_similarity = similarity
-                best_match = c_product
-
-        if best_match:
-            w_price = extract_price_value(w_product['price'])
-            c_price = extract_price_value(best_match['price'])
-
-            match_data = {
-                'woolworths_product': {
-                    'id': w_product['productID'],
-                    'name': w_product['productName'],
-                    'brand': w_product['brand'],
-                    'price': w_product['price'],
-                    'price_numeric': w_price,
-                    'original_price': w_product.get('originalPrice', w_product['price']),
-                    'savings': w_product.get('savings', '$0.00'),
-                    'special_type': w_product.get('specialType', 'REGULAR')
-                },
-                'coles_product': {
-                    'id': best_match['productID'],
-                    'name': best_match['productName'],
-                    'brand': best_match['brand'],
-                    'price': best_match['price'],
-                    'price_numeric': c_price,
-                    'original_price': best_match.get('originalPrice', best_match['price']),
-                    'savings': best_match.get('savings', '$0.00'),
-                    'special_type': best_match.get('specialType', 'REGULAR')
-                },
-                'similarity_score': round(best_similarity, 3),
-                'price_difference': round(w_price - c_price, 2),
-                'cheaper_store': 'Coles' if c_price < w_price else 'Woolworths' if w_price < c_price else 'Same Price'
-            }
-            matches.append(match_data)
+                best_match = i
+
+        if best_match is not None:
+            matches.append(build_match_data(w_product, coles_products[best_match], best_similarity,
+                                            woolworths_keys[row].price, coles_keys[best_match].price,
+                                            woolworths_keys[row].size, coles_keys[best_match].size))
 
     return matches
 
@@ -110,16 +200,30 @@ def generate_comparison_report(matches):
             'comparison_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         },
         'matched_products': matches,
+        # Ranked on the per-unit saving, so a bigger pack isn't counted as dearer
         'top_coles_savings': sorted([m for m in matches if m['cheaper_store'] == 'Coles'],
-                                   key=lambda x: abs(x['price_difference']), reverse=True)[:10],
+                                   key=lambda x: x['saving_percent'], reverse=True)[:10],
         'top_woolworths_savings': sorted([m for m in matches if m['cheaper_store'] == 'Woolworths'],
-                                        key=lambda x: abs(x['price_difference']), reverse=True)[:10]
+                                        key=lambda x: x['saving_percent'], reverse=True)[:10]
     }
 
     return report
 
 def main():
     """Main function to run the price comparison"""
+    parser = argparse.ArgumentParser(description='Compare Woolworths and Coles weekly prices')
+    parser.add_argument('--scorer', choices=SCORERS, default='legacy',
+                        help='Similarity scorer (default: legacy)')
+    parser.add_argument('--top-k', type=int, default=10,
+                        help='Candidates per product for the vectorized scorer (default: 10)')
+    parser.add_argument('--assignment', choices=ASSIGNMENT_MODES, default='best',
+                        help='best: each Woolworths product takes its best Coles match; '
+                             'global/optimal: one-to-one matching across all pairs (default: best)')
+    parser.add_argument('--blocking', choices=['brand_size', 'none'], default='brand_size',
+                        help='brand_size: only compare products of the same brand and size band; '
+                             'none: compare every pair (default: brand_size)')
+    args = parser.parse_args()
+
     try:
         # Load data files
         print("Loading Woolworths data...")
@@ -134,7 +238,9 @@ def main():
 
         # Find matches
         print("Finding product matches...")
-        matches = find_product_matches(woolworths_data, coles_data, similarity_threshold=0.6)
+        matches = find_product_matches(woolworths_data, coles_data, similarity_threshold=0.6,
+                                       scorer=args.scorer, top_k=args.top_k,
+                                       assignment=args.assignment, blocking=args.blocking)
 
         print(f"Found {len(matches)} matching products")
 
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Package Size Parser
+
+Reads the pack size out of a product name as a canonical quantity: grams,
+millilitres or a count of items ("each"). Multipacks ("24x375ml",
+"4 x 300mL") keep their item count, and ranged sizes ("150g-190g",
+"110-125g", "22 Pack-28 Pack") keep both ends.
+
+Sizes are used to block matching (two sizes are only comparable when they
+share a unit and their totals are within a size band of each other) and to
+work out a per-unit price, so different pack sizes are compared fairly.
+
+Run directly to see how sizes are parsed for a weekly export:
+    python size_parser.py data/coles_25032026.json
+"""
+
+import re
+import json
+import argparse
+from collections import Counter
+from typing import NamedTuple, Optional
+
+# Canonical unit and multiplier for each size unit
+SIZE_UNITS = {
+    'g': ('g', 1.0), 'gm': ('g', 1.0), 'gms': ('g', 1.0), 'gram': ('g', 1.0), 'grams': ('g', 1.0),
+    'kg': ('g', 1000.0), 'kgs': ('g', 1000.0),
+    'ml': ('ml', 1.0), 'mls': ('ml', 1.0),
+    'l': ('ml', 1000.0), 'lt': ('ml', 1000.0), 'ltr': ('ml', 1000.0),
+    'litre': ('ml', 1000.0), 'litres': ('ml', 1000.0), 'liter': ('ml', 1000.0), 'liters': ('ml', 1000.0),
+    'pack': ('each', 1.0), 'packs': ('each', 1.0), 'pk': ('each', 1.0),
+    'each': ('each', 1.0), 'ea': ('each', 1.0),
+    'piece': ('each', 1.0), 'pieces': ('each', 1.0), 'pcs': ('each', 1.0),
+    'roll': ('each', 1.0), 'rolls': ('each', 1.0),
+    'capsule': ('each', 1.0), 'capsules': ('each', 1.0),
+    'pod': ('each', 1.0), 'pods': ('each', 1.0),
+    'tablet': ('each', 1.0), 'tablets': ('each', 1.0),
+}
+
+# Per-unit prices are quoted per 100g, per 100ml or per item
+UNIT_BASIS = {'g': 100.0, 'ml': 100.0, 'each': 1.0}
+UNIT_LABELS = {'g': 'per 100g', 'ml': 'per 100ml', 'each': 'each'}
+
+# Totals within this factor of each other are the same size band
+DEFAULT_SIZE_BAND = 1.25
+
+_NUMBER = r'\d+(?:\.\d+)?'
+_UNIT = '|'.join(sorted(SIZE_UNITS, key=len, reverse=True))
+
+# One pass over the name; alternatives are tried in this order at each position
+SIZE_PATTERN = re.compile(
+    rf'(?<![\w.-])(?:'
+    rf'(?P<count>\d+)\s*x\s*(?P<each>{_NUMBER})\s*(?P<each_unit>{_UNIT})'
+    rf'|(?P<low>{_NUMBER})\s*(?P<low_unit>{_UNIT})?\s*[-–]\s*(?P<high>{_NUMBER})\s*(?P<high_unit>{_UNIT})'
+    rf'|(?P<qty>{_NUMBER})\s*(?P<unit>{_UNIT})'
+    rf'|(?:pk|pack)\s*(?P<pack_low>\d+)(?!\s*x\s*\d)(?:\s*[-–]\s*(?P<pack_high>\d+))?'
+    rf'|per\s*(?P<per_unit>kg|litre|l)'
+    rf')(?!\w)',
+    re.IGNORECASE
+)
+
+
+class ProductSize(NamedTuple):
+    """A canonical pack size: count items of low..high units each"""
+    unit: str
+    low: float
+    high: float
+    count: int = 1
+
+    @property
+    def total_low(self) -> float:
+        return self.low * self.count
+
+    @property
+    def total_high(self) -> float:
+        return self.high * self.count
+
+    @property
+    def total(self) -> float:
+        """Total quantity, taking the middle of a ranged size"""
+        return (self.low + self.high) / 2 * self.count
+
+
+def _size_from_match(match) -> Optional[ProductSize]:
+    if match.group('count'):
+        unit, factor = SIZE_UNITS[match.group('each_unit').lower()]
+        quantity = float(match.group('each')) * factor
+        return ProductSize(unit, quantity, quantity, int(match.group('count')) or 1)
+
+    if match.group('high'):
+        unit, high_factor = SIZE_UNITS[match.group('high_unit').lower()]
+        low_factor = high_factor
+        if match.group('low_unit'):
+            low_unit, low_factor = SIZE_UNITS[match.group('low_unit').lower()]
+            if low_unit != unit:
+                return None
+        low = float(match.group('low')) * low_factor
+        high = float(match.group('high')) * high_factor
+        return ProductSize(unit, min(low, high), max(low, high))
+
+    if match.group('qty'):
+        unit, factor = SIZE_UNITS[match.group('unit').lower()]
+        quantity = float(match.group('qty')) * factor
+        return ProductSize(unit, quantity, quantity)
+
+    if match.group('pack_low'):
+        low = float(match.group('pack_low'))
+        high = float(match.group('pack_high') or low)
+        return ProductSize('each', min(low, high), max(low, high))
+
+    unit, factor = SIZE_UNITS[match.group('per_unit').lower()]
+    return ProductSize(unit, factor, factor)
+
+
+def parse_size(name: str) -> Optional[ProductSize]:
+    """Return the size in a name, or None
+
+    A weight or volume wins over a pack count. Drinks are listed per can or
+    bottle, so a pack count just before a volume makes a multipack
+    ("30 Pack 375ml" is 30 x 375ml), while "6 Pack 185g" is the total
+    weight. Without a weight or volume the first count is used
+    ("Eggs 12 Pack" is 12 each).
+    """
+    if not name:
+        return None
+    counted = None
+    for match in SIZE_PATTERN.finditer(name):
+        size = _size_from_match(match)
+        if size is None or size.low <= 0:
+            continue
+        if size.unit != 'each':
+            if (size.unit == 'ml' and size.count == 1 and counted is not None
+                    and counted.low == counted.high and not name[counted_end:match.start()].strip()):
+                return size._replace(count=int(counted.low))
+            return size
+        if counted is None:
+            counted, counted_end = size, match.end()
+    return counted
+
+
+def sizes_compatible(size1: Optional[ProductSize], size2: Optional[ProductSize],
+                     band: float = DEFAULT_SIZE_BAND) -> bool:
+    """Whether two sizes could be the same product; an unknown size never rules a pair out"""
+    if size1 is None or size2 is None:
+        return True
+    if size1.unit != size2.unit:
+        return False
+    return size1.total_low <= size2.total_high * band and size2.total_low <= size1.total_high * band
+
+
+def unit_price(price: float, size: Optional[ProductSize]) -> Optional[float]:
+    """Price per 100g, per 100ml or per item, or None without a price and size"""
+    if not price or size is None or size.total <= 0:
+        return None
+    return price / size.total * UNIT_BASIS[size.unit]
+
+
+def format_unit_price(price: Optional[float], size: Optional[ProductSize]) -> str:
+    """Shelf-label style unit price such as '$0.53 per 100ml'"""
+    if price is None or size is None:
+        return ''
+    return f"${price:.2f} {UNIT_LABELS[size.unit]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show how pack sizes are parsed from product names')
+    parser.add_argument('file', help='Weekly product JSON file')
+    parser.add_argument('--show', type=int, default=20, help='Example names to print (default: 20)')
+    args = parser.parse_args()
+
+    with open(args.file, 'r', encoding='utf-8') as f:
+        names = [p.get('productName', '') for p in json.load(f)]
+
+    units = Counter()
+    for index, name in enumerate(names):
+        size = parse_size(name)
+        units[size.unit if size else 'none'] += 1
+        if index < args.show:
+            print(f"{name[:60]:60} {size}")
+
+    print(f"\n{len(names)} names: " + ", ".join(f"{unit} {count}" for unit, count in units.most_common()))
+
+
+if __name__ == "__main__":
+    main()
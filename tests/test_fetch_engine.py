@@ -0,0 +1,178 @@
+"""FetchEngine against a local stub HTTP server"""
+
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from fetch_engine import FetchEngine
+from http_cache import CacheMissError, CachingSession, HTTPCache
+
+
+class StubServer(ThreadingHTTPServer):
+    """Records when each request arrives and answers as its query asks:
+
+    delay=<seconds> before answering, fail=<n> 503s before the first 200,
+    retry_after=<seconds> sent with those 503s.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.arrivals = []
+        self.hits = {}
+        self.lock = threading.Lock()
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        with self.server.lock:
+            self.server.arrivals.append(time.monotonic())
+            hit = self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        time.sleep(float(query.get('delay', 0)))
+
+        failing = hit <= int(query.get('fail', 0))
+        body = json.dumps({'path': self.path}).encode()
+        self.send_response(503 if failing else 200)
+        if failing and 'retry_after' in query:
+            self.send_header('Retry-After', query['retry_after'])
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def busiest_second(arrivals):
+    arrivals = sorted(arrivals)
+    busiest, start = 0, 0
+    for end, arrival in enumerate(arrivals):
+        while arrival - arrivals[start] >= 1.0:
+            start += 1
+        busiest = max(busiest, end - start + 1)
+    return busiest
+
+
+@pytest.fixture
+def server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine():
+    engine = FetchEngine(rate=10, burst=3, concurrency=8, backoff=0.01)
+    yield engine
+    engine.close()
+
+
+def test_busiest_second_stays_within_rate_and_burst(server, engine):
+    urls = [f"{server.base}/search?term={i}&delay=0.05" for i in range(33)]
+    results = engine.run(engine.fetch_all(urls))
+
+    assert all(result.status_code == 200 for result in results)
+    assert busiest_second(server.arrivals) <= engine.rate + engine.burst
+
+
+def test_503_is_retried_until_it_succeeds(server, engine):
+    response = engine.run(engine.fetch(f"{server.base}/flaky?fail=2"))
+
+    assert response.status_code == 200
+    assert server.hits['/flaky?fail=2'] == 3
+    assert engine.retried == 2
+
+
+def test_retry_after_is_honoured(server, engine):
+    response = engine.run(engine.fetch(f"{server.base}/busy?fail=1&retry_after=1"))
+
+    assert response.status_code == 200
+    first, second = server.arrivals
+    # The backoff alone would retry after about 10ms
+    assert second - first >= 0.95
+
+
+def test_last_error_status_is_returned_once_retries_run_out(server, engine):
+    response = engine.run(engine.fetch(f"{server.base}/down?fail=99"))
+
+    assert response.status_code == 503
+    assert server.hits['/down?fail=99'] == engine.retries + 1
+
+
+def test_cache_miss_is_not_retried(server, tmp_path):
+    session = CachingSession(HTTPCache(str(tmp_path)), replay=True)
+    engine = FetchEngine(session=session, backoff=0.01)
+    try:
+        with pytest.raises(CacheMissError):
+            engine.run(engine.fetch(f"{server.base}/uncached"))
+        assert engine.requests_sent == 1
+        assert engine.retried == 0
+        assert server.arrivals == []
+    finally:
+        engine.close()
+
+
+def test_fetch_all_keeps_input_order(server, engine):
+    # Earlier requests answer later, so completion order is the reverse of input order
+    paths = [f"/item/{i}?delay={0.05 * (5 - i):.2f}" for i in range(6)]
+    results = engine.run(engine.fetch_all([server.base + path for path in paths]))
+
+    assert [result.json()['path'] for result in results] == paths
+
+
+def test_fetch_all_returns_exceptions_in_place(server, tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    session = CachingSession(cache)
+    engine = FetchEngine(session=session, backoff=0.01)
+    try:
+        cached = f"{server.base}/cached"
+        engine.run(engine.fetch(cached))
+        session.replay = True
+        results = engine.run(engine.fetch_all([f"{server.base}/missing", cached]))
+    finally:
+        engine.close()
+
+    assert isinstance(results[0], CacheMissError)
+    assert results[1].status_code == 200
+
+
+def test_fetch_works_from_any_event_loop(server, engine):
+    url = f"{server.base}/loop"
+    # Awaited directly rather than through run(), in two loops one after the other
+    first = asyncio.run(engine.fetch(url))
+    second = asyncio.run(engine.fetch(url))
+
+    assert first.status_code == second.status_code == 200
+
+
+def test_callers_adapters_are_kept(server):
+    session = requests.Session()
+    adapter = HTTPAdapter(max_retries=Retry(total=2), pool_maxsize=2)
+    session.mount('http://', adapter)
+    engine = FetchEngine(session=session, concurrency=8)
+    try:
+        response = engine.run(engine.fetch(f"{server.base}/adapter"))
+    finally:
+        engine.close()
+
+    assert response.status_code == 200
+    assert session.get_adapter(server.base) is adapter
+    assert adapter.max_retries.total == 2
+    assert adapter.poolmanager.connection_pool_kw['maxsize'] == 8
@@ -13,6 +13,9 @@ import json
 import re
 import html
 
+from minhash_index import MinHashLSHIndex
+from product_key import build_product_keys
+
 def load_json(path):
     with open(path, encoding='utf-8') as f:
         return json.load(f)
@@ -36,26 +39,49 @@ def normalize(name):
     name = re.sub(r'\s+', ' ', name).strip()
     return name
 
-def word_set(name):
-    words = normalize(name).split()
+STOPWORDS = {'or', 'and', 'the', 'from', 'in', 'with', 'a', 'an', 'of', 'to', 'for', ''}
+
+def filter_words(normalized):
     # Remove very short/common words that don't help disambiguation
-    stopwords = {'or', 'and', 'the', 'from', 'in', 'with', 'a', 'an', 'of', 'to', 'for', ''}
-    return {w for w in words if w not in stopwords and len(w) > 1}
+    return {w for w in normalized.split() if w not in STOPWORDS and len(w) > 1}
+
+def word_set(name):
+    return filter_words(normalize(name))
 
-def best_match(html_product_name, json_products):
+def build_keys(json_products):
+    """Precompute the word set of every JSON product once per source"""
+    return build_product_keys(json_products, normalize=normalize, tokenize=filter_words)
+
+def build_index(json_keys):
+    """MinHash-LSH index over the precomputed word sets, built once per source"""
+    return MinHashLSHIndex.from_keys(json_keys, word_set)
+
+def best_match(html_product_name, json_products, json_keys=None, index=None):
     """
     Find best matching JSON product. Returns (category, score).
     Score = Jaccard similarity of word sets.
+    Pass json_keys from build_keys() to avoid re-normalizing the JSON products on every call,
+    or an index from build_index() to only score likely candidates.
     """
+    if index is not None:
+        found = index.query(html_product_name, 1)
+        if not found:
+            return '', 0.0
+        position, score = found[0]
+        return json_products[position]['category'], score
+
     query_words = word_set(html_product_name)
     if not query_words:
         return '', 0.0
 
+    if json_keys is None:
+        json_keys = build_keys(json_products)
+
     best_score = 0.0
     best_category = ''
 
-    for product in json_products:
-        candidate_words = word_set(product['productName'])
+    for product, key in zip(json_products, json_keys):
+        candidate_words = key.tokens
         if not candidate_words:
             continue
 
@@ -72,6 +98,8 @@ def best_match(html_product_name, json_products):
 def main():
     coles_products = load_json('data/coles_18032026.json')
     woolworths_products = load_json('data/woolworths_18032026.json')
+    coles_index = build_index(build_keys(coles_products))
+    woolworths_index = build_index(build_keys(woolworths_products))
 
     with open('liveinbne_deal.html', encoding='utf-8') as f:
         html_content = f.read()
@@ -112,9 +140,12 @@ def main():
                 continue
 
             # Choose JSON source
-            json_source = coles_products if current_store == 'coles' else woolworths_products
+            if current_store == 'coles':
+                json_source, json_index = coles_products, coles_index
+            else:
+                json_source, json_index = woolworths_products, woolworths_index
 
-            new_category, score = best_match(product_name, json_source)
+            new_category, score = best_match(product_name, json_source, index=json_index)
 
             if score >= THRESHOLD:
                 print(f"  [{current_store.upper()}] '{html.unescape(product_name)}'")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Vectorized Product Name Matcher
+
+Scores product names from two stores with TF-IDF weighted character n-grams.
+All names are turned into sparse matrices once and the cosine top-k for every
+query row comes out of a single sparse matrix product, instead of running
+difflib.SequenceMatcher on every Coles x Woolworths pair in Python.
+
+The brand-boost rule from generate_price_comparison.calculate_similarity is
+kept: +0.2 when both names resolve to the same (non "Unknown") brand, capped
+at 1.0.
+"""
+
+import json
+import argparse
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from product_key import ProductKey
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = (2, 4)) -> List[str]:
+    """Return the character n-grams of a normalized name, padded with spaces"""
+    padded = f" {text} "
+    min_n, max_n = ngram_range
+    grams = []
+    for n in range(min_n, max_n + 1):
+        for i in range(len(padded) - n + 1):
+            grams.append(padded[i:i + n])
+    return grams
+
+
+class CharNgramMatcher:
+    """TF-IDF character n-gram cosine matcher with an optional brand boost"""
+
+    def __init__(self, normalize: Callable[[str], str],
+                 brand_of: Optional[Callable[[str], str]] = None,
+                 brand_boost: float = 0.2,
+                 ngram_range: Tuple[int, int] = (2, 4),
+                 chunk_size: int = 512):
+        self.normalize = normalize
+        self.brand_of = brand_of
+        self.brand_boost = brand_boost
+        self.ngram_range = ngram_range
+        self.chunk_size = chunk_size
+
+    def _ngram_rows(self, texts: List[str], vocabulary: Dict[str, int]) -> Tuple[List[int], List[int]]:
+        """Map each normalized text to n-gram columns, growing the shared vocabulary as needed"""
+        indptr = [0]
+        indices = []
+        for text in texts:
+            for gram in char_ngrams(text, self.ngram_range):
+                indices.append(vocabulary.setdefault(gram, len(vocabulary)))
+            indptr.append(len(indices))
+        return indptr, indices
+
+    def vectorize(self, query_texts: List[str],
+                  corpus_texts: List[str]) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """Return L2-normalized TF-IDF matrices for both sides over one vocabulary"""
+        vocabulary = {}
+        query_rows = self._ngram_rows(query_texts, vocabulary)
+        corpus_rows = self._ngram_rows(corpus_texts, vocabulary)
+        width = len(vocabulary)
+
+        def count_matrix(rows, height):
+            indptr, indices = rows
+            matrix = sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(height, width))
+            # Duplicate (row, gram) entries are summed into term frequencies
+            matrix.sum_duplicates()
+            return matrix
+
+        queries = count_matrix(query_rows, len(query_texts))
+        corpus = count_matrix(corpus_rows, len(corpus_texts))
+
+        # Smooth IDF over both stores so rare n-grams carry the most weight
+        document_count = queries.shape[0] + corpus.shape[0]
+        document_freq = (np.bincount(queries.indices, minlength=width) +
+                         np.bincount(corpus.indices, minlength=width))
+        idf = np.log((1 + document_count) / (1 + document_freq)) + 1.0
+        idf_diagonal = sparse.diags(idf)
+
+        return self._l2_normalize(queries @ idf_diagonal), self._l2_normalize(corpus @ idf_diagonal)
+
+    @staticmethod
+    def _l2_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Scale every row to unit length so dot products are cosines"""
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+    @staticmethod
+    def _brand_matrices(query_brands: List[str],
+                        corpus_brands: List[str]) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """One-hot brand indicator matrices; brand_q @ brand_c.T marks brand matches"""
+        brands = {}
+
+        def one_hot(values):
+            rows, cols = [], []
+            for row, brand in enumerate(values):
+                brand = brand.lower()
+                if not brand or brand == "unknown":
+                    continue
+                rows.append(row)
+                cols.append(brands.setdefault(brand, len(brands)))
+            return rows, cols
+
+        q_rows, q_cols = one_hot(query_brands)
+        c_rows, c_cols = one_hot(corpus_brands)
+        width = max(len(brands), 1)
+        brand_q = sparse.csr_matrix((np.ones(len(q_rows)), (q_rows, q_cols)),
+                                    shape=(len(query_brands), width))
+        brand_c = sparse.csr_matrix((np.ones(len(c_rows)), (c_rows, c_cols)),
+                                    shape=(len(corpus_brands), width))
+        return brand_q, brand_c
+
+    def top_k(self, query_names: List[str], corpus_names: List[str],
+              k: int = 10) -> List[List[Tuple[int, float]]]:
+        """Return the k best (corpus_index, score) pairs for every query, best first"""
+        query_brands = corpus_brands = None
+        if self.brand_of is not None:
+            query_brands = [self.brand_of(name) for name in query_names]
+            corpus_brands = [self.brand_of(name) for name in corpus_names]
+        return self._top_k([self.normalize(name) for name in query_names],
+                           [self.normalize(name) for name in corpus_names],
+                           query_brands, corpus_brands, k)
+
+    def top_k_keys(self, query_keys: List[ProductKey], corpus_keys: List[ProductKey],
+                   k: int = 10) -> List[List[Tuple[int, float]]]:
+        """Same as top_k, reading normalized text and brand from prebuilt ProductKeys"""
+        query_brands = corpus_brands = None
+        if self.brand_of is not None:
+            query_brands = [key.brand for key in query_keys]
+            corpus_brands = [key.brand for key in corpus_keys]
+        return self._top_k([key.normalized for key in query_keys],
+                           [key.normalized for key in corpus_keys],
+                           query_brands, corpus_brands, k)
+
+    def _top_k(self, query_texts: List[str], corpus_texts: List[str],
+               query_brands: Optional[List[str]], corpus_brands: Optional[List[str]],
+               k: int) -> List[List[Tuple[int, float]]]:
+        if not query_texts or not corpus_texts:
+            return [[] for _ in query_texts]
+
+        queries, corpus = self.vectorize(query_texts, corpus_texts)
+        corpus_t = corpus.T.tocsc()
+        boost_brands = query_brands is not None
+        if boost_brands:
+            brand_q, brand_c = self._brand_matrices(query_brands, corpus_brands)
+            brand_c_t = brand_c.T.tocsc()
+
+        k = min(k, len(corpus_texts))
+        results = []
+        for start in range(0, len(query_texts), self.chunk_size):
+            stop = min(start + self.chunk_size, len(query_texts))
+            scores = (queries[start:stop] @ corpus_t).toarray()
+            if boost_brands:
+                scores += self.brand_boost * (brand_q[start:stop] @ brand_c_t).toarray()
+            np.minimum(scores, 1.0, out=scores)
+
+            # argpartition finds the k best columns, a small sort orders them;
+            # ties are broken by corpus position like the legacy scan
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for row, columns in enumerate(best):
+                row_scores = scores[row, columns]
+                order = np.lexsort((columns, -row_scores))
+                results.append([(int(columns[i]), float(row_scores[i])) for i in order])
+        return results
+
+
+def parity_report(query_names: List[str], corpus_names: List[str],
+                  legacy_similarity: Callable[[str, str], float],
+                  matcher: CharNgramMatcher, k: int = 10) -> Dict:
+    """Compare legacy exhaustive ranking against the vectorized top-k ranking
+
+    For every query the legacy scorer's best corpus item is found by scanning
+    the whole corpus. The report records where the two scorers disagree on the
+    top match and where the legacy best falls outside the vectorized top-k.
+    """
+    vectorized = matcher.top_k(query_names, corpus_names, k)
+    differences = []
+    agreements = 0
+    missing_from_top_k = 0
+
+    for row, query in enumerate(query_names):
+        legacy_best, legacy_score = -1, 0.0
+        for column, candidate in enumerate(corpus_names):
+            score = legacy_similarity(query, candidate)
+            if score > legacy_score:
+                legacy_best, legacy_score = column, score
+
+        candidates = vectorized[row]
+        vector_best = candidates[0][0] if candidates else -1
+        if vector_best == legacy_best:
+            agreements += 1
+            continue
+
+        ranked = [column for column, _ in candidates]
+        rank = ranked.index(legacy_best) + 1 if legacy_best in ranked else None
+        if rank is None:
+            missing_from_top_k += 1
+        differences.append({
+            'query': query,
+            'legacy_match': corpus_names[legacy_best] if legacy_best >= 0 else None,
+            'legacy_score': round(legacy_score, 3),
+            'vectorized_match': corpus_names[vector_best] if vector_best >= 0 else None,
+            'vectorized_score': round(candidates[0][1], 3) if candidates else 0.0,
+            'legacy_match_rank_in_top_k': rank
+        })
+
+    total = len(query_names)
+    return {
+        'total_queries': total,
+        'top1_agreement': agreements,
+        'top1_agreement_rate': round(agreements / total, 4) if total else 0.0,
+        'legacy_best_outside_top_k': missing_from_top_k,
+        'k': k,
+        'differences': differences
+    }
+
+
+def main():
+    """Print a legacy vs vectorized parity report for two weekly JSON files"""
+    import generate_price_comparison as gpc
+
+    parser = argparse.ArgumentParser(description='Compare legacy and vectorized product matching')
+    parser.add_argument('coles_file', help='Coles weekly JSON file')
+    parser.add_argument('woolworths_file', help='Woolworths weekly JSON file')
+    parser.add_argument('-k', type=int, default=10, help='Candidates kept per product (default: 10)')
+    parser.add_argument('-o', '--output', help='Write the full report to this JSON file')
+    args = parser.parse_args()
+
+    coles_names = [p['productName'] for p in gpc.load_json_data(args.coles_file)]
+    woolworths_names = [p['productName'] for p in gpc.load_json_data(args.woolworths_file)]
+
+    matcher = CharNgramMatcher(gpc.normalize_product_name, gpc.extract_brand_from_name)
+    report = parity_report(coles_names, woolworths_names, gpc.calculate_similarity, matcher, args.k)
+
+    print(f"Queries: {report['total_queries']}")
+    print(f"Top-1 agreement: {report['top1_agreement']} ({report['top1_agreement_rate']:.1%})")
+    print(f"Legacy best outside vectorized top-{args.k}: {report['legacy_best_outside_top_k']}")
+    for diff in report['differences'][:10]:
+        print(f"- {diff['query']}")
+        print(f"    legacy:     {diff['legacy_match']} ({diff['legacy_score']})")
+        print(f"    vectorized: {diff['vectorized_match']} ({diff['vectorized_score']})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Full report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,119 @@
 import re
 import json
-from typing import List, Dict, Optional
+import argparse
+from typing import List, Dict, Optional, Tuple
 
-def parse_woolworth_data(file_path: str) -> List[Dict]:
+from page_parallel import assign_ids, page_cuts, scan_shards
+
+def parse_product_at(lines: List[str], i: int) -> Tuple[int, Optional[Dict]]:
     """
-    Parse Woolworths catalogue data from text file into structured JSON format.
+    Parse from line i, returning the next line to look at and the product
+    found there (without its productID), or None.
     """
-    products = []
-    product_id_counter = 1
+    if not lines[i] or lines[i].startswith('Special pricing') or lines[i].startswith('Offer valid'):
+        return i + 1, None
+    
+    # Look for product name pattern (not a price line)
+    if re.match(r'^\$\d+\.\d+', lines[i]) or re.match(r'^\d+[¢%]', lines[i]):
+        return i + 1, None
+    
+    product_name = lines[i]
+    
+    # Skip duplicate product name line if present
+    if i + 1 < len(lines) and lines[i + 1] == product_name:
+        i += 1
+    
+    # Extract size/description from product name
+    size_match = re.search(r'(\d+(?:-\d+)?(?:g|ml|L|kg|Pk \d+(?:-\d+)?|\d+g))', product_name)
+    description = size_match.group(1) if size_match else ""
     
+    # Extract brand from product name
+    brand_parts = product_name.split()
+    brand = brand_parts[0] if brand_parts else ""
+    
+    # Look for price in next lines
+    price = ""
+    original_price = ""
+    savings = ""
+    special_type = ""
+    
+    j = i + 1
+    while j < len(lines) and j < i + 10:  # Look ahead max 10 lines
+        line = lines[j]
+        
+        # Price pattern
+        price_match = re.match(r'^\$(\d+\.\d+)', line)
+        if price_match and not price:
+            price = f"${price_match.group(1)}"
+        
+        # Special offer patterns
+        if "Better than 1/2 Price" in line:
+            special_type = "BETTER THAN HALF PRICE"
+            save_match = re.search(r'Save \$(\d+\.\d+)', line)
+            if save_match:
+                savings = f"${save_match.group(1)}"
+                if price:
+                    original_price = f"${float(price[1:]) + float(savings[1:]):.2f}"
+        elif "1/2 Price" in line or "Half Price" in line:
+            special_type = "HALF PRICE"
+            save_match = re.search(r'Save \$(\d+\.\d+)', line)
+            if save_match:
+                savings = f"${save_match.group(1)}"
+                if price:
+                    original_price = f"${float(price[1:]) + float(savings[1:]):.2f}"
+        elif "% off" in line:
+            percent_match = re.search(r'(\d+)% off', line)
+            if percent_match:
+                special_type = f"{percent_match.group(1)}% OFF"
+                save_match = re.search(r'Save \$(\d+\.\d+)', line)
+                if save_match:
+                    savings = f"${save_match.group(1)}"
+                    if price:
+                        original_price = f"${float(price[1:]) + float(savings[1:]):.2f}"
+        
+        # Stop if we hit another product or special pricing info
+        if line.startswith('Special pricing') or line.startswith('Offer valid'):
+            break
+        
+        j += 1
+    
+    if not price:  # Only add if we found a price
+        return j, None
+    
+    return j, {
+        "productID": None,
+        "productName": product_name,
+        "category": determine_category(product_name),
+        "brand": brand,
+        "description": description,
+        "price": price,
+        "originalPrice": original_price if original_price else price,
+        "savings": savings if savings else "$0.00",
+        "specialType": special_type if special_type else "REGULAR"
+    }
+
+def parse_woolworth_data(file_path: str, workers: int = 1) -> List[Dict]:
+    """
+    Parse Woolworths catalogue data from text file into structured JSON format.
+    
+    With more than one worker, the pages are scanned in a process pool
+    (see page_parallel.scan_shards); the products and their IDs are the same
+    as in a sequential run.
+    """
     with open(file_path, 'r', encoding='utf-8') as file:
         lines = [line.strip() for line in file.readlines()]
     
-    i = 0
-    while i < len(lines):
-        if not lines[i] or lines[i].startswith('Special pricing') or lines[i].startswith('Offer valid'):
-            i += 1
-            continue
-        
-        # Look for product name pattern (not a price line)
-        if not re.match(r'^\$\d+\.\d+', lines[i]) and not re.match(r'^\d+[¢%]', lines[i]) and lines[i]:
-            product_name = lines[i]
-            
-            # Skip duplicate product name line if present
-            if i + 1 < len(lines) and lines[i + 1] == product_name:
-                i += 1
-            
-            # Extract size/description from product name
-            size_match = re.search(r'(\d+(?:-\d+)?(?:g|ml|L|kg|Pk \d+(?:-\d+)?|\d+g))', product_name)
-            description = size_match.group(1) if size_match else ""
-            
-            # Extract brand from product name
-            brand_parts = product_name.split()
-            brand = brand_parts[0] if brand_parts else ""
-            
-            # Look for price in next lines
-            price = ""
-            original_price = ""
-            savings = ""
-            special_type = ""
-            
-            j = i + 1
-            while j < len(lines) and j < i + 10:  # Look ahead max 10 lines
-                line = lines[j]
-                
-                # Price pattern
-                price_match = re.match(r'^\$(\d+\.\d+)', line)
-                if price_match and not price:
-                    price = f"${price_match.group(1)}"
-                
-                # Special offer patterns
-                if "Better than 1/2 Price" in line:
-                    special_type = "BETTER THAN HALF PRICE"
-                    save_match = re.search(r'Save \$(\d+\.\d+)', line)
-                    if save_match:
-                        savings = f"${save_match.group(1)}"
-                        if price:
-                            original_price = f"${float(price[1:]) + float(savings[1:]):.2f}"
-                elif "1/2 Price" in line or "Half Price" in line:
-                    special_type = "HALF PRICE"
-                    save_match = re.search(r'Save \$(\d+\.\d+)', line)
-                    if save_match:
-                        savings = f"${save_match.group(1)}"
-                        if price:
-                            original_price = f"${float(price[1:]) + float(savings[1:]):.2f}"
-                elif "% off" in line:
-                    percent_match = re.search(r'(\d+)% off', line)
-                    if percent_match:
-                        special_type = f"{percent_match.group(1)}% OFF"
-                        save_match = re.search(r'Save \$(\d+\.\d+)', line)
-                        if save_match:
-                            savings = f"${save_match.group(1)}"
-                            if price:
-                                original_price = f"${float(price[1:]) + float(savings[1:]):.2f}"
-                
-                # Stop if we hit another product or special pricing info
-                if line.startswith('Special pricing') or line.startswith('Offer valid'):
-                    break
-                
-                j += 1
-            
-            # Determine category based on product name
-            category = determine_category(product_name)
-            
-            if price:  # Only add if we found a price
-                product = {
-                    "productID": f"WOL{product_id_counter:03d}",
-                    "productName": product_name,
-                    "category": category,
-                    "brand": brand,
-                    "description": description,
-                    "price": price,
-                    "originalPrice": original_price if original_price else price,
-                    "savings": savings if savings else "$0.00",
-                    "specialType": special_type if special_type else "REGULAR"
-                }
+    if workers == 1:
+        products = []
+        i = 0
+        while i < len(lines):
+            i, product = parse_product_at(lines, i)
+            if product:
                 products.append(product)
-                product_id_counter += 1
-            
-            i = j
-        else:
-            i += 1
+    else:
+        products = scan_shards(parse_product_at, lines, page_cuts(lines), workers)
     
-    return products
+    return assign_ids(products, 'WOL')
 
 def determine_category(product_name: str) -> str:
     """
@@ -128,11 +139,19 @@ def determine_category(product_name: str) -> str:
         return "General"
 
 def main():
-    input_file = "woolworth_source.txt"
-    output_file = "woolworth_products.json"
+    parser = argparse.ArgumentParser(description='Parse a Woolworths catalogue dump into products')
+    parser.add_argument('input', nargs='?', default='woolworth_source.txt',
+                        help='Catalogue text (default: woolworth_source.txt)')
+    parser.add_argument('-o', '--output', default='woolworth_products.json',
+                        help='Output JSON file (default: woolworth_products.json)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parse pages in this many processes (default: 1, 0 for one per CPU)')
+    args = parser.parse_args()
+    input_file = args.input
+    output_file = args.output
     
     try:
-        products = parse_woolworth_data(input_file)
+        products = parse_woolworth_data(input_file, args.workers)
         
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(products, f, indent=2, ensure_ascii=False)
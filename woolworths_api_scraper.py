@@ -5,16 +5,40 @@ Attempts to fetch product data directly from Woolworths API endpoints
 """
 
 import json
+import asyncio
+import argparse
 import requests
-import time
 from datetime import datetime
 from typing import List, Dict, Optional
 from pathlib import Path
 
+from api_harvester import DEFAULT_PAGE_SIZE, PaginatedHarvester, offset_page_params, search_page_params
+from brand_recognizer import recognize_brand
+from fetch_engine import DEFAULT_CONCURRENCY, DEFAULT_RATE, FetchEngine
+from http_cache import add_cache_arguments, print_cache_summary, session_from_args
+
+DEFAULT_SEARCH_TERMS = [
+    'milk', 'bread', 'cheese', 'chicken', 'beef', 'apple', 'banana',
+    'chocolate', 'coffee', 'tea', 'pasta', 'rice', 'yogurt'
+]
+
+SEARCH_ENDPOINTS = [
+    "https://www.woolworths.com.au/api/v1/ui/search/products",
+    "https://www.woolworths.com.au/shop/search/products",
+    "https://www.woolworths.com.au/apis/ui/search/products"
+]
+
 class WoolworthsAPIScraper:
-    def __init__(self):
+    def __init__(self, rate: float = DEFAULT_RATE, concurrency: int = DEFAULT_CONCURRENCY,
+                 session: Optional[requests.Session] = None):
+        """
+        Args:
+            rate: Requests per second per host (see fetch_engine.py)
+            concurrency: Requests in flight at once
+            session: Session to fetch through, e.g. a caching one (see http_cache.py)
+        """
         self.products = []
-        self.session = requests.Session()
+        self.session = session or requests.Session()
         
         # Headers to mimic a real browser
         self.headers = {
@@ -26,6 +50,7 @@ class WoolworthsAPIScraper:
             'Referer': 'https://www.woolworths.com.au/',
         }
         self.session.headers.update(self.headers)
+        self.engine = FetchEngine(self.session, rate=rate, concurrency=concurrency)
         
         # Category mapping
         self.category_keywords = {
@@ -50,21 +75,10 @@ class WoolworthsAPIScraper:
 
     def extract_brand(self, name: str) -> Optional[str]:
         """Extract brand from product name"""
-        known_brands = [
-            'Woolworths', 'Pantene', 'Nescafe', 'Mars', 'Pringles', 'Maltesers', 
-            'Dove', 'Dettol', 'Colgate', 'Sorbent', 'Heinz', 'Cadbury', 
-            'Coca-Cola', 'Blackmores', 'Peters', 'Western Star'
-        ]
-        
-        name_lower = name.lower()
-        for brand in known_brands:
-            if brand.lower() in name_lower:
-                return brand
-        return None
+        return recognize_brand(name)
 
-    def get_catalogue_api_data(self, sale_id: str = "60903", area_name: str = "QLD") -> List[Dict]:
-        """Try to fetch catalogue data from potential API endpoints"""
-        
+    def catalogue_requests(self, sale_id: str, area_name: str) -> List[tuple]:
+        """(endpoint, params) for every catalogue API endpoint to try, best guess first"""
         # Known Woolworths API patterns
         api_endpoints = [
             f"https://www.woolworths.com.au/api/v1/catalogue/specials/{sale_id}",
@@ -76,50 +90,52 @@ class WoolworthsAPIScraper:
             "https://www.woolworths.com.au/shop/api/ui/catalogue/specials"
         ]
         
+        endpoint_requests = []
         for endpoint in api_endpoints:
-            try:
-                print(f"Trying API endpoint: {endpoint}")
-                
-                # Add specific params for some endpoints
-                params = {}
-                if "specials" in endpoint and sale_id:
-                    params = {
-                        'saleId': sale_id,
-                        'areaName': area_name,
-                        'limit': 100
-                    }
-                
-                response = self.session.get(endpoint, params=params, timeout=10)
-                
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        print(f"Success! Got data from: {endpoint}")
-                        print(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'List response'}")
-                        
-                        # Save raw response for analysis
-                        with open(f'woolworths_api_response_{sale_id}.json', 'w') as f:
-                            json.dump(data, f, indent=2)
-                        
-                        return self.parse_api_response(data)
-                    except json.JSONDecodeError:
-                        print(f"Non-JSON response from {endpoint}")
-                        continue
-                else:
-                    print(f"HTTP {response.status_code} from {endpoint}")
-                    
-            except requests.RequestException as e:
-                print(f"Request failed for {endpoint}: {e}")
+            # Add specific params for some endpoints
+            params = {}
+            if "specials" in endpoint and sale_id:
+                params = {
+                    'saleId': sale_id,
+                    'areaName': area_name,
+                    'limit': 100
+                }
+            endpoint_requests.append((endpoint, params))
+        return endpoint_requests
+
+    def get_catalogue_api_data(self, sale_id: str = "60903", area_name: str = "QLD") -> List[Dict]:
+        """Try to fetch catalogue data from potential API endpoints"""
+        endpoint_requests = self.catalogue_requests(sale_id, area_name)
+        api_endpoints = [endpoint for endpoint, _ in endpoint_requests]
+        
+        # Probe every endpoint at once; the first in the list that answers with JSON wins
+        print(f"Trying {len(api_endpoints)} API endpoints")
+        responses = self.engine.run(self.engine.fetch_all(endpoint_requests))
+        
+        for endpoint, response in zip(api_endpoints, responses):
+            if isinstance(response, requests.RequestException):
+                print(f"Request failed for {endpoint}: {response}")
                 continue
+            if isinstance(response, Exception):
+                raise response
             
-            time.sleep(1)  # Rate limiting
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                    print(f"Success! Got data from: {endpoint}")
+                    print(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'List response'}")
+                    
+                    return self.parse_api_response(data)
+                except json.JSONDecodeError:
+                    print(f"Non-JSON response from {endpoint}")
+                    continue
+            else:
+                print(f"HTTP {response.status_code} from {endpoint}")
         
         return []
 
-    def parse_api_response(self, data: Dict) -> List[Dict]:
-        """Parse API response to extract product information"""
-        products = []
-        
+    def find_items(self, data) -> Optional[List]:
+        """The raw product items in an API response, or None if there are none"""
         # Handle different response structures
         items_data = None
         
@@ -132,15 +148,21 @@ class WoolworthsAPIScraper:
                     items_data = data[key]
                     break
         
+        return items_data if isinstance(items_data, list) and items_data else None
+
+    def parse_api_response(self, data: Dict) -> List[Dict]:
+        """Parse API response to extract product information"""
+        products = []
+        
+        items_data = self.find_items(data)
         if not items_data:
             print("Could not find product data in API response")
             return []
         
-        if isinstance(items_data, list):
-            for i, item in enumerate(items_data):
-                product = self.parse_api_product(item, i + 1)
-                if product:
-                    products.append(product)
+        for i, item in enumerate(items_data):
+            product = self.parse_api_product(item, i + 1)
+            if product:
+                products.append(product)
         
         return products
 
@@ -260,47 +282,11 @@ class WoolworthsAPIScraper:
     def scrape_catalogue_by_search(self, search_terms: List[str] = None) -> List[Dict]:
         """Try to get products by searching for common items"""
         if not search_terms:
-            search_terms = [
-                'milk', 'bread', 'cheese', 'chicken', 'beef', 'apple', 'banana',
-                'chocolate', 'coffee', 'tea', 'pasta', 'rice', 'yogurt'
-            ]
-        
-        all_products = []
+            search_terms = DEFAULT_SEARCH_TERMS
         
-        search_endpoints = [
-            "https://www.woolworths.com.au/api/v1/ui/search/products",
-            "https://www.woolworths.com.au/shop/search/products",
-            "https://www.woolworths.com.au/apis/ui/search/products"
-        ]
-        
-        for term in search_terms[:5]:  # Limit to first 5 terms
-            for endpoint in search_endpoints:
-                try:
-                    params = {
-                        'searchTerm': term,
-                        'pageNumber': 1,
-                        'pageSize': 20,
-                        'sortType': 'TraderRelevance'
-                    }
-                    
-                    print(f"Searching for '{term}' at {endpoint}")
-                    response = self.session.get(endpoint, params=params, timeout=10)
-                    
-                    if response.status_code == 200:
-                        try:
-                            data = response.json()
-                            products = self.parse_api_response(data)
-                            if products:
-                                print(f"Found {len(products)} products for '{term}'")
-                                all_products.extend(products)
-                                break
-                        except json.JSONDecodeError:
-                            continue
-                    
-                except requests.RequestException:
-                    continue
-                
-                time.sleep(0.5)  # Rate limiting
+        # Every term is searched at once; the rate limiter keeps it polite
+        results = self.engine.run(self._search_terms(search_terms, SEARCH_ENDPOINTS))
+        all_products = [product for products in results for product in products]
         
         # Remove duplicates by product name
         unique_products = {}
@@ -311,6 +297,79 @@ class WoolworthsAPIScraper:
         
         return list(unique_products.values())
 
+    async def _search_terms(self, search_terms: List[str], search_endpoints: List[str]) -> List[List[Dict]]:
+        return await asyncio.gather(*(self._search_term(term, search_endpoints) for term in search_terms))
+
+    async def _search_term(self, term: str, search_endpoints: List[str]) -> List[Dict]:
+        """Products for one search term from the first endpoint that has any"""
+        for endpoint in search_endpoints:
+            params = {
+                'searchTerm': term,
+                'pageNumber': 1,
+                'pageSize': 20,
+                'sortType': 'TraderRelevance'
+            }
+            
+            print(f"Searching for '{term}' at {endpoint}")
+            try:
+                response = await self.engine.fetch(endpoint, params)
+            except requests.RequestException:
+                continue
+            
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                except json.JSONDecodeError:
+                    continue
+                products = self.parse_api_response(data)
+                if products:
+                    print(f"Found {len(products)} products for '{term}'")
+                    return products
+        
+        return []
+
+    def harvest(self, output_path: str, search_terms: List[str] = None, sale_id: str = "60903",
+                area_name: str = "QLD", page_size: int = DEFAULT_PAGE_SIZE, resume: bool = True) -> int:
+        """Fetch every page of the catalogue and of each search term into a JSONL file
+        
+        Products are deduplicated by the API's product id and an
+        interrupted harvest resumes from its completed pages (see
+        api_harvester.py). Returns the number of products this run added.
+        """
+        if not search_terms:
+            search_terms = DEFAULT_SEARCH_TERMS
+        
+        harvester = PaginatedHarvester(self.engine, output_path, self.find_items, self.parse_api_product, resume)
+        try:
+            queries = [(f"catalogue {sale_id}", self.catalogue_requests(sale_id, area_name), offset_page_params)]
+            for term in search_terms:
+                search_requests = [(endpoint, {'searchTerm': term, 'sortType': 'TraderRelevance'})
+                                   for endpoint in SEARCH_ENDPOINTS]
+                queries.append((f"search '{term}'", search_requests, search_page_params))
+            written = sum(self.engine.run(self._harvest_queries(harvester, queries, page_size)))
+        finally:
+            harvester.close()
+        
+        print(f"Harvested {written} new products into {output_path} ({harvester.writer.count} in total)")
+        if harvester.failed_pages:
+            print(f"{harvester.failed_pages} pages failed; run again to fetch them")
+        return written
+
+    async def _harvest_queries(self, harvester: PaginatedHarvester, queries: List[tuple], page_size: int) -> List[int]:
+        return await asyncio.gather(*(self._harvest_query(harvester, name, endpoint_requests, page_params, page_size)
+                                      for name, endpoint_requests, page_params in queries))
+
+    async def _harvest_query(self, harvester: PaginatedHarvester, name: str, endpoint_requests: List[tuple],
+                             page_params, page_size: int) -> int:
+        """Harvest every page of a query from the first endpoint that answers it"""
+        for endpoint, params in endpoint_requests:
+            written = await harvester.harvest(f"{name} @ {endpoint}", endpoint, params, page_params, page_size)
+            if written is not None:
+                print(f"Harvested {written} new products for {name} from {endpoint}")
+                return written
+        print(f"No products for {name}")
+        return 0
+
     def scrape_catalogue(self, sale_id: str = "60903", area_name: str = "QLD") -> List[Dict]:
         """Main method to scrape catalogue data"""
         print("Attempting to scrape Woolworths catalogue via API...")
@@ -341,7 +400,30 @@ class WoolworthsAPIScraper:
         print(f"Saved {len(self.products)} products to {output_path}")
 
 def main():
-    scraper = WoolworthsAPIScraper()
+    parser = argparse.ArgumentParser(description='Scrape Woolworths catalogue specials via its APIs')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'Requests per second per host (default: {DEFAULT_RATE})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Requests in flight at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--harvest', metavar='OUTPUT',
+                        help='Fetch every page of the catalogue and searches into this JSONL file')
+    parser.add_argument('--terms', nargs='+', help='Search terms to harvest (default: a built-in list)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f'Products per page when harvesting (default: {DEFAULT_PAGE_SIZE})')
+    parser.add_argument('--restart', action='store_true',
+                        help='Discard an interrupted harvest instead of resuming it')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    
+    scraper = WoolworthsAPIScraper(rate=args.rate, concurrency=args.concurrency, session=session_from_args(args))
+    
+    if args.harvest:
+        try:
+            scraper.harvest(args.harvest, args.terms, page_size=args.page_size, resume=not args.restart)
+        finally:
+            print_cache_summary(scraper.session)
+            scraper.engine.close()
+        return
     
     try:
         products = scraper.scrape_catalogue()
@@ -373,6 +455,10 @@ def main():
         
     except Exception as e:
         print(f"Scraping failed: {e}")
+    
+    finally:
+        print_cache_summary(scraper.session)
+        scraper.engine.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
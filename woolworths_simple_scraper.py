@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 """
 Simple Woolworths Catalogue Scraper
-Uses requests and BeautifulSoup to scrape static content
+Uses requests and html_select (lxml or BeautifulSoup) to scrape static content
 """
 
 import json
+import argparse
 import requests
 import re
 from datetime import datetime
 from typing import List, Dict, Optional
 from pathlib import Path
-from bs4 import BeautifulSoup
+
+from brand_recognizer import recognize_brand
+from html_select import Node, parse_html
+from http_cache import add_cache_arguments, print_cache_summary, session_from_args
 
 class SimpleWoolworthsScraper:
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Args:
+            session: Session to fetch through, e.g. a caching one (see http_cache.py)
+        """
         self.products = []
-        self.session = requests.Session()
+        self.session = session or requests.Session()
         
         # Headers to mimic a real browser
         self.headers = {
@@ -50,17 +58,7 @@ class SimpleWoolworthsScraper:
 
     def extract_brand(self, name: str) -> Optional[str]:
         """Extract brand from product name"""
-        known_brands = [
-            'Woolworths', 'Pantene', 'Nescafe', 'Mars', 'Pringles', 'Maltesers', 
-            'Dove', 'Dettol', 'Colgate', 'Sorbent', 'Heinz', 'Cadbury', 
-            'Coca-Cola', 'Blackmores', 'Peters', 'Western Star'
-        ]
-        
-        name_lower = name.lower()
-        for brand in known_brands:
-            if brand.lower() in name_lower:
-                return brand
-        return None
+        return recognize_brand(name)
 
     def scrape_current_specials_page(self) -> List[Dict]:
         """Scrape the current specials page"""
@@ -76,14 +74,14 @@ class SimpleWoolworthsScraper:
                 response = self.session.get(url, timeout=30)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
+                    document = parse_html(response.content)
                     
                     # Save HTML for debugging
                     with open('woolworths_specials_debug.html', 'w', encoding='utf-8') as f:
-                        f.write(soup.prettify())
+                        f.write(response.text)
                     print("Saved page HTML to woolworths_specials_debug.html")
                     
-                    products = self.parse_specials_html(soup)
+                    products = self.parse_specials_html(document)
                     if products:
                         return products
                 
@@ -93,7 +91,7 @@ class SimpleWoolworthsScraper:
         
         return []
 
-    def parse_specials_html(self, soup: BeautifulSoup) -> List[Dict]:
+    def parse_specials_html(self, document: Node) -> List[Dict]:
         """Parse products from the specials HTML"""
         products = []
         
@@ -110,7 +108,7 @@ class SimpleWoolworthsScraper:
         
         product_elements = []
         for selector in selectors_to_try:
-            elements = soup.select(selector)
+            elements = document.select(selector)
             if elements:
                 print(f"Found {len(elements)} elements with selector: {selector}")
                 product_elements = elements
@@ -118,7 +116,7 @@ class SimpleWoolworthsScraper:
         
         if not product_elements:
             print("No product elements found, trying to extract from text content")
-            return self.extract_from_text_content(soup)
+            return self.extract_from_text_content(document)
         
         for i, element in enumerate(product_elements, 1):
             product = self.parse_product_element(element, i)
@@ -127,10 +125,10 @@ class SimpleWoolworthsScraper:
         
         return products
 
-    def extract_from_text_content(self, soup: BeautifulSoup) -> List[Dict]:
+    def extract_from_text_content(self, document: Node) -> List[Dict]:
         """Extract products from text content when structured elements aren't found"""
         products = []
-        text = soup.get_text()
+        text = document.get_text()
         
         # Look for price patterns in the text
         price_pattern = re.compile(r'\$(\d+)\.(\d{2})')
@@ -346,7 +344,11 @@ class SimpleWoolworthsScraper:
         print(f"Saved {len(self.products)} products to {output_path}")
 
 def main():
-    scraper = SimpleWoolworthsScraper()
+    parser = argparse.ArgumentParser(description='Scrape Woolworths specials from the static page')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    
+    scraper = SimpleWoolworthsScraper(session=session_from_args(args))
     
     try:
         products = scraper.scrape_catalogue()
@@ -378,6 +380,10 @@ def main():
         
     except Exception as e:
         print(f"Scraping failed: {e}")
+    
+    finally:
+        print_cache_summary(scraper.session)
+        scraper.session.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -21,7 +21,9 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+
+from brand_recognizer import recognize_brand
+from html_select import Node, parse_html
 
 @dataclass
 class Product:
@@ -106,17 +108,7 @@ class WoolworthsWebScraper:
 
     def extract_brand(self, name: str) -> Optional[str]:
         """Extract brand from product name"""
-        known_brands = [
-            'Woolworths', 'Pantene', 'Nescafe', 'Mars', 'Pringles', 'Maltesers', 
-            'Dove', 'Dettol', 'Colgate', 'Sorbent', 'Heinz', 'Cadbury', 
-            'Coca-Cola', 'Blackmores', 'Peters', 'Western Star'
-        ]
-        
-        name_lower = name.lower()
-        for brand in known_brands:
-            if brand.lower() in name_lower:
-                return brand
-        return None
+        return recognize_brand(name)
 
     def scrape_catalogue_page(self, catalogue_url: str) -> List[Product]:
         """Scrape products from a Woolworths catalogue page"""
@@ -155,14 +147,14 @@ class WoolworthsWebScraper:
             self.scroll_to_load_products()
             
             # Parse products
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            document = parse_html(self.driver.page_source)
             
             # Save page source for debugging
             with open('woolworths_page_debug.html', 'w', encoding='utf-8') as f:
                 f.write(self.driver.page_source)
             print("Saved page source to woolworths_page_debug.html for inspection")
             
-            return self.parse_products_from_html(soup)
+            return self.parse_products_from_html(document)
             
         except Exception as e:
             print(f"Error scraping catalogue: {e}")
@@ -171,7 +163,7 @@ class WoolworthsWebScraper:
     def try_alternative_parsing(self) -> List[Product]:
         """Try alternative parsing methods if main method fails"""
         products = []
-        soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+        document = parse_html(self.driver.page_source)
         
         # Try different product selectors
         selectors = [
@@ -183,7 +175,7 @@ class WoolworthsWebScraper:
         ]
         
         for selector in selectors:
-            elements = soup.select(selector)
+            elements = document.select(selector)
             if elements:
                 print(f"Found {len(elements)} products using selector: {selector}")
                 products = self.parse_product_elements(elements)
@@ -204,8 +196,8 @@ class WoolworthsWebScraper:
                 break
             last_height = new_height
 
-    def parse_products_from_html(self, soup: BeautifulSoup) -> List[Product]:
-        """Parse products from HTML soup"""
+    def parse_products_from_html(self, document: Node) -> List[Product]:
+        """Parse products from a parsed page"""
         products = []
         
         # Multiple selectors to try
@@ -219,7 +211,7 @@ class WoolworthsWebScraper:
         
         product_elements = []
         for selector in product_selectors:
-            elements = soup.select(selector)
+            elements = document.select(selector)
             if elements:
                 product_elements = elements
                 print(f"Using selector: {selector}, found {len(elements)} products")
@@ -227,7 +219,7 @@ class WoolworthsWebScraper:
         
         if not product_elements:
             print("No product elements found, trying to extract from any price elements")
-            return self.extract_from_price_elements(soup)
+            return self.extract_from_price_elements(document)
         
         for element in product_elements:
             product = self.parse_single_product(element)
@@ -236,7 +228,7 @@ class WoolworthsWebScraper:
         
         return products
 
-    def extract_from_price_elements(self, soup: BeautifulSoup) -> List[Product]:
+    def extract_from_price_elements(self, document: Node) -> List[Product]:
         """Extract products by finding price elements and working backwards"""
         products = []
         
@@ -250,7 +242,7 @@ class WoolworthsWebScraper:
         
         price_elements = []
         for selector in price_selectors:
-            elements = soup.select(selector)
+            elements = document.select(selector)
             if elements:
                 price_elements.extend(elements)
         
@@ -258,14 +250,14 @@ class WoolworthsWebScraper:
             price_text = price_elem.get_text(strip=True)
             if re.search(r'\$\d+\.?\d*', price_text):
                 # Find parent container that might contain product info
-                parent = price_elem.find_parent()
+                parent = price_elem.parent
                 for _ in range(5):  # Go up to 5 levels
                     if parent:
                         product = self.extract_product_from_container(parent, price_text)
                         if product:
                             products.append(product)
                             break
-                        parent = parent.find_parent()
+                        parent = parent.parent
                     else:
                         break
         